@@ -0,0 +1,145 @@
+"""健身车：飞轮 / 传动比 / 磁控阻力档位 -> 踏频、速度、功率查表（不依赖 Qt）
+
+曲柄转一圈飞轮转 gear_ratio 圈。磁控（涡流）阻尼对飞轮的阻力矩取常用的近似
+
+    τ(ω) = τ_档位 · 2x / (1 + x²),  x = ω / ω_c
+
+低速时与转速成正比，在临界转速 ω_c 处最大；各档位的 τ_档位 在 brake_min ~ brake_max
+之间按等比分布，另加恒定的轴承摩擦力矩。功率 P = (τ + friction)·ω，
+码表速度 = 踏频 × 每圈行程 development。
+
+`lookup_table` 对一组车型参数在细密的踏频网格上为所有档位一次算出功率表并缓存，
+之后按踏频查功率、按目标功率反查档位都在表上线性插值。
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from equipment import Column, Param
+
+RPM_TO_RAD = 2.0 * np.pi / 60.0
+# 功率表的踏频网格 (rpm)
+CADENCE_MAX = 200.0
+CADENCE_STEP = 0.25
+TABLE_CACHE_SIZE = 64
+
+BikeSpec = namedtuple('BikeSpec', 'flywheel_mass flywheel_radius gear_ratio levels brake_min brake_max '
+                                  'critical_rpm friction development')
+
+PARAMS = (
+    Param('flywheel_mass', '飞轮质量 (kg)', 6.0),
+    Param('flywheel_radius', '飞轮半径 (m)', 0.12),
+    Param('gear_ratio', '传动比（飞轮圈 / 曲柄圈）', 8.0),
+    Param('levels', '阻力档位数', 16),
+    Param('brake_min', '最低档阻力矩 (N·m)', 0.3),
+    Param('brake_max', '最高档阻力矩 (N·m)', 6.0),
+    Param('critical_rpm', '磁控临界转速（飞轮 RPM）', 1500.0),
+    Param('friction', '轴承摩擦力矩 (N·m)', 0.05),
+    Param('development', '每圈行程 (m)', 6.0),
+    Param('cadence', '踏频 (rpm)', '40:120:10', True),
+    Param('target_power', '目标功率 (W)', 150.0),
+)
+
+COLUMNS = (
+    Column('level', '档位', '.0f'),
+    Column('cadence', '踏频 (rpm)', 'g'),
+    Column('flywheel_rpm', '飞轮转速', '.0f'),
+    Column('speed_kmh', '速度 (km/h)', '.1f'),
+    Column('crank_torque', '曲柄扭矩 (N·m)', '.1f'),
+    Column('power', '功率 (W)', '.0f'),
+)
+
+RESULT_DTYPE = np.dtype([(c.key, 'f8') for c in COLUMNS])
+_LABELS = {p.name: p.label for p in PARAMS}
+
+
+def make_spec(values):
+    """{参数名: 值} -> BikeSpec，数值不合理时抛出 ValueError。"""
+    spec = BikeSpec(*(float(values[name]) for name in BikeSpec._fields))
+    if spec.levels < 1 or spec.levels != int(spec.levels):
+        raise ValueError('阻力档位数应为正整数')
+    for name in ('flywheel_mass', 'flywheel_radius', 'gear_ratio', 'brake_min', 'critical_rpm', 'development'):
+        if not getattr(spec, name) > 0:
+            raise ValueError(f'{_LABELS[name]} 必须为正')
+    if spec.brake_max < spec.brake_min:
+        raise ValueError('最高档阻力矩不能小于最低档')
+    if spec.friction < 0:
+        raise ValueError('摩擦力矩不能为负')
+    return spec._replace(levels=int(spec.levels))
+
+
+def level_torques(spec):
+    """各档位在临界转速处的阻力矩。"""
+    if spec.levels == 1:
+        return np.array([spec.brake_max])
+    return np.geomspace(spec.brake_min, spec.brake_max, spec.levels)
+
+
+def cadence_grid():
+    return np.arange(0.0, CADENCE_MAX + CADENCE_STEP / 2, CADENCE_STEP)
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def lookup_table(spec):
+    """(档位数, 踏频网格点数) 的功率表 (W)，只读。"""
+    fly_rpm = cadence_grid() * spec.gear_ratio
+    x = fly_rpm / spec.critical_rpm
+    tau = level_torques(spec)[:, None] * (2.0 * x / (1.0 + x * x)) + spec.friction
+    table = tau * fly_rpm * RPM_TO_RAD
+    table.setflags(write=False)
+    return table
+
+
+def power_at(spec, cadence):
+    """各档位在给定踏频下的功率 (档位数, len(cadence))；超出网格的踏频为 NaN。"""
+    cadence = np.asarray(cadence, dtype=float)
+    table = lookup_table(spec)
+    pos = cadence / CADENCE_STEP
+    i = np.clip(np.floor(pos).astype(int), 0, table.shape[1] - 2)
+    frac = pos - i
+    out = table[:, i] * (1.0 - frac) + table[:, i + 1] * frac
+    out[:, (cadence < 0) | (cadence > CADENCE_MAX)] = np.nan
+    return out
+
+
+def level_for_power(spec, cadence, power):
+    """在各踏频下达到 power 所需的档位（1 ~ levels，可为小数）；超出档位范围为 NaN。"""
+    table = power_at(spec, cadence)
+    levels = np.arange(1, spec.levels + 1, dtype=float)
+    out = np.full(table.shape[1], np.nan)
+    for j in range(table.shape[1]):
+        col = table[:, j]
+        if np.isfinite(col).all() and col[0] <= power <= col[-1]:
+            out[j] = levels[0] if spec.levels == 1 else np.interp(power, col, levels)
+    return out
+
+
+def equivalent_mass(spec):
+    """飞轮折算到码表速度上的等效惯性质量 (kg)，与实际骑行的人车质量相比即“路感”。"""
+    inertia = 0.5 * spec.flywheel_mass * spec.flywheel_radius ** 2
+    return inertia * (2.0 * np.pi * spec.gear_ratio / spec.development) ** 2
+
+
+def solve(values):
+    spec = make_spec(values)
+    cadence = np.asarray(values['cadence'], dtype=float)
+    if not ((cadence > 0) & (cadence <= CADENCE_MAX)).all():
+        raise ValueError(f'踏频应在 0 ~ {CADENCE_MAX:g} rpm 之间')
+    power = power_at(spec, cadence)
+    rows = np.empty(power.size, dtype=RESULT_DTYPE)
+    rows['level'] = np.repeat(np.arange(1, spec.levels + 1), len(cadence))
+    rows['cadence'] = np.tile(cadence, spec.levels)
+    rows['flywheel_rpm'] = rows['cadence'] * spec.gear_ratio
+    rows['speed_kmh'] = rows['cadence'] * spec.development * 60.0 / 1000.0
+    rows['power'] = power.ravel()
+    rows['crank_torque'] = rows['power'] / (rows['cadence'] * RPM_TO_RAD)
+
+    notes = [f'飞轮等效惯性质量 {equivalent_mass(spec):.1f} kg（折算到码表速度）']
+    target = float(values['target_power'])
+    if target > 0:
+        need = level_for_power(spec, cadence, target)
+        parts = [f'{c:g} rpm ' + (f'档位 {lv:.1f}' if np.isfinite(lv) else '超出档位范围')
+                 for c, lv in zip(cadence, need)]
+        notes.append(f'{target:g} W 所需档位：' + '，'.join(parts))
+    return rows, notes
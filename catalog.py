@@ -0,0 +1,423 @@
+"""型号目录的内存表示（不依赖 Qt）
+
+每个型号是一个带 `__slots__` 的 `ModelRecord`：传动参数与计算结果都以 float
+（或 None 表示留空）保存，自定义字段的值放在按共享 `FieldSchema` 槽位排列的
+列表中，各记录不再各自保存一份字段名。
+
+只有在显示与导出（models.json / SQLite / 日志）时才转换回字符串，
+`to_dict` 输出的格式与原 models.json 一致。
+
+`Catalog.columns()` 提供按列排列的 NumPy 视图（每个参数一列），
+供结构化查询等批量筛选使用；列按需构建并缓存，目录变化时失效。
+"""
+import numpy as np
+
+import drivetrain
+
+# 型号记录中的数值输入参数（与 models.json 的键一致）
+INPUT_KEYS = (
+    'motor_power',
+    'motor_rpm',
+    'motor_pulley_d',
+    'sec1',
+    'sec2',
+    'roller_pulley_d',
+    'roller_diameter',
+    'belt_kmh',
+)
+
+# 'computed' 块中的键（保存时结果标签上显示的值）
+COMPUTED_KEYS = (
+    'roller_rpm',
+    'motor_rpm',
+    'belt_kmh',
+    'gear_ratio',
+    'sec1',
+    'sec2',
+    'roller_diameter',
+)
+
+
+def parse_number(value):
+    """'4566' / 4566 / '' / None -> float 或 None。"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        text = str(value).strip()
+        if text == '':
+            return None
+        return float(text)
+    except ValueError:
+        return None
+
+
+def parse_ratio(value):
+    """传动比文本：'2.5:1' / '1:2.174' / '0.46' -> float，无法解析时为 None。"""
+    if isinstance(value, str) and ':' in value:
+        a, _, b = value.partition(':')
+        a, b = parse_number(a), parse_number(b)
+        if a is None or b is None or b == 0:
+            return None
+        return a / b
+    return parse_number(value)
+
+
+def format_number(value):
+    """输入参数 -> 文本：整数不带小数点，其余用最短的精确表示。"""
+    if value is None:
+        return ''
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def format_result(value):
+    """计算结果 -> 文本（与结果标签一致，保留 3 位小数）。"""
+    if value is None:
+        return '-'
+    return f'{value:.3f}'
+
+
+class FieldSchema:
+    """自定义字段名 -> 槽位下标，由目录中的所有记录共享。
+
+    槽位只增不减：删除字段只影响显示列表，已有记录中的值仍保留并照常导出。
+    """
+
+    __slots__ = ('names', 'index')
+
+    def __init__(self, names=()):
+        self.names = []
+        self.index = {}
+        for name in names:
+            self.slot(name)
+
+    def slot(self, name, create=True):
+        i = self.index.get(name)
+        if i is None and create:
+            i = len(self.names)
+            self.names.append(name)
+            self.index[name] = i
+        return i
+
+
+class ModelRecord:
+    """单个产品型号。数值为 float 或 None；`values` 按 FieldSchema 槽位存放字段文本，
+    None 表示该记录没有这个字段（与空串区分，保证导出时键集合不变）。"""
+
+    __slots__ = INPUT_KEYS + ('use_secondary', 'computed', 'extras', 'values')
+
+    def __init__(self):
+        for key in INPUT_KEYS:
+            setattr(self, key, None)
+        self.use_secondary = False
+        self.computed = (None,) * len(COMPUTED_KEYS)
+        self.extras = None
+        self.values = []
+
+    @classmethod
+    def from_dict(cls, data, schema):
+        rec = cls()
+        for key in INPUT_KEYS:
+            setattr(rec, key, parse_number(data.get(key)))
+        rec.use_secondary = bool(data.get('use_secondary', False))
+        comp = data.get('computed') or {}
+        rec.computed = tuple(
+            parse_ratio(comp.get(k)) if k == 'gear_ratio' else parse_number(comp.get(k))
+            for k in COMPUTED_KEYS)
+        rec.extras = dict(data['extras']) if data.get('extras') else None
+        values = []
+        for fld, val in (data.get('fields') or {}).items():
+            i = schema.slot(fld)
+            if i >= len(values):
+                values.extend([None] * (i + 1 - len(values)))
+            values[i] = '' if val is None else str(val)
+        rec.values = values
+        return rec
+
+    def field(self, schema, name, default=''):
+        i = schema.index.get(name)
+        if i is None or i >= len(self.values) or self.values[i] is None:
+            return default
+        return self.values[i]
+
+    def computed_value(self, key):
+        return self.computed[COMPUTED_KEYS.index(key)]
+
+    def with_computed(self, computed):
+        """只替换 computed 块的新记录（其余属性共享，原记录不变）。"""
+        rec = ModelRecord.__new__(ModelRecord)
+        for key in self.__slots__:
+            setattr(rec, key, getattr(self, key))
+        rec.computed = tuple(computed)
+        return rec
+
+    def to_dict(self, schema):
+        """导出为 models.json 中的记录格式（全部转换为字符串）。"""
+        data = {
+            'motor_power': format_number(self.motor_power),
+            'motor_rpm': format_number(self.motor_rpm),
+            'motor_pulley_d': format_number(self.motor_pulley_d),
+            'use_secondary': self.use_secondary,
+            'sec1': format_number(self.sec1),
+            'sec2': format_number(self.sec2),
+            'roller_pulley_d': format_number(self.roller_pulley_d),
+            'roller_diameter': format_number(self.roller_diameter),
+            'belt_kmh': format_number(self.belt_kmh),
+        }
+        data['computed'] = {
+            k: (drivetrain.format_gear_ratio(v) if k == 'gear_ratio' else format_result(v))
+            for k, v in zip(COMPUTED_KEYS, self.computed)
+        }
+        data['extras'] = dict(self.extras) if self.extras else {}
+        data['fields'] = {schema.names[i]: v for i, v in enumerate(self.values) if v is not None}
+        return data
+
+
+class SortedColumn:
+    """数值列的有序索引：去掉缺失值后按值升序排列，区间查询为两次二分查找。"""
+
+    __slots__ = ('values', 'rows', 'names')
+
+    def __init__(self, column, names):
+        rows = np.flatnonzero(~np.isnan(column))
+        rows = rows[np.argsort(column[rows], kind='stable')]
+        self.values = column[rows]
+        self.rows = rows           # 在原列中的行号
+        self.names = names[rows]
+
+    def __len__(self):
+        return len(self.values)
+
+    def bounds(self, lo=None, hi=None, lo_open=False, hi_open=False):
+        """落在 [lo, hi]（lo_open / hi_open 为开区间）内的位置范围 (start, stop)。"""
+        start = 0 if lo is None else int(np.searchsorted(self.values, lo, 'right' if lo_open else 'left'))
+        stop = len(self.values) if hi is None else int(np.searchsorted(self.values, hi, 'left' if hi_open else 'right'))
+        return start, max(start, stop)
+
+    def range(self, lo=None, hi=None, lo_open=False, hi_open=False):
+        """区间内的型号名称（按值升序）。"""
+        start, stop = self.bounds(lo, hi, lo_open, hi_open)
+        return self.names[start:stop]
+
+
+class ColumnRows:
+    """列式视图中部分行的视图：各列取自父视图的缓存列，按行号切片。"""
+
+    def __init__(self, parent, rows):
+        self.parent = parent
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def name_array(self):
+        return self.parent.name_array()[self.rows]
+
+    def number(self, key):
+        return self.parent.number(key)[self.rows]
+
+    def computed(self, key):
+        return self.parent.computed(key)[self.rows]
+
+    def flag(self):
+        return self.parent.flag()[self.rows]
+
+    def text(self, field):
+        return self.parent.text(field)[self.rows]
+
+    def field_number(self, field):
+        return self.parent.field_number(field)[self.rows]
+
+
+class CatalogColumns:
+    """目录的列式视图：`names` 的顺序即各列的行顺序，列按需构建并缓存。"""
+
+    def __init__(self, catalog, names=None):
+        self.catalog = catalog
+        self.names = list(catalog) if names is None else list(names)
+        self._recs = [catalog[n] for n in self.names]
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def name_array(self):
+        """型号名称的 object 数组，便于按布尔掩码取出匹配的型号。"""
+        def build():
+            arr = np.empty(len(self.names), dtype=object)
+            arr[:] = self.names
+            return arr
+        return self._column(('names',), build)
+
+    def _column(self, key, build):
+        col = self._cache.get(key)
+        if col is None:
+            col = self._cache[key] = build()
+        return col
+
+    @staticmethod
+    def _floats(values, n):
+        return np.fromiter((np.nan if v is None else v for v in values), dtype=float, count=n)
+
+    def number(self, key):
+        """输入参数列（INPUT_KEYS），留空为 NaN。"""
+        return self._column(('num', key), lambda: self._floats(
+            (getattr(r, key) for r in self._recs), len(self._recs)))
+
+    def computed(self, key):
+        """'computed' 块中的结果列，'-' 为 NaN。"""
+        i = COMPUTED_KEYS.index(key)
+        return self._column(('computed', key), lambda: self._floats(
+            (r.computed[i] for r in self._recs), len(self._recs)))
+
+    def flag(self):
+        """use_secondary 列。"""
+        return self._column(('flag',), lambda: np.fromiter(
+            (r.use_secondary for r in self._recs), dtype=bool, count=len(self._recs)))
+
+    def text(self, field):
+        """自定义字段的文本列（object 数组），没有该字段为 ''。"""
+        def build():
+            i = self.catalog.schema.index.get(field)
+            col = np.empty(len(self._recs), dtype=object)
+            if i is None:
+                col[:] = ''
+            else:
+                col[:] = [(r.values[i] if i < len(r.values) and r.values[i] is not None else '')
+                          for r in self._recs]
+            return col
+        return self._column(('text', field), build)
+
+    def take(self, rows):
+        """只含指定行号的视图（复用本视图已缓存的列）。"""
+        return ColumnRows(self, rows)
+
+    def sorted_index(self, kind, key):
+        """数值列的有序索引；kind 为 'input' / 'computed' / 'field'。"""
+        def build():
+            if kind == 'input':
+                col = self.number(key)
+            elif kind == 'computed':
+                col = self.computed(key)
+            else:
+                col = self.field_number(key)
+            return SortedColumn(col, self.name_array())
+        return self._column(('sorted', kind, key), build)
+
+    def field_number(self, field):
+        """自定义字段按数值解析后的列，无法解析为 NaN。"""
+        return self._column(('field_num', field), lambda: self._floats(
+            (parse_number(v) for v in self.text(field)), len(self._recs)))
+
+
+class Catalog:
+    """型号名称 -> ModelRecord 的映射，附带共享的字段槽位表。
+
+    提供与原来的 dict 相同的映射接口（in、[]、get、keys、items、del ...）。
+    """
+
+    def __init__(self, schema=None, records=None):
+        self.schema = schema if schema is not None else FieldSchema()
+        self._records = records if records is not None else {}
+        self._columns = None
+
+    def __getstate__(self):
+        # 列缓存可随时重建，不写入启动快照
+        return {'schema': self.schema, '_records': self._records}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._columns = None
+
+    def columns(self, names=None):
+        """列式视图；不指定 names 时为整个目录（缓存到下一次修改）。"""
+        if names is not None:
+            return CatalogColumns(self, names)
+        if self._columns is None:
+            self._columns = CatalogColumns(self)
+        return self._columns
+
+    @classmethod
+    def from_dicts(cls, models):
+        cat = cls()
+        for name, data in models.items():
+            cat._records[name] = ModelRecord.from_dict(data, cat.schema)
+        return cat
+
+    def to_dicts(self):
+        return {name: rec.to_dict(self.schema) for name, rec in self._records.items()}
+
+    def put_dict(self, name, data):
+        """用 models.json 格式的记录新增或替换一个型号，返回新的 ModelRecord。"""
+        rec = ModelRecord.from_dict(data, self.schema)
+        self._records[name] = rec
+        self._columns = None
+        return rec
+
+    def set_computed(self, name, computed):
+        """替换型号的 computed 块（COMPUTED_KEYS 顺序，空为 None），返回新的 ModelRecord。"""
+        rec = self._records[name].with_computed(computed)
+        self._records[name] = rec
+        self._columns = None
+        return rec
+
+    def export(self, name):
+        return self._records[name].to_dict(self.schema)
+
+    def field_text(self, name, field):
+        rec = self._records.get(name)
+        return '' if rec is None else rec.field(self.schema, field)
+
+    def field_values(self, name):
+        """型号的全部非空字段值（供搜索索引使用）。"""
+        rec = self._records.get(name)
+        return [] if rec is None else [v for v in rec.values if v]
+
+    def copy(self):
+        """浅拷贝（记录只会被整体替换，不会原地修改，可安全交给后台线程导出）。"""
+        return Catalog(self.schema, dict(self._records))
+
+    # ---------------- 映射接口 ----------------
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __contains__(self, name):
+        return name in self._records
+
+    def __getitem__(self, name):
+        return self._records[name]
+
+    def __setitem__(self, name, rec):
+        self._records[name] = rec
+        self._columns = None
+
+    def __delitem__(self, name):
+        del self._records[name]
+        self._columns = None
+
+    def get(self, name, default=None):
+        return self._records.get(name, default)
+
+    def pop(self, name, *default):
+        self._columns = None
+        return self._records.pop(name, *default)
+
+    def keys(self):
+        return self._records.keys()
+
+    def values(self):
+        return self._records.values()
+
+    def items(self):
+        return self._records.items()
+
+
+def export_dicts(models):
+    """Catalog 或普通 dict -> models.json 格式的 dict（供各存储后端使用）。"""
+    if isinstance(models, Catalog):
+        return models.to_dicts()
+    return dict(models)
@@ -0,0 +1,273 @@
+"""跑步机传动计算引擎（不依赖 Qt）
+
+所有函数都接受标量或 NumPy 数组并按元素广播，一次调用即可求解成千上万组设计。
+缺失值统一用 NaN 表示（None 会被转换为 NaN）。
+
+界面中的 `TreadmillTab.compute_missing` 与批量工具共用这里的 `solve`。
+"""
+from math import pi
+
+import numpy as np
+
+
+# 传动方程中的变量：
+#   belt_kmh = K · roller_diameter · motor_rpm · (motor_pulley_d / sec1) · (sec2 / roller_pulley_d)
+# 取对数后为线性方程 Σ e_i·log(x_i) = -log(K)，任意一个未知量都有闭式解。
+DRIVE_VARS = (
+    'motor_rpm',
+    'motor_pulley_d',
+    'sec1',
+    'sec2',
+    'roller_pulley_d',
+    'roller_diameter',
+    'belt_kmh',
+)
+DRIVE_EXPONENTS = np.array([1.0, 1.0, -1.0, 1.0, -1.0, 1.0, -1.0])
+# km/h = π · D(mm)/1000 · rpm / 60 · 3.6
+BELT_K = pi * 6e-5
+LOG_CONST = -np.log(BELT_K)
+
+# 多解时求“最小范数”解所参照的典型设计（对数空间内离它最近）
+DEFAULT_REFERENCE = {
+    'motor_rpm': 4000.0,
+    'motor_pulley_d': 40.0,
+    'sec1': 80.0,
+    'sec2': 40.0,
+    'roller_pulley_d': 80.0,
+    'roller_diameter': 50.0,
+    'belt_kmh': 12.0,
+}
+
+# 参与“有且只有一项留空”判断的字段（顺序即 `missing` 列的编号）；
+# sec1/sec2 仅在启用二级传动时计入
+CORE_FIELDS = ('motor_power',) + DRIVE_VARS
+
+# 每行的错误码
+OK = 0
+ERR_NO_EMPTY = 1          # 没有留空项
+ERR_MULTI_EMPTY = 2       # 留空项多于一个
+ERR_MOTOR_POWER = 3       # 电机功率无法由转速/带轮推出
+ERR_INVALID = 4           # 数值无效（直径或转速非正等）
+
+# 错误码 -> (级别, 提示文本)；级别对应 QMessageBox 的 information / warning
+ERROR_MESSAGES = {
+    ERR_NO_EMPTY: ('information', '没有留空项 — 无需计算。'),
+    ERR_MULTI_EMPTY: ('warning', '请只留空一项以便计算。'),
+    ERR_MOTOR_POWER: ('information', '电机功率需基于负载或扭矩估算，目前无法仅用带轮/转速计算。'),
+    ERR_INVALID: ('warning', '输入数值无效（直径与转速必须为正数），无法计算。'),
+}
+
+# `solve_drive` 返回的结构化数组类型
+DRIVE_DTYPE = np.dtype(
+    [(name, 'f8') for name in DRIVE_VARS] + [
+        ('roller_rpm', 'f8'),
+        ('gear_ratio', 'f8'),
+        ('residual', 'f8'),   # 无未知量时方程的相对误差
+        ('n_unknown', 'i1'),
+        ('first_unknown', 'i1'),   # 第一个未知量在 DRIVE_VARS 中的下标，-1 表示无
+        ('error', 'i1'),
+    ])
+
+# `solve` 返回的结构化数组类型
+RESULT_DTYPE = np.dtype(
+    [(name, 'f8') for name in DRIVE_VARS] + [
+        ('roller_rpm', 'f8'),
+        ('gear_ratio', 'f8'),
+        ('missing', 'i1'),   # 求解的字段在 CORE_FIELDS 中的下标，-1 表示无
+        ('error', 'i1'),
+    ])
+
+
+def as_array(x):
+    """把标量 / 列表 / None 转为 float64 数组，None 变为 NaN。"""
+    if x is None:
+        return np.array(np.nan)
+    return np.asarray(x, dtype=float)
+
+
+def format_gear_ratio(ratio):
+    """格式化传动比为 N:1 或 1:N 形式，保留最多 3 位小数并去除多余零。"""
+    if ratio is None:
+        return '-'
+    try:
+        r = float(ratio)
+    except Exception:
+        return str(ratio)
+    if r != r:
+        return '-'
+    if r == 0:
+        return '0:1'
+    if r >= 1.0:
+        s = f"{r:.3f}".rstrip('0').rstrip('.')
+        return f"{s}:1"
+    else:
+        inv = 1.0 / r
+        s = f"{inv:.3f}".rstrip('0').rstrip('.')
+        return f"1:{s}"
+
+
+def roller_rpm_from_belt_kmh(kmh, roller_d_mm):
+    """由跑带时速 (km/h) 与滚筒直径 (mm) 求滚筒转速；直径非正时为 NaN。"""
+    kmh = as_array(kmh)
+    d = as_array(roller_d_mm)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rpm = (kmh / 3.6) * 60.0 / (pi * (d / 1000.0))
+    return np.where(d > 0, rpm, np.nan)
+
+
+def belt_kmh_from_roller_rpm(roller_rpm, roller_d_mm):
+    """由滚筒转速与滚筒直径 (mm) 求跑带时速 (km/h)。"""
+    v = (pi * (as_array(roller_d_mm) / 1000.0) * as_array(roller_rpm)) / 60.0
+    return v * 3.6
+
+
+def gear_ratio_total(motor_pulley, roller_pulley, use_secondary, sec1, sec2):
+    """总传动比 motor->roller（滚筒转速 / 电机转速）；尺寸不全时为 NaN。"""
+    motor_pulley = as_array(motor_pulley)
+    roller_pulley = as_array(roller_pulley)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        single = motor_pulley / roller_pulley
+        double = (motor_pulley / as_array(sec1)) * (as_array(sec2) / roller_pulley)
+    return np.where(np.asarray(use_secondary, dtype=bool), double, single)
+
+
+def solve_drive(motor_rpm=None, motor_pulley_d=None, sec1=None, sec2=None,
+                roller_pulley_d=None, roller_diameter=None, belt_kmh=None,
+                use_secondary=False, reference=None):
+    """通用传动方程求解：任意未知量（NaN/None）都可以求。
+
+    - 一个未知量：闭式解；
+    - 多个未知量：返回对数空间内离 `reference`（默认 DEFAULT_REFERENCE）最近的
+      最小范数解，即把所需的比例按乘法均匀分摊到各未知量上；完整解族见 `SolutionFamily`；
+    - 没有未知量：`residual` 给出方程的相对误差，可用于一致性检查。
+
+    未启用二级传动的行忽略 sec1/sec2（输出为 NaN）。所有参数可为标量或数组，
+    按 NumPy 规则广播；返回形状为 (n,) 的结构化数组，类型为 DRIVE_DTYPE。
+    """
+    ref = dict(DEFAULT_REFERENCE)
+    if reference:
+        ref.update(reference)
+    given = (motor_rpm, motor_pulley_d, sec1, sec2, roller_pulley_d, roller_diameter, belt_kmh)
+    cols = np.broadcast_arrays(*[np.atleast_1d(as_array(a)) for a in given],
+                               np.atleast_1d(as_array(use_secondary)),
+                               *[np.atleast_1d(as_array(ref[name])) for name in DRIVE_VARS])
+    cols = [c.ravel() for c in cols]
+    X = np.stack(cols[:7], axis=1)
+    use_sec = np.nan_to_num(cols[7]) != 0
+    R = np.stack(cols[8:], axis=1)
+    n = X.shape[0]
+
+    active = np.ones_like(X, dtype=bool)
+    active[:, 2:4] = use_sec[:, None]
+    unknown = np.isnan(X) & active
+    invalid = (active & ~unknown & ~(X > 0)).any(axis=1) | (unknown & ~(R > 0)).any(axis=1)
+    E = DRIVE_EXPONENTS * active
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Y = np.log(np.where(unknown | ~active, 1.0, X))
+        Y0 = np.log(R)
+        # 已知量的贡献，剩余部分由未知量承担
+        b = LOG_CONST - (E * np.where(unknown, 0.0, Y)).sum(axis=1)
+        A = np.where(unknown, E, 0.0)
+        k = unknown.sum(axis=1)
+        t = (b - (A * Y0).sum(axis=1)) / k
+        Ysol = np.where(unknown, Y0 + A * t[:, None], Y)
+        vals = np.where(active, np.exp(Ysol), np.nan)
+
+    out = np.empty(n, dtype=DRIVE_DTYPE)
+    for i, name in enumerate(DRIVE_VARS):
+        out[name] = vals[:, i]
+    ratio = gear_ratio_total(out['motor_pulley_d'], out['roller_pulley_d'], use_sec, out['sec1'], out['sec2'])
+    out['gear_ratio'] = ratio
+    out['roller_rpm'] = out['motor_rpm'] * ratio
+    with np.errstate(over='ignore', invalid='ignore'):
+        out['residual'] = np.where(k == 0, np.expm1(-b), 0.0)
+    out['n_unknown'] = k
+    out['first_unknown'] = np.where(k > 0, unknown.argmax(axis=1), -1)
+    out['error'] = np.where(invalid, ERR_INVALID, OK)
+    for name in DRIVE_VARS + ('roller_rpm', 'gear_ratio', 'residual'):
+        out[name][invalid] = np.nan
+    return out
+
+
+class SolutionFamily:
+    """多个未知量时的解族：前 k-1 个未知量作为自由参数，最后一个由闭式解确定。
+
+    用法::
+
+        fam = SolutionFamily(use_secondary=True, motor_rpm=4566, roller_diameter=45,
+                             belt_kmh=16, roller_pulley_d=80, sec1=None, sec2=None,
+                             motor_pulley_d=40)
+        fam.free, fam.dependent        # ('sec1',), 'sec2'
+        fam.evaluate(sec1=[60, 70, 80])  # 批量得到对应的 sec2
+        fam.minimum_norm()             # 离参考设计最近的一组解
+    """
+
+    def __init__(self, use_secondary=False, reference=None, **values):
+        self.use_secondary = bool(use_secondary)
+        self.reference = reference
+        self.values = {name: values.get(name) for name in DRIVE_VARS}
+        unknown = []
+        for name in DRIVE_VARS:
+            if name in ('sec1', 'sec2') and not self.use_secondary:
+                continue
+            v = self.values[name]
+            if v is None or np.isnan(as_array(v)).any():
+                unknown.append(name)
+        self.unknown = tuple(unknown)
+        self.free = self.unknown[:-1]
+        self.dependent = self.unknown[-1] if self.unknown else None
+
+    def evaluate(self, **free_values):
+        """给定自由参数（标量或数组），返回 DRIVE_DTYPE 结构化数组。"""
+        vals = dict(self.values)
+        for name in self.free:
+            if name not in free_values:
+                raise ValueError(f'缺少自由参数: {name}')
+            vals[name] = free_values[name]
+        return solve_drive(use_secondary=self.use_secondary, reference=self.reference, **vals)
+
+    def minimum_norm(self):
+        return solve_drive(use_secondary=self.use_secondary, reference=self.reference, **self.values)
+
+
+def solve(motor_rpm, motor_pulley_d, roller_pulley_d, roller_diameter, belt_kmh,
+          use_secondary=False, sec1=None, sec2=None, motor_power=None):
+    """批量求解“唯一留空项”（界面“计算”按钮的语义）。
+
+    每个参数可以是标量或数组（按 NumPy 规则广播），缺失值为 NaN/None。
+    `motor_power` 传 None 表示不参与留空判断（批量计算通常不关心功率）；
+    传入数组时与界面一致，功率留空即视为要求解功率。
+    启用二级传动时 sec1/sec2 与其它字段一样可以作为留空项求解。
+
+    返回形状为 (n,) 的结构化数组，类型为 RESULT_DTYPE。
+    """
+    drv = solve_drive(motor_rpm, motor_pulley_d, sec1, sec2, roller_pulley_d, roller_diameter,
+                      belt_kmh, use_secondary=use_secondary)
+    n = drv.shape[0]
+    if motor_power is None:
+        power_empty = np.zeros(n, dtype=bool)
+    else:
+        power_empty = np.isnan(np.broadcast_to(np.atleast_1d(as_array(motor_power)).ravel(), (n,)))
+    n_empty = drv['n_unknown'] + power_empty
+
+    out = np.empty(n, dtype=RESULT_DTYPE)
+    for name in DRIVE_VARS + ('roller_rpm', 'gear_ratio'):
+        out[name] = drv[name]
+    # 唯一留空项的编号
+    missing = np.full(n, -1, dtype=np.int8)
+    missing[power_empty & (n_empty == 1)] = 0
+    one = (drv['n_unknown'] == 1) & (n_empty == 1)
+    missing[one] = 1 + drv['first_unknown'][one]
+    out['missing'] = missing
+
+    err = drv['error'].copy()
+    err = np.where(n_empty == 0, ERR_NO_EMPTY, err)
+    err = np.where(n_empty > 1, ERR_MULTI_EMPTY, err)
+    err = np.where((n_empty == 1) & power_empty, ERR_MOTOR_POWER, err)
+    out['error'] = err
+    # 出错行不保留半成品结果
+    failed = err != OK
+    for name in DRIVE_VARS + ('roller_rpm', 'gear_ratio'):
+        out[name][failed] = np.nan
+    return out
@@ -0,0 +1,104 @@
+"""器材模块注册表：各器材选项卡的声明与按需加载（不依赖 Qt）
+
+每种器材登记为 Equipment(key, 标题, 模块名)，模块在选项卡第一次被选中时才导入（`load`），
+因此器材增多时启动耗时不变。模块名为 None 的器材尚未实现（显示占位）。
+
+器材插件模块需要声明：
+
+- `PARAMS`：Param 元组，界面按顺序生成输入框；multi 为真的参数可填多个值或范围
+  （见 parse_values），求解器收到数组，否则收到 float；
+- `COLUMNS`：Column 元组，结果表格的列（key 为结果数组的字段名，fmt 为格式说明，如 '.1f'）；
+- `solve(values)`：{参数名: 值} -> (结果结构化数组, 说明文字列表)，输入不合理时抛出 ValueError。
+
+通用表格不适用的器材改为提供 `make_tab(window)`，返回自己的选项卡控件（window 为主窗口，
+如电机选项卡从中取跑步机的设计）；控件有后台计算时提供 stop()，关闭窗口前调用。
+"""
+import csv
+import importlib
+from collections import namedtuple
+
+import numpy as np
+
+Equipment = namedtuple('Equipment', 'key title module')
+Param = namedtuple('Param', 'name label default multi')
+Param.__new__.__defaults__ = (False,)
+Column = namedtuple('Column', 'key label fmt')
+
+# 插件模块必须提供的属性（提供 make_tab 的除外）
+PLUGIN_ATTRS = ('PARAMS', 'COLUMNS', 'solve')
+
+_REGISTRY = {}
+
+
+def register(key, title, module=None):
+    """登记器材（按登记顺序排列选项卡）；同一 key 再次登记时替换。"""
+    _REGISTRY[key] = Equipment(key, title, module)
+
+
+def entries():
+    return list(_REGISTRY.values())
+
+
+def get(key):
+    return _REGISTRY[key]
+
+
+def load(key):
+    """导入器材的插件模块并检查声明是否完整。"""
+    entry = _REGISTRY[key]
+    if entry.module is None:
+        raise ValueError(f'{entry.title} 没有插件模块')
+    module = importlib.import_module(entry.module)
+    if hasattr(module, 'make_tab'):
+        return module
+    missing = [a for a in PLUGIN_ATTRS if not hasattr(module, a)]
+    if missing:
+        raise ValueError(f'插件 {entry.module} 缺少: ' + ', '.join(missing))
+    return module
+
+
+def parse_values(text):
+    """'10' / '8, 10, 12' / '80:200:20'（起:止:步长，含终点）-> 取值数组。"""
+    values = []
+    for part in text.replace('，', ',').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if ':' in part:
+            pieces = [float(x) for x in part.split(':')]
+            if len(pieces) != 3 or pieces[2] <= 0:
+                raise ValueError(f'范围应写作 起:止:步长，如 80:200:20（{part}）')
+            lo, hi, step = pieces
+            count = int(np.floor((hi - lo) / step + 1e-9)) + 1
+            values.extend((lo + step * np.arange(max(count, 0))).tolist())
+        else:
+            values.append(float(part))
+    if not values:
+        raise ValueError('没有取值')
+    return np.array(values)
+
+
+def parse_param(param, text):
+    """输入框文本 -> 求解器的值；出错时抛出带参数名的 ValueError。"""
+    try:
+        if param.multi:
+            return parse_values(text)
+        return float(text)
+    except ValueError as e:
+        raise ValueError(f'{param.label}: {e}' if param.multi else f'{param.label}: 请输入数字')
+
+
+def write_csv(path, names, rows):
+    """列名与逐行的值写成 CSV（带 BOM，Excel 可直接打开中文）。"""
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        writer.writerows(rows)
+
+
+register('motor', '电机', 'motor_tab')
+register('rower', '划船器', 'rower_tab')
+register('vibration', '抖抖机', 'vibration_sim')
+register('strength', '力量')
+register('bike', '健身车', 'bike_sim')
+register('massage_gun', '筋膜枪')
@@ -0,0 +1,99 @@
+"""进程内共享的自定义字段注册表
+
+各选项卡（跑步机、设置，以及之后的电机 / 划船器等）不再各自保存字段列表、
+各自读写 fields.json，而是订阅同一个 `FieldRegistry`：
+
+- `field_inserted(pos, spec)` / `field_removed(pos, spec)`：单个字段增删，
+  订阅方只插入 / 移除对应的一列或一行，不重读磁盘、不整体重建；
+- `fields_reset()`：整体替换（启动时从存储加载）。
+
+修改先校验（field_schema.dump_specs），再更新内存并通过后台写线程保存到
+型号目录后端（`store.save_fields`），最后发出信号。
+"""
+from PySide6.QtCore import QObject, Signal
+
+import field_schema
+import persist_worker
+
+
+class FieldRegistry(QObject):
+    """自定义字段列表（FieldSpec）的唯一持有者。"""
+
+    field_inserted = Signal(int, object)
+    field_removed = Signal(int, object)
+    fields_reset = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._specs = []
+        self._store = None
+        self.loaded = False
+
+    # ---------------- 读取 ----------------
+    @property
+    def specs(self):
+        """当前字段定义（只读使用；修改请调用 add / remove）。"""
+        return self._specs
+
+    def names(self):
+        return [s.name for s in self._specs]
+
+    def index_of(self, name):
+        for i, spec in enumerate(self._specs):
+            if spec.name == name:
+                return i
+        return -1
+
+    def raw(self):
+        """保存格式（字典列表），也用于启动快照。"""
+        return [s.to_dict() for s in self._specs]
+
+    # ---------------- 加载 / 保存 ----------------
+    def set_store(self, store):
+        """字段列表的保存位置（提供 save_fields 的型号目录后端）。"""
+        self._store = store
+
+    def load(self, raw_fields):
+        """用存储中的原始字段列表整体替换（字段名字符串与字典均可）。"""
+        self._specs = field_schema.load_specs(raw_fields)
+        self.loaded = True
+        self.fields_reset.emit()
+
+    def persist(self):
+        if self._store is None:
+            return
+        persist_worker.get_worker().submit(('fields',), self._store.save_fields,
+                                           field_schema.dump_specs(self._specs))
+
+    # ---------------- 修改 ----------------
+    def add(self, spec, pos=None):
+        """新增字段；定义不合法或重名时抛出 field_schema.FieldSchemaError。"""
+        pos = len(self._specs) if pos is None else pos
+        candidate = self._specs[:pos] + [spec] + self._specs[pos:]
+        field_schema.dump_specs(candidate)
+        self._specs = candidate
+        self.persist()
+        self.field_inserted.emit(pos, spec)
+        return pos
+
+    def remove(self, name):
+        """删除字段（已有型号中的值保留，只是不再显示）；不存在时返回 False。"""
+        pos = self.index_of(name)
+        if pos < 0:
+            return False
+        spec = self._specs[pos]
+        self._specs = self._specs[:pos] + self._specs[pos + 1:]
+        self.persist()
+        self.field_removed.emit(pos, spec)
+        return True
+
+
+_registry = None
+
+
+def get_registry():
+    """进程内共享的字段注册表（首次使用时创建）。"""
+    global _registry
+    if _registry is None:
+        _registry = FieldRegistry()
+    return _registry
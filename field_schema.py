@@ -0,0 +1,175 @@
+"""自定义字段的类型定义（不依赖 Qt）
+
+fields.json / SQLite field_list 中的每一项可以是旧格式的字段名字符串，
+也可以是带类型的字典::
+
+    {"name": "跑带宽度", "type": "number", "unit": "mm"}
+    {"name": "颜色", "type": "enum", "choices": ["黑", "白", "灰"]}
+    {"name": "可折叠", "type": "bool"}
+
+旧格式的字符串视为 text 类型。保存时统一写成字典，并先做校验。
+
+`FieldSpec.sort_key` 给出按类型比较的排序键（数值按大小、枚举按定义顺序、
+布尔“否”在前），空值与无法解析的值总是排在有效值之后。
+"""
+import math
+
+from catalog import format_number, parse_number
+
+FIELD_TYPES = ('text', 'number', 'enum', 'bool')
+TYPE_LABELS = {'text': '文本', 'number': '数值', 'enum': '枚举', 'bool': '是/否'}
+
+BOOL_TRUE = ('是', 'y', 'yes', 'true', '1', '有', '√', '✓')
+BOOL_FALSE = ('否', 'n', 'no', 'false', '0', '无', '×', '✗')
+
+
+class FieldSchemaError(ValueError):
+    """字段定义或字段值不合法（消息可直接显示给用户）。"""
+
+
+def parse_bool(text):
+    """'是' / 'yes' / '1' -> True，'否' / 'no' / '0' -> False，其余为 None。"""
+    t = str(text).strip().lower()
+    if t in BOOL_TRUE:
+        return True
+    if t in BOOL_FALSE:
+        return False
+    return None
+
+
+class FieldSpec:
+    """单个自定义字段：名称、类型、单位（number）与可选值（enum）。"""
+
+    __slots__ = ('name', 'type', 'unit', 'choices', '_rank')
+
+    def __init__(self, name, type='text', unit='', choices=()):
+        self.name = name
+        self.type = type
+        self.unit = unit or ''
+        self.choices = tuple(choices or ())
+        self._rank = {c: i for i, c in enumerate(self.choices)}
+
+    @classmethod
+    def from_raw(cls, raw):
+        """字段名字符串或字典 -> FieldSpec（不校验，未知类型按 text 处理）。"""
+        if isinstance(raw, FieldSpec):
+            return raw
+        if isinstance(raw, dict):
+            typ = raw.get('type', 'text')
+            return cls(str(raw.get('name', '')),
+                       typ if typ in FIELD_TYPES else 'text',
+                       raw.get('unit', ''),
+                       raw.get('choices') or ())
+        return cls(str(raw))
+
+    def to_dict(self):
+        data = {'name': self.name, 'type': self.type}
+        if self.unit:
+            data['unit'] = self.unit
+        if self.choices:
+            data['choices'] = list(self.choices)
+        return data
+
+    def label(self):
+        """表头文字：'跑带宽度 (mm)'。"""
+        return f'{self.name} ({self.unit})' if self.unit else self.name
+
+    def describe(self):
+        """设置页列表中的说明：'跑带宽度 [数值, mm]'。"""
+        parts = [TYPE_LABELS.get(self.type, self.type)]
+        if self.unit:
+            parts.append(self.unit)
+        if self.choices:
+            parts.append('/'.join(self.choices))
+        return f'{self.name} [{", ".join(parts)}]'
+
+    def check(self):
+        """校验字段定义本身。"""
+        if not self.name.strip():
+            raise FieldSchemaError('字段名称不能为空')
+        if self.type not in FIELD_TYPES:
+            raise FieldSchemaError(f'字段 {self.name}：未知类型 {self.type}')
+        if self.type == 'enum':
+            if not self.choices:
+                raise FieldSchemaError(f'字段 {self.name}：枚举类型至少需要一个可选值')
+            if len(set(self.choices)) != len(self.choices):
+                raise FieldSchemaError(f'字段 {self.name}：可选值重复')
+        if self.unit and self.type != 'number':
+            raise FieldSchemaError(f'字段 {self.name}：只有数值类型可以设置单位')
+
+    def validate(self, text):
+        """校验并规范化字段值，返回保存用的文本；空值总是允许的。"""
+        text = '' if text is None else str(text).strip()
+        if not text or self.type == 'text':
+            return text
+        if self.type == 'number':
+            # 允许带上本字段的单位，例如 '450mm'
+            if self.unit and text.endswith(self.unit):
+                text = text[:-len(self.unit)].strip()
+            value = parse_number(text)
+            if value is None or not math.isfinite(value):
+                raise FieldSchemaError(f'{self.label()} 应为数值，实际为 “{text}”')
+            return format_number(value)
+        if self.type == 'enum':
+            if text not in self._rank:
+                raise FieldSchemaError(f'{self.name} 只能取 {"/".join(self.choices)}，实际为 “{text}”')
+            return text
+        flag = parse_bool(text)
+        if flag is None:
+            raise FieldSchemaError(f'{self.name} 应为 是/否，实际为 “{text}”')
+        return '是' if flag else '否'
+
+    def sort_key(self, text):
+        """(0, 数值, 文本) 为有效值，(1, 0.0, 文本) 为空值或无法解析的值。"""
+        if self.type == 'number':
+            value = parse_number(text)
+            if value is not None and not math.isnan(value):
+                return (0, value, '')
+        elif self.type == 'enum':
+            i = self._rank.get(text)
+            if i is not None:
+                return (0, float(i), '')
+        elif self.type == 'bool':
+            flag = parse_bool(text) if text else None
+            if flag is not None:
+                return (0, float(flag), '')
+        elif text:
+            return (0, 0.0, text)
+        return (1, 0.0, text)
+
+
+def load_specs(raw_fields):
+    """原始字段列表（字符串 / 字典混合）-> [FieldSpec]。"""
+    return [FieldSpec.from_raw(f) for f in (raw_fields or [])]
+
+
+def dump_specs(specs):
+    """校验后转换为保存格式（字典列表）；名称重复或定义不合法时抛出 FieldSchemaError。"""
+    seen = set()
+    out = []
+    for spec in specs:
+        spec.check()
+        if spec.name in seen:
+            raise FieldSchemaError(f'字段重复：{spec.name}')
+        seen.add(spec.name)
+        out.append(spec.to_dict())
+    return out
+
+
+def validate_values(specs, values):
+    """按字段定义校验一个型号的字段值，返回规范化后的新字典；错误汇总后一起抛出。"""
+    by_name = {s.name: s for s in specs}
+    out = {}
+    errors = []
+    for name, text in values.items():
+        spec = by_name.get(name)
+        if spec is None:
+            out[name] = text
+            continue
+        try:
+            out[name] = spec.validate(text)
+        except FieldSchemaError as e:
+            errors.append(str(e))
+    if errors:
+        raise FieldSchemaError('\n'.join(errors))
+    return out
@@ -0,0 +1,303 @@
+"""命令行入口（不依赖 Qt）
+
+    python -m fitness_toolbox solve designs.jsonl > results.jsonl
+    erp_export | python -m fitness_toolbox solve - > results.jsonl
+    python -m fitness_toolbox duty hill.json intervals.csv -o duty.jsonl
+    python -m fitness_toolbox gui
+
+`solve` 逐行读取 JSON Lines，每行一组设计，键与 models.json 中的型号一致::
+
+    {"id": "T-100", "motor_rpm": 4566, "motor_pulley_d": 23, "roller_pulley_d": 50,
+     "roller_diameter": 45, "belt_kmh": "", "use_secondary": false}
+
+与界面“计算”按钮相同，每行有且只能有一项留空（空串 / null 视为留空）；
+没有出现 motor_power 键的行不把功率计入留空判断。
+
+输入按块（默认 10000 行）读取，每块用 drivetrain.solve 一次向量化求解后立即
+写出，内存占用与总行数无关。输出与输入逐行对应，原样带回 id / name，
+出错的行给出 error 与提示文本，不中断后续处理。
+
+`duty` 用 workout_sim 按训练计划仿真目录中各型号的电机负载，每个“型号 × 计划”
+输出一行汇总（均方根 / 峰值功率、超额定时间、速度误差等，ok 表示 motor_power 够用）。
+
+只有 `gui` 子命令才会导入 PySide6。
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+
+import numpy as np
+
+import drivetrain
+from catalog import INPUT_KEYS, parse_number
+
+DEFAULT_CHUNK = 10000
+
+# 原样带回输出的标识键
+ECHO_KEYS = ('id', 'name')
+
+# 输出中的数值结果
+RESULT_KEYS = drivetrain.DRIVE_VARS + ('roller_rpm', 'gear_ratio')
+
+_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
+
+def _number(value):
+    v = parse_number(value)
+    return np.nan if v is None else v
+
+
+def _column(records, key):
+    """一列输入参数 -> float 数组；常见的纯数值 / null 列直接整体转换。"""
+    values = [r.get(key) for r in records]
+    try:
+        return np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        # 含空串等文本时逐个解析
+        return np.array([_number(v) for v in values], dtype=float)
+
+
+def _parse_chunk(lines, first_lineno):
+    """一块文本行 -> (行号列表, 记录列表, 解析错误 {下标: 提示})；空行跳过。"""
+    linenos, records, errors = [], [], {}
+    for offset, line in enumerate(lines):
+        if not line.strip():
+            continue
+        linenos.append(first_lineno + offset)
+        try:
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                raise ValueError('每行应为一个 JSON 对象')
+        except ValueError as e:
+            errors[len(records)] = f'无法解析: {e}'
+            data = {}
+        records.append(data)
+    return linenos, records, errors
+
+
+def solve_records(records):
+    """记录（字典）列表 -> drivetrain.RESULT_DTYPE 结构化数组（一次向量化求解）。"""
+    n = len(records)
+    cols = {key: _column(records, key) for key in INPUT_KEYS}
+    use_sec = np.fromiter((bool(r.get('use_secondary', False)) for r in records), dtype=bool, count=n)
+    # 没有 motor_power 键的行不参与功率留空判断（给一个非 NaN 的占位值）
+    has_power = np.fromiter(('motor_power' in r for r in records), dtype=bool, count=n)
+    power = np.where(has_power, cols['motor_power'], 0.0)
+    res = drivetrain.solve(cols['motor_rpm'], cols['motor_pulley_d'], cols['roller_pulley_d'],
+                           cols['roller_diameter'], cols['belt_kmh'], use_secondary=use_sec,
+                           sec1=cols['sec1'], sec2=cols['sec2'], motor_power=power)
+    # 已给出的参数原样输出（求解在对数空间进行，回算会带来末位误差）
+    for key in drivetrain.DRIVE_VARS:
+        given = ~np.isnan(cols[key]) & ~np.isnan(res[key])
+        res[key][given] = cols[key][given]
+    return res
+
+
+def _result_lines(linenos, records, results, errors, digits):
+    """一块求解结果 -> 输出字典（按列转换为 Python 数值，避免逐行访问结构化数组）。"""
+    values = {}
+    for key in RESULT_KEYS:
+        col = results[key]
+        if digits is not None:
+            col = np.round(col, digits)
+        values[key] = [None if v != v else v for v in col.tolist()]
+    codes = results['error'].tolist()
+    missing = results['missing'].tolist()
+    ratio_text = {}
+    for i, (lineno, record) in enumerate(zip(linenos, records)):
+        out = {'line': lineno}
+        for key in ECHO_KEYS:
+            if key in record:
+                out[key] = record[key]
+        if i in errors:
+            out['error'] = 'parse'
+            out['message'] = errors[i]
+        elif codes[i] != drivetrain.OK:
+            out['error'] = codes[i]
+            out['message'] = drivetrain.ERROR_MESSAGES[codes[i]][1]
+        else:
+            out['solved'] = drivetrain.CORE_FIELDS[missing[i]]
+            for key in RESULT_KEYS:
+                out[key] = values[key][i]
+            ratio = values['gear_ratio'][i]
+            text = ratio_text.get(ratio)
+            if text is None:
+                text = ratio_text[ratio] = drivetrain.format_gear_ratio(ratio)
+            out['gear_ratio_text'] = text
+        yield out
+
+
+def solve_stream(src, dst, chunk_size=DEFAULT_CHUNK, digits=None):
+    """从 src 读 JSONL、向 dst 写 JSONL；返回 (总行数, 出错行数)。"""
+    total = failed = 0
+    lineno = 1
+    encode = _ENCODER.encode
+    while True:
+        lines = list(itertools.islice(src, chunk_size))
+        if not lines:
+            break
+        linenos, records, errors = _parse_chunk(lines, lineno)
+        lineno += len(lines)
+        if not records:
+            continue
+        results = solve_records(records)
+        buf = []
+        for out in _result_lines(linenos, records, results, errors, digits):
+            if 'error' in out:
+                failed += 1
+            buf.append(encode(out))
+        buf.append('')
+        dst.write('\n'.join(buf))
+        dst.flush()
+        total += len(records)
+    return total, failed
+
+
+def _open_text(path, mode):
+    """'-' 表示标准输入 / 输出（按 UTF-8 读写，与平台默认编码无关）。"""
+    if path == '-':
+        stream = sys.stdin if 'r' in mode else sys.stdout
+        try:
+            stream.reconfigure(encoding='utf-8')
+        except Exception:
+            pass
+        return stream
+    return open(path, mode, encoding='utf-8', newline='\n' if 'w' in mode else None)
+
+
+def cmd_solve(args):
+    try:
+        src = _open_text(args.input, 'r')
+        dst = _open_text(args.output, 'w')
+    except OSError as e:
+        print(f'无法打开文件: {e}', file=sys.stderr)
+        return 2
+    try:
+        total, failed = solve_stream(src, dst, max(1, args.chunk_size), args.digits)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    if not args.quiet:
+        print(f'共 {total} 行，出错 {failed} 行', file=sys.stderr)
+    return 1 if failed and args.strict else 0
+
+
+def _load_catalog(data_dir):
+    from catalog import Catalog
+    from model_store import open_model_store, store_problem
+    store = open_model_store(data_dir)
+    models = {}
+    try:
+        models = store.load()
+        problem = store_problem(store)
+        if problem:
+            print(f'警告: {problem}', file=sys.stderr)
+        return Catalog.from_dicts(models)
+    finally:
+        store.close(models)
+
+
+def cmd_duty(args):
+    import workout_sim
+    try:
+        profiles = [workout_sim.load_profile(path) for path in args.profiles]
+    except (OSError, ValueError) as e:
+        print(f'无法读取训练计划: {e}', file=sys.stderr)
+        return 2
+    catalog = _load_catalog(args.data_dir)
+    names = args.model or None
+    if names:
+        unknown = [n for n in names if n not in catalog]
+        if unknown:
+            print('未知型号: ' + ', '.join(unknown), file=sys.stderr)
+            return 2
+    drives, skipped = workout_sim.DriveSet.from_catalog(catalog, names)
+    load = workout_sim.DEFAULT_LOAD._replace(
+        **{k: v for k, v in (('user_kg', args.user_kg), ('peak_factor', args.peak_factor)) if v is not None})
+    try:
+        dst = _open_text(args.output, 'w')
+    except OSError as e:
+        print(f'无法打开文件: {e}', file=sys.stderr)
+        return 2
+    encode = _ENCODER.encode
+    failing = 0
+    try:
+        for _, p, _, duty in workout_sim.iter_duty(drives, profiles, load, args.rate, workers=args.workers):
+            buf = []
+            for row in duty.rows():
+                if not row['ok']:
+                    failing += 1
+                if args.digits is not None:
+                    row = {k: round(v, args.digits) if isinstance(v, float) else v for k, v in row.items()}
+                row['profile'] = profiles[p].name
+                buf.append(encode(row))
+            buf.append('')
+            dst.write('\n'.join(buf))
+            dst.flush()
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    finally:
+        if dst is not sys.stdout:
+            dst.close()
+    if not args.quiet:
+        print(f'{len(drives)} 个型号 × {len(profiles)} 个计划，功率不足 {failing} 项；'
+              f'参数不全跳过 {len(skipped)} 个型号', file=sys.stderr)
+    return 1 if failing and args.strict else 0
+
+
+def cmd_gui(args):
+    # 只有界面才需要 PySide6
+    import qt_main
+    qt_main.main()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='fitness_toolbox', description='健身设备工具箱')
+    sub = parser.add_subparsers(dest='command')
+
+    p = sub.add_parser('solve', help='批量求解 JSONL 中每行设计的唯一留空项')
+    p.add_argument('input', nargs='?', default='-', help='输入 JSONL 文件，- 表示标准输入（默认）')
+    p.add_argument('-o', '--output', default='-', help='输出 JSONL 文件，- 表示标准输出（默认）')
+    p.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK, help=f'每块行数（默认 {DEFAULT_CHUNK}）')
+    p.add_argument('--digits', type=int, default=None, help='结果保留的小数位数（默认不取整）')
+    p.add_argument('--strict', action='store_true', help='有出错行时以退出码 1 结束')
+    p.add_argument('-q', '--quiet', action='store_true', help='不在标准错误输出汇总')
+    p.set_defaults(func=cmd_solve)
+
+    p = sub.add_parser('duty', help='按训练计划仿真目录中各型号的电机负载')
+    p.add_argument('profiles', nargs='+', help='训练计划文件（JSON 或 CSV，见 workout_sim.load_profile）')
+    p.add_argument('-o', '--output', default='-', help='输出 JSONL 文件，- 表示标准输出（默认）')
+    p.add_argument('-m', '--model', action='append', help='只仿真这些型号（可重复），默认整个目录')
+    p.add_argument('--data-dir', default=os.path.dirname(os.path.abspath(__file__)),
+                   help='型号目录所在的文件夹（默认程序所在文件夹）')
+    p.add_argument('--rate', type=float, default=50.0, help='采样率 Hz（10~100，默认 50）')
+    p.add_argument('--user-kg', type=float, default=None, help='跑者体重 kg（默认 100）')
+    p.add_argument('--peak-factor', type=float, default=None, help='短时峰值功率 / 额定功率（默认 2）')
+    p.add_argument('--workers', type=int, default=None, help='进程数（默认 CPU 数）')
+    p.add_argument('--digits', type=int, default=None, help='结果保留的小数位数（默认不取整）')
+    p.add_argument('--strict', action='store_true', help='有功率不足的型号时以退出码 1 结束')
+    p.add_argument('-q', '--quiet', action='store_true', help='不在标准错误输出汇总')
+    p.set_defaults(func=cmd_duty)
+
+    p = sub.add_parser('gui', help='启动图形界面')
+    p.set_defaults(func=cmd_gui)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, 'func', None) is None:
+        parser.print_help()
+        return 2
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -20,7 +20,7 @@ a = Analysis([
     pathex=['.'],
     binaries=binaries,
     datas=datas,
-    hiddenimports=[],
+    hiddenimports=['motor_tab', 'rower_tab', 'bike_sim', 'vibration_sim'],  # 器材插件按需导入（equipment.py），静态分析找不到
     hookspath=[],
     runtime_hooks=[],
     excludes=[],
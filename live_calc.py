@@ -0,0 +1,183 @@
+"""跑步机选项卡的实时计算（不依赖 Qt）
+
+输入框每次变化（界面端防抖后）都把全部输入交给 `LiveCalculator.update`，
+由一个小的依赖图决定需要重新求值的节点：
+
+    输入 ──> ratio（只依赖带轮与二级传动）──┐
+         └─> solution（drivetrain.solve）───┴─> 各结果输出、状态提示
+
+- 只有依赖的值真的变化了的节点才会重新求值（数值按解析后的 float 比较，
+  '4566' 与 '4566.0' 视为相同），没有变化的输出不会通知界面；
+- 求解结果按规范化的输入元组缓存（LRU），来回修改同一个值不会重复求解；
+- 之后的输出（灵敏度、匹配型号等）用 `add` 挂到图上即可，只在其依赖变化时计算。
+"""
+import math
+from collections import namedtuple
+from functools import lru_cache
+
+import drivetrain
+from catalog import parse_number
+
+# 界面输入（顺序即规范化元组的顺序）
+INPUTS = (
+    'motor_power',
+    'motor_rpm',
+    'motor_pulley_d',
+    'use_secondary',
+    'sec1',
+    'sec2',
+    'roller_pulley_d',
+    'roller_diameter',
+    'belt_kmh',
+)
+
+# 结果面板上的输出节点 -> 结果中的键
+RESULT_OUTPUTS = {
+    'out.roller_rpm': 'roller_rpm',
+    'out.motor_rpm': 'motor_rpm',
+    'out.belt_kmh': 'belt_kmh',
+    'out.gear_ratio': 'gear_ratio',
+}
+# 只有作为唯一留空项被求出时才显示的输出
+SOLVED_OUTPUTS = {
+    'out.motor_pulley_d': 'motor_pulley_d',
+    'out.sec1': 'sec1',
+    'out.sec2': 'sec2',
+    'out.roller_pulley_d': 'roller_pulley_d',
+    'out.roller_diameter': 'roller_diameter',
+}
+
+# 没有留空项时允许的相对误差（与 recompute.CONSISTENCY_TOL 一致）
+CONSISTENCY_TOL = 1e-3
+
+Solution = namedtuple('Solution', 'error missing values residual')
+
+
+def _finite(value):
+    v = float(value)
+    return v if math.isfinite(v) else None
+
+
+def normalize(values):
+    """{输入名: 文本或数值} -> 规范化元组（float / None，use_secondary 为 bool）。"""
+    out = []
+    for key in INPUTS:
+        v = values.get(key)
+        if key == 'use_secondary':
+            out.append(bool(v))
+        else:
+            num = parse_number(v)
+            out.append(None if num is None or not math.isfinite(num) else num)
+    return tuple(out)
+
+
+@lru_cache(maxsize=512)
+def solve_normalized(key):
+    """规范化元组 -> Solution（与“计算”按钮相同的语义；没有留空项时按输入推导并给出相对误差）。"""
+    args = dict(zip(INPUTS, key))
+    nan = drivetrain.as_array
+    res = drivetrain.solve(nan(args['motor_rpm']), nan(args['motor_pulley_d']), nan(args['roller_pulley_d']),
+                           nan(args['roller_diameter']), nan(args['belt_kmh']),
+                           use_secondary=args['use_secondary'], sec1=nan(args['sec1']), sec2=nan(args['sec2']),
+                           motor_power=nan(args['motor_power']))[0]
+    err = int(res['error'])
+    if err == drivetrain.OK:
+        values = {k: _finite(res[k]) for k in drivetrain.DRIVE_VARS + ('roller_rpm', 'gear_ratio')}
+        return Solution(err, drivetrain.CORE_FIELDS[int(res['missing'])], values, None)
+    if err == drivetrain.ERR_NO_EMPTY:
+        drv = drivetrain.solve_drive(*(nan(args[k]) for k in drivetrain.DRIVE_VARS),
+                                     use_secondary=args['use_secondary'])[0]
+        if int(drv['error']) == drivetrain.OK:
+            values = {k: _finite(drv[k]) for k in drivetrain.DRIVE_VARS + ('roller_rpm', 'gear_ratio')}
+            return Solution(err, None, values, _finite(drv['residual']))
+        err = int(drv['error'])
+    return Solution(err, None, {}, None)
+
+
+def _ratio(motor_pulley_d, roller_pulley_d, use_secondary, sec1, sec2):
+    nan = drivetrain.as_array
+    return _finite(drivetrain.gear_ratio_total(nan(motor_pulley_d), nan(roller_pulley_d), use_secondary,
+                                               nan(sec1), nan(sec2)))
+
+
+def _status(sol):
+    """(级别, 提示)；级别为 'ok' / 'information' / 'warning'。"""
+    if sol.error == drivetrain.OK:
+        return ('ok', '')
+    if sol.error == drivetrain.ERR_NO_EMPTY and sol.values:
+        if sol.residual is not None and abs(sol.residual) > CONSISTENCY_TOL:
+            return ('warning', f'没有留空项，且跑带时速与其它参数不一致（偏差 {sol.residual * 100:+.2f}%）。')
+        return ('ok', '没有留空项 — 参数一致。')
+    return drivetrain.ERROR_MESSAGES[sol.error]
+
+
+class DependencyGraph:
+    """按依赖顺序求值的节点图：只重新计算依赖发生变化的节点。"""
+
+    def __init__(self):
+        self._nodes = {}       # 名称 -> (依赖, 函数)；输入节点没有函数
+        self._order = []       # 添加顺序即拓扑顺序（依赖必须先添加）
+        self.values = {}
+        self.evaluations = 0   # 节点函数被调用的次数（调试 / 测试用）
+
+    def add_input(self, name, value=None):
+        self._nodes[name] = ((), None)
+        self._order.append(name)
+        self.values[name] = value
+
+    def add(self, name, deps, fn):
+        """新增计算节点 fn(*依赖的值)；依赖必须已存在。"""
+        for dep in deps:
+            if dep not in self._nodes:
+                raise KeyError(f'未知的依赖节点: {dep}')
+        self._nodes[name] = (tuple(deps), fn)
+        self._order.append(name)
+        self.evaluations += 1
+        self.values[name] = fn(*(self.values[d] for d in deps))
+
+    def set(self, **inputs):
+        """更新输入节点，返回值发生变化的节点集合（含输入本身）。"""
+        changed = {k for k, v in inputs.items() if self.values.get(k) != v}
+        for k in changed:
+            self.values[k] = inputs[k]
+        if not changed:
+            return changed
+        dirty = set(changed)
+        for name in self._order:
+            deps, fn = self._nodes[name]
+            if fn is None or not dirty.intersection(deps):
+                continue
+            self.evaluations += 1
+            value = fn(*(self.values[d] for d in deps))
+            if value != self.values[name]:
+                self.values[name] = value
+                dirty.add(name)
+                changed.add(name)
+        return changed
+
+
+class LiveCalculator(DependencyGraph):
+    """跑步机输入 -> 结果面板的依赖图。"""
+
+    def __init__(self):
+        super().__init__()
+        for key, value in zip(INPUTS, normalize({})):
+            self.add_input(key, value)
+        self.add('ratio', ('motor_pulley_d', 'roller_pulley_d', 'use_secondary', 'sec1', 'sec2'), _ratio)
+        self.add('solution', INPUTS, lambda *key: solve_normalized(key))
+        for out, key in RESULT_OUTPUTS.items():
+            if key == 'gear_ratio':
+                # 带轮齐全即可显示传动比，不必等唯一留空项
+                self.add(out, ('solution', 'ratio'),
+                         lambda sol, ratio: sol.values.get('gear_ratio', ratio))
+            else:
+                self.add(out, ('solution',), lambda sol, key=key: sol.values.get(key))
+        for out, key in SOLVED_OUTPUTS.items():
+            self.add(out, ('solution',), lambda sol, key=key: sol.values.get(key) if sol.missing == key else None)
+        self.add('status', ('solution',), _status)
+
+    def update(self, values):
+        """{输入名: 文本} -> {变化的输出节点: 新值}（只含 'out.*' 与 'status'）。"""
+        changed = self.set(**dict(zip(INPUTS, normalize(values))))
+        return {name: self.values[name] for name in changed
+                if name.startswith('out.') or name == 'status'}
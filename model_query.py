@@ -0,0 +1,507 @@
+"""型号目录的结构化查询（不依赖 Qt）
+
+例如::
+
+    belt_kmh >= 16 and use_secondary and 跑带宽度 > 450
+    (motor_power >= 2 or gear_ratio < 0.5) and not 颜色 == '黑'
+    roller_diameter * 2 > computed.roller_diameter and 备注 ~ '静音'
+
+语法：
+- 比较：`< <= > >= == != =`，`~` 为“包含”（文本子串）；
+- 逻辑：`and` / `or` / `not`，括号分组；数值之间可用 `+ - * /`；
+- 名称：输入参数（INPUT_KEYS）、`use_secondary`、计算结果（`roller_rpm`、`gear_ratio`，
+  与输入同名的用 `computed.belt_kmh` 等）；其余名称都是自定义字段，
+  含空格等特殊字符的字段名用反引号括起；文本用单 / 双引号。
+- 自定义字段与数值比较时按数值解析，无法解析或留空的一律不匹配；
+  单独出现的名称表示“非空 / 非零 / 已勾选”。
+
+查询只解析一次并编译为在列式数据（`catalog.CatalogColumns`）上运行的
+NumPy 向量化函数；最近使用的编译结果缓存在 `compile_query` 中。
+顶层 and 中的数值区间条件走列的有序索引（二分查找），只对候选求值其余条件。
+只涉及数据库原生列时，`CompiledQuery.sql()` 还能给出 SQLite 的 WHERE 条件。
+"""
+import operator
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from catalog import COMPUTED_KEYS, INPUT_KEYS
+
+
+class QuerySyntaxError(ValueError):
+    """查询语法错误（消息可直接显示给用户）。"""
+
+
+_TOKEN_RE = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<num>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<str>'[^']*'|"[^"]*")
+  | (?P<quoted>`[^`]+`)
+  | (?P<op><=|>=|==|!=|<|>|=|~|\+|-|\*|/|\(|\))
+  | (?P<name>[^\s<>=!~+\-*/()'"`]+)
+''', re.VERBOSE)
+
+_KEYWORDS = ('and', 'or', 'not')
+
+# 比较运算符：数值与文本共用同一张表
+_COMPARE = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '=': operator.eq,
+    '!=': operator.ne,
+}
+_ARITH = {'+': np.add, '-': np.subtract, '*': np.multiply, '/': np.divide}
+_SQL_COMPARE = {'<': '<', '<=': '<=', '>': '>', '>=': '>=', '==': '=', '=': '=', '!=': '<>'}
+
+# 与输入参数不重名、可以直接引用的计算结果
+_COMPUTED_ONLY = tuple(k for k in COMPUTED_KEYS if k not in INPUT_KEYS)
+
+
+def looks_structured(text):
+    """搜索框中的文本是否应按结构化查询处理（含比较运算符）。"""
+    return bool(re.search(r'[<>=!~]', text))
+
+
+def tokenize(text):
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if m is None:
+            raise QuerySyntaxError(f'无法识别的字符: {text[pos]!r}（位置 {pos + 1}）')
+        kind = m.lastgroup
+        value = m.group()
+        pos = m.end()
+        if kind == 'ws':
+            continue
+        if kind == 'num':
+            tokens.append(('num', float(value)))
+        elif kind == 'str':
+            tokens.append(('str', value[1:-1]))
+        elif kind == 'quoted':
+            tokens.append(('name', value[1:-1]))
+        elif kind == 'name' and value.lower() in _KEYWORDS:
+            tokens.append(('op', value.lower()))
+        else:
+            tokens.append((kind, value))
+    return tokens
+
+
+# ---------------- 语法树 ----------------
+# ('or', a, b) ('and', a, b) ('not', a) ('cmp', op, a, b) ('arith', op, a, b) ('neg', a)
+# ('num', 1.0) ('str', 'x') ('ref', kind, key)，kind 为 input / computed / flag / field
+
+def resolve_name(name):
+    if name == 'use_secondary':
+        return ('ref', 'flag', name)
+    if name in INPUT_KEYS:
+        return ('ref', 'input', name)
+    if name in _COMPUTED_ONLY:
+        return ('ref', 'computed', name)
+    if name.startswith('computed.') and name[9:] in COMPUTED_KEYS:
+        return ('ref', 'computed', name[9:])
+    return ('ref', 'field', name)
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        tok = self.peek()
+        if tok[0] is None:
+            raise QuerySyntaxError('查询不完整')
+        if value is not None and tok != ('op', value):
+            raise QuerySyntaxError(f'此处应为 {value!r}，实际为 {tok[1]!r}')
+        self.pos += 1
+        return tok
+
+    def parse(self):
+        if not self.tokens:
+            raise QuerySyntaxError('查询为空')
+        node = self.or_expr()
+        if self.pos != len(self.tokens):
+            raise QuerySyntaxError(f'多余的内容: {self.peek()[1]!r}')
+        return node
+
+    def or_expr(self):
+        node = self.and_expr()
+        while self.peek() == ('op', 'or'):
+            self.take()
+            node = ('or', node, self.and_expr())
+        return node
+
+    def and_expr(self):
+        node = self.not_expr()
+        while self.peek() == ('op', 'and'):
+            self.take()
+            node = ('and', node, self.not_expr())
+        return node
+
+    def not_expr(self):
+        if self.peek() == ('op', 'not'):
+            self.take()
+            return ('not', self.not_expr())
+        return self.comparison()
+
+    def comparison(self):
+        node = self.additive()
+        tok = self.peek()
+        if tok[0] == 'op' and (tok[1] in _COMPARE or tok[1] == '~'):
+            self.take()
+            node = ('cmp', tok[1], node, self.additive())
+        return node
+
+    def additive(self):
+        node = self.term()
+        while self.peek() in (('op', '+'), ('op', '-')):
+            op = self.take()[1]
+            node = ('arith', op, node, self.term())
+        return node
+
+    def term(self):
+        node = self.unary()
+        while self.peek() in (('op', '*'), ('op', '/')):
+            op = self.take()[1]
+            node = ('arith', op, node, self.unary())
+        return node
+
+    def unary(self):
+        if self.peek() == ('op', '-'):
+            self.take()
+            return ('neg', self.unary())
+        return self.primary()
+
+    def primary(self):
+        kind, value = self.take()
+        if kind == 'op' and value == '(':
+            node = self.or_expr()
+            self.take(')')
+            return node
+        if kind == 'num':
+            return ('num', value)
+        if kind == 'str':
+            return ('str', value)
+        if kind == 'name':
+            return resolve_name(value)
+        raise QuerySyntaxError(f'此处不能出现 {value!r}')
+
+
+def parse(text):
+    return _Parser(tokenize(text)).parse()
+
+
+# ---------------- 编译为列式函数 ----------------
+# 每个节点编译为 (类型, fn)，fn(cols) 返回与 cols 等长的数组（或标量常量）；
+# 类型为 'num'（float，缺失为 NaN）、'bool'、'text'（object 数组）或 'str'（文本常量）。
+
+def _compile(node):
+    tag = node[0]
+    if tag == 'num':
+        value = node[1]
+        return 'num', lambda cols: value
+    if tag == 'str':
+        value = node[1]
+        return 'str', lambda cols: value
+    if tag == 'ref':
+        kind, key = node[1], node[2]
+        if kind == 'input':
+            return 'num', lambda cols: cols.number(key)
+        if kind == 'computed':
+            return 'num', lambda cols: cols.computed(key)
+        if kind == 'flag':
+            return 'bool', lambda cols: cols.flag()
+        return 'text', lambda cols: cols.text(key)
+    if tag in ('and', 'or'):
+        a, b = _as_bool(node[1]), _as_bool(node[2])
+        combine = np.logical_and if tag == 'and' else np.logical_or
+        return 'bool', lambda cols: combine(a(cols), b(cols))
+    if tag == 'not':
+        a = _as_bool(node[1])
+        return 'bool', lambda cols: np.logical_not(a(cols))
+    if tag == 'neg':
+        a = _as_number(node[1])
+        return 'num', lambda cols: np.negative(a(cols))
+    if tag == 'arith':
+        fn = _ARITH[node[1]]
+        a, b = _as_number(node[2]), _as_number(node[3])
+
+        def arith(cols):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return fn(a(cols), b(cols))
+
+        def divide(cols):
+            # 除零为缺失（NaN），与 SQL 计划的 NULLIF(b, 0) 一致，而不是 ±inf
+            den = b(cols)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.where(np.equal(den, 0), np.nan, np.divide(a(cols), den))
+        return 'num', divide if node[1] == '/' else arith
+    if tag == 'cmp':
+        return 'bool', _compile_compare(node[1], node[2], node[3])
+    raise QuerySyntaxError(f'无法编译: {tag}')
+
+
+def _compile_compare(op, left, right):
+    lt, rt = _compile(left)[0], _compile(right)[0]
+    if op == '~':
+        if lt != 'text' or rt != 'str':
+            raise QuerySyntaxError('~（包含）只能用于 字段 ~ \'文本\'')
+        col, needle = _compile(left)[1], right[1]
+        return lambda cols: np.fromiter((needle in v for v in col(cols)), dtype=bool,
+                                        count=len(cols))
+    if 'str' in (lt, rt) or (lt == 'text' and rt == 'text'):
+        # 文本比较（字段 == '黑'）；缺失字段按空串处理
+        a, b = _as_text(left), _as_text(right)
+        cmp = _COMPARE[op]
+        return lambda cols: _broadcast(cmp(a(cols), b(cols)), len(cols))
+    a, b = _as_number(left), _as_number(right)
+    cmp = _COMPARE[op]
+
+    def compare(cols):
+        x, y = a(cols), b(cols)
+        with np.errstate(invalid='ignore'):
+            res = cmp(x, y)
+        # 缺失值（NaN）不满足任何比较，!= 也一样（与 SQL 中 NULL 的处理一致）
+        res = np.logical_and(res, np.logical_not(np.isnan(x)))
+        res = np.logical_and(res, np.logical_not(np.isnan(y)))
+        return _broadcast(res, len(cols))
+    return compare
+
+
+def _broadcast(res, n):
+    return np.broadcast_to(np.asarray(res, dtype=bool), (n,))
+
+
+def _as_number(node):
+    typ, fn = _compile(node)
+    if typ == 'num':
+        return fn
+    if typ == 'text':
+        key = node[2]
+        return lambda cols: cols.field_number(key)
+    if typ == 'bool':
+        return lambda cols: np.asarray(fn(cols), dtype=float)
+    raise QuerySyntaxError(f'文本 {node[1]!r} 不能参与数值运算')
+
+
+def _as_text(node):
+    typ, fn = _compile(node)
+    if typ in ('text', 'str'):
+        return fn
+    raise QuerySyntaxError('文本只能与自定义字段比较')
+
+
+def _as_bool(node):
+    typ, fn = _compile(node)
+    if typ == 'bool':
+        return fn
+    if typ == 'num':
+        # 非零且非缺失
+        return lambda cols: _broadcast(np.nan_to_num(fn(cols), nan=0.0) != 0, len(cols))
+    if typ == 'text':
+        return lambda cols: fn(cols) != ''
+    raise QuerySyntaxError(f'文本 {node[1]!r} 不能单独作为条件')
+
+
+# ---------------- SQL 计划 ----------------
+# SQLite 后端的数值参数与 use_secondary 是原生列（带索引），可直接下推为 WHERE 条件；
+# 自定义字段的文本比较通过 model_fields 子查询完成，数值比较等无法等价翻译时返回 None。
+
+class _NoSql(Exception):
+    pass
+
+
+def _sql(node, args):
+    tag = node[0]
+    if tag in ('and', 'or'):
+        return f'({_sql_bool(node[1], args)} {tag.upper()} {_sql_bool(node[2], args)})'
+    if tag == 'not':
+        return f'(NOT {_sql_bool(node[1], args)})'
+    if tag == 'cmp':
+        op, left, right = node[1], node[2], node[3]
+        lt, rt = _compile(left)[0], _compile(right)[0]
+        if op == '~':
+            col = _sql_value(left, args)
+            args.append(right[1])
+            return f'(instr({col}, ?) > 0)'
+        if 'str' in (lt, rt) or (lt == 'text' and rt == 'text'):
+            a = _sql_value(left, args)
+            b = _sql_value(right, args)
+            return f'({a} {_SQL_COMPARE[op]} {b})'
+        a = _sql_number(left, args)
+        b = _sql_number(right, args)
+        # NULL 比较结果视为不匹配
+        return f'COALESCE({a} {_SQL_COMPARE[op]} {b}, 0)'
+    raise _NoSql()
+
+
+def _sql_bool(node, args):
+    tag = node[0]
+    if tag == 'ref' and node[1] == 'flag':
+        return '(use_secondary <> 0)'
+    if tag == 'ref' and node[1] == 'input':
+        return f'COALESCE({node[2]} <> 0, 0)'
+    if tag == 'ref' and node[1] == 'field':
+        return f'({_sql_value(node, args)} <> \'\')'
+    if tag in ('and', 'or', 'not', 'cmp'):
+        return _sql(node, args)
+    raise _NoSql()
+
+
+def _sql_number(node, args):
+    tag = node[0]
+    if tag == 'num':
+        args.append(node[1])
+        return '?'
+    if tag == 'ref' and node[1] == 'input':
+        return node[2]
+    if tag == 'ref' and node[1] == 'flag':
+        return 'use_secondary'
+    if tag == 'neg':
+        return f'(-{_sql_number(node[1], args)})'
+    if tag == 'arith':
+        a = _sql_number(node[2], args)
+        b = _sql_number(node[3], args)
+        if node[1] == '/':
+            # 按浮点除（避免 SQLite 的整数除法）；除零为 NULL，与列式计算的除零为 NaN 对应
+            return f'({a} * 1.0 / NULLIF({b}, 0))'
+        return f'({a} {node[1]} {b})'
+    raise _NoSql()
+
+
+def _sql_value(node, args):
+    tag = node[0]
+    if tag == 'str':
+        args.append(node[1])
+        return '?'
+    if tag == 'ref' and node[1] == 'field':
+        args.append(node[2])
+        return ("COALESCE((SELECT value FROM model_fields "
+                "WHERE model_id = models.id AND field = ?), '')")
+    raise _NoSql()
+
+
+# ---------------- 区间计划 ----------------
+# 顶层 and 中形如 `数值列 op 常数` 的条件可以改用有序索引（catalog.SortedColumn）：
+# 同一列的多个条件合并为一个区间，两次二分查找得到候选，其余条件只在候选上求值。
+
+_FLIP = {'<': '>', '<=': '>=', '>': '<', '>=': '<=', '==': '==', '=': '='}
+
+
+def _conjuncts(node):
+    if node[0] == 'and':
+        return _conjuncts(node[1]) + _conjuncts(node[2])
+    return [node]
+
+
+def _range_term(node):
+    """`ref op 常数` -> ((kind, key), op, value)，否则 None。"""
+    if node[0] != 'cmp' or node[1] not in _FLIP:
+        return None
+    op, left, right = node[1], node[2], node[3]
+    if left[0] == 'num':
+        op, left, right = _FLIP[op], right, left
+    if right[0] != 'num' or left[0] != 'ref' or left[1] not in ('input', 'computed', 'field'):
+        return None
+    return (left[1], left[2]), op, right[1]
+
+
+def _merge_range(terms):
+    """多个单边条件 -> (lo, hi, lo_open, hi_open)。"""
+    lo = hi = None
+    lo_open = hi_open = False
+    for op, v in terms:
+        if op in ('>', '>=', '==', '='):
+            if lo is None or v > lo or (v == lo and op == '>'):
+                lo, lo_open = v, op == '>'
+        if op in ('<', '<=', '==', '='):
+            if hi is None or v < hi or (v == hi and op == '<'):
+                hi, hi_open = v, op == '<'
+    return lo, hi, lo_open, hi_open
+
+
+def _and_all(nodes):
+    node = nodes[0]
+    for other in nodes[1:]:
+        node = ('and', node, other)
+    return node
+
+
+class CompiledQuery:
+    """编译后的查询：`evaluate(cols)` 返回布尔掩码，`filter(catalog)` 返回匹配的型号。"""
+
+    # 区间候选不超过全部型号的这个比例时才走有序索引，否则整列求值更快
+    RANGE_SELECTIVITY = 0.25
+
+    def __init__(self, text):
+        self.text = text
+        self.tree = parse(text)
+        self._fn = _as_bool(self.tree)
+        # 列 -> (区间, 其余条件编译后的函数或 None)
+        self._ranges = {}
+        conj = _conjuncts(self.tree)
+        groups = {}
+        for node in conj:
+            term = _range_term(node)
+            if term is not None:
+                groups.setdefault(term[0], []).append((node, term[1], term[2]))
+        for ref, items in groups.items():
+            used = {id(node) for node, _, _ in items}
+            rest = [node for node in conj if id(node) not in used]
+            self._ranges[ref] = (_merge_range([(op, v) for _, op, v in items]),
+                                 _as_bool(_and_all(rest)) if rest else None)
+
+    def evaluate(self, cols):
+        return _broadcast(self._fn(cols), len(cols))
+
+    def filter(self, catalog, names=None):
+        """在目录（或其中 names 指定的型号）上求值，返回匹配型号的集合。"""
+        cols = catalog.columns(names)
+        if not len(cols):
+            return set()
+        if names is None and self._ranges:
+            hits = self._filter_by_range(cols)
+            if hits is not None:
+                return hits
+        return set(cols.name_array()[self.evaluate(cols)].tolist())
+
+    def _filter_by_range(self, cols):
+        best = None
+        for (kind, key), (bounds, rest) in self._ranges.items():
+            index = cols.sorted_index(kind, key)
+            start, stop = index.bounds(*bounds)
+            if best is None or stop - start < best[0]:
+                best = (stop - start, index, start, stop, rest)
+        count, index, start, stop, rest = best
+        if count > self.RANGE_SELECTIVITY * len(cols):
+            return None
+        cand = index.names[start:stop]
+        if rest is None or not count:
+            return set(cand.tolist())
+        sub = cols.take(index.rows[start:stop])
+        return set(cand[_broadcast(rest(sub), count)].tolist())
+
+    def matches(self, catalog, name):
+        return name in catalog and bool(self.filter(catalog, [name]))
+
+    def sql(self):
+        """(WHERE 子句, 参数)；无法翻译为 SQL 时返回 None。"""
+        args = []
+        try:
+            return _sql_bool(self.tree, args), args
+        except _NoSql:
+            return None
+
+
+@lru_cache(maxsize=64)
+def compile_query(text):
+    """解析并编译查询；最近使用的 64 条查询直接复用编译结果。"""
+    return CompiledQuery(text.strip())
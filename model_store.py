@@ -0,0 +1,560 @@
+"""型号目录的持久化（不依赖 Qt）
+
+两种后端提供相同的接口（load / put / delete / save_all / close，以及
+load_fields / save_fields）：
+
+- `SqliteModelStore`（默认）：嵌入式 SQLite 数据库 models.db，按型号名称与
+  数值传动参数建索引，自定义字段值按行存放在 model_fields 表中，支持分页
+  与索引查询；首次启动时从 models.json / fields.json 一次性迁移。
+- `JsonModelStore`：以 models.json 作为快照，单个型号的保存 / 删除只向
+  预写日志 models.json.log 追加一行 JSON（JSON Lines）；加载时重放日志，
+  日志过大时在后台原子地合并成新快照。没有 sqlite3 时使用，同时作为导出格式。
+
+`open_model_store` 负责选择后端并完成迁移。
+"""
+import json
+import os
+import tempfile
+import threading
+
+from catalog import export_dicts
+
+try:
+    import sqlite3
+except ImportError:  # 个别精简的 Python 发行版没有 sqlite3
+    sqlite3 = None
+
+
+# 型号记录中的数值传动参数（SQLite 中为 REAL 列并建索引）
+NUMERIC_COLUMNS = (
+    'motor_power',
+    'motor_rpm',
+    'motor_pulley_d',
+    'sec1',
+    'sec2',
+    'roller_pulley_d',
+    'roller_diameter',
+    'belt_kmh',
+)
+
+
+def _fsync_dir(path):
+    """rename 之后同步目录项（Windows 不支持打开目录，忽略）。"""
+    if os.name == 'nt':
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)) or '.', os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_json(path, obj, indent=2):
+    """原子写 JSON：先写同目录临时文件并 fsync，再 rename 覆盖目标。
+
+    任何时刻崩溃，磁盘上要么是旧文件，要么是完整的新文件。
+    """
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp',
+                               dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, ensure_ascii=False, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    _fsync_dir(path)
+
+
+class JsonModelStore:
+    """models.json 快照 + 追加式预写日志（journal）。
+
+    - 每次保存 / 删除向 models.json.log 追加一行并 fsync，耗时与目录大小无关；
+    - 加载时读快照，再依次重放 models.json.log.1（上次未完成的合并）与
+      models.json.log；末尾不完整的一行（写到一半时崩溃）会被截掉；
+    - 日志超过 COMPACT_THRESHOLD_BYTES 时先把它改名为 .log.1，新的写入进入
+      新日志，后台线程原子地写出新快照后再删除 .log.1。重放是幂等的，
+      所以在合并的任何阶段崩溃都不会丢数据。
+    """
+
+    # 日志超过多少字节时在后台合并进快照
+    COMPACT_THRESHOLD_BYTES = 4 * 1024 * 1024
+    # open_model_store 迁移失败、退回本后端时的说明
+    migration_error = None
+
+    def __init__(self, path, fields_path=None):
+        self.path = path
+        self.log_path = path + '.log'
+        self.rotated_path = path + '.log.1'
+        self.fields_path = fields_path or os.path.join(os.path.dirname(path), 'fields.json')
+        self._lock = threading.Lock()
+        self._log_file = None
+        self._log_size = 0
+        self._compactor = None
+        self.last_error = None
+        # 快照存在但无法解析时的异常；此时不再合并日志，保留原文件以便修复
+        self.load_error = None
+
+    # ---------------- 加载 / 恢复 ----------------
+    def load(self, strict=False):
+        """快照 + 日志 -> {名称: 数据}；快照无法解析时记入 load_error，strict 时抛出 ValueError。"""
+        models = {}
+        self.load_error = None
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    models = json.load(f)
+                if not isinstance(models, dict):
+                    raise ValueError('顶层应为 {型号: 数据} 对象')
+        except Exception as e:
+            self.load_error = e
+            if strict:
+                raise ValueError(f'无法读取 {os.path.basename(self.path)}: {e}') from e
+            models = {}
+        for path in (self.rotated_path, self.log_path):
+            try:
+                self._replay(path, models)
+            except Exception:
+                pass
+        try:
+            self._log_size = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        except OSError:
+            self._log_size = 0
+        return models
+
+    def _replay(self, path, models):
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            raw = f.read()
+        end = raw.rfind(b'\n') + 1
+        if end < len(raw) and path == self.log_path:
+            # 最后一行写到一半时崩溃：截掉，避免后续追加接在残行后面
+            with open(path, 'r+b') as f:
+                f.truncate(end)
+        for line in raw[:end].splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line.decode('utf-8'))
+            except ValueError:
+                continue
+            self._apply(models, rec)
+
+    @staticmethod
+    def _apply(models, rec):
+        op = rec.get('op')
+        if op == 'put':
+            models[rec['name']] = rec['data']
+        elif op == 'del':
+            models.pop(rec['name'], None)
+
+    # ---------------- 追加日志 ----------------
+    def _append(self, recs):
+        data = ''.join(json.dumps(rec, ensure_ascii=False, separators=(',', ':')) + '\n' for rec in recs)
+        data = data.encode('utf-8')
+        with self._lock:
+            if self._log_file is None:
+                self._log_file = open(self.log_path, 'ab')
+            self._log_file.write(data)
+            self._log_file.flush()
+            os.fsync(self._log_file.fileno())
+            self._log_size += len(data)
+
+    def put(self, name, data):
+        """保存单个型号（只追加一条记录）。"""
+        self._append([{'op': 'put', 'name': name, 'data': data}])
+
+    def put_many(self, items):
+        """批量保存 [(name, data), ...]（一次写入、一次 fsync）。"""
+        self._append([{'op': 'put', 'name': name, 'data': data} for name, data in items])
+
+    def delete(self, name):
+        """删除单个型号（只追加一条记录）。"""
+        self._append([{'op': 'del', 'name': name}])
+
+    # ---------------- 合并（compaction） ----------------
+    def _close_log(self):
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+
+    def maybe_compact(self, models):
+        """日志超过阈值时在后台线程合并；`models` 为当前完整目录。"""
+        if self._log_size < self.COMPACT_THRESHOLD_BYTES or self.load_error is not None:
+            return False
+        if self._compactor is not None and self._compactor.is_alive():
+            return False
+        if os.path.exists(self.rotated_path):
+            # 上一次合并没有完成（例如崩溃），先同步完成它
+            self.save_all(models)
+            return True
+        with self._lock:
+            self._close_log()
+            os.replace(self.log_path, self.rotated_path)
+            self._log_size = 0
+        snapshot = models.copy()
+        self._compactor = threading.Thread(target=self._compact, args=(snapshot,),
+                                           name='models-compaction', daemon=True)
+        self._compactor.start()
+        return True
+
+    def _compact(self, snapshot):
+        try:
+            atomic_write_json(self.path, export_dicts(snapshot))
+            os.remove(self.rotated_path)
+            _fsync_dir(self.path)
+        except Exception as e:
+            # 失败时保留 .log.1，下次加载会重放
+            self.last_error = e
+
+    def wait_compaction(self):
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+    def save_all(self, models):
+        """把整个目录原子地写成快照并清空日志。"""
+        self.wait_compaction()
+        data = export_dicts(models)
+        with self._lock:
+            atomic_write_json(self.path, data)
+            self._close_log()
+            for path in (self.rotated_path, self.log_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._log_size = 0
+
+    def close(self, models):
+        """退出时把未合并的变更写回快照（快照无法解析时保留日志，修复后重放）。"""
+        self.wait_compaction()
+        if self.load_error is None and (self._log_size or os.path.exists(self.rotated_path)):
+            self.save_all(models)
+        self._close_log()
+
+    # ---------------- 启动缓存 ----------------
+    def cache_sources(self):
+        """决定启动快照是否有效的源文件。"""
+        return [self.path, self.log_path, self.rotated_path, self.fields_path]
+
+    def cache_safe(self):
+        return True
+
+    # ---------------- 字段列表 / 导出 ----------------
+    def load_fields(self):
+        if os.path.exists(self.fields_path):
+            with open(self.fields_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return []
+
+    def save_fields(self, fields):
+        atomic_write_json(self.fields_path, fields)
+
+    def export_json(self, path):
+        """导出为 models.json 格式。"""
+        atomic_write_json(path, self.load())
+
+
+def _to_db(value):
+    """输入框文本 -> 数据库值：空串为 NULL，数字存为 REAL，其它保留原文。"""
+    if value is None:
+        return None
+    text = str(value).strip()
+    if text == '':
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def _from_db(value):
+    """数据库值 -> 输入框文本（与 models.json 中的写法一致）。"""
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    return str(value)
+
+
+class SqliteModelStore:
+    """嵌入式 SQLite 型号目录。"""
+
+    # 与 JsonModelStore 接口一致（迁移成功才会使用本后端）
+    migration_error = None
+    load_error = None
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS models (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        motor_power REAL,
+        motor_rpm REAL,
+        motor_pulley_d REAL,
+        use_secondary INTEGER NOT NULL DEFAULT 0,
+        sec1 REAL,
+        sec2 REAL,
+        roller_pulley_d REAL,
+        roller_diameter REAL,
+        belt_kmh REAL,
+        computed TEXT,
+        extras TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_models_motor_power ON models(motor_power);
+    CREATE INDEX IF NOT EXISTS idx_models_motor_rpm ON models(motor_rpm);
+    CREATE INDEX IF NOT EXISTS idx_models_motor_pulley_d ON models(motor_pulley_d);
+    CREATE INDEX IF NOT EXISTS idx_models_roller_pulley_d ON models(roller_pulley_d);
+    CREATE INDEX IF NOT EXISTS idx_models_roller_diameter ON models(roller_diameter);
+    CREATE INDEX IF NOT EXISTS idx_models_belt_kmh ON models(belt_kmh);
+    CREATE TABLE IF NOT EXISTS model_fields (
+        model_id INTEGER NOT NULL REFERENCES models(id) ON DELETE CASCADE,
+        field TEXT NOT NULL,
+        value TEXT,
+        PRIMARY KEY (model_id, field)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_model_fields_field_value ON model_fields(field, value);
+    CREATE TABLE IF NOT EXISTS field_list (
+        pos INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        spec TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # 后台写线程也会使用同一连接，由 _lock 串行化
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(self.SCHEMA)
+        self.conn.commit()
+
+    # ---------------- meta ----------------
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self.conn.execute('SELECT value FROM meta WHERE key=?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO meta(key, value) VALUES(?, ?)', (key, value))
+
+    # ---------------- models ----------------
+    def _row_to_data(self, row):
+        # 键顺序与 models.json 一致
+        data = {}
+        for col in ('motor_power', 'motor_rpm', 'motor_pulley_d'):
+            data[col] = _from_db(row[col])
+        data['use_secondary'] = bool(row['use_secondary'])
+        for col in ('sec1', 'sec2', 'roller_pulley_d', 'roller_diameter', 'belt_kmh'):
+            data[col] = _from_db(row[col])
+        data['computed'] = json.loads(row['computed']) if row['computed'] else {}
+        data['extras'] = json.loads(row['extras']) if row['extras'] else {}
+        data['fields'] = {}
+        return data
+
+    def load(self):
+        models = {}
+        by_id = {}
+        with self._lock:
+            self.conn.row_factory = sqlite3.Row
+            try:
+                for row in self.conn.execute('SELECT * FROM models ORDER BY name'):
+                    data = self._row_to_data(row)
+                    models[row['name']] = data
+                    by_id[row['id']] = data
+            finally:
+                self.conn.row_factory = None
+            for model_id, field, value in self.conn.execute(
+                    'SELECT model_id, field, value FROM model_fields'):
+                data = by_id.get(model_id)
+                if data is not None:
+                    data['fields'][field] = value if value is not None else ''
+        return models
+
+    def _put(self, name, data):
+        vals = [_to_db(data.get(col)) for col in NUMERIC_COLUMNS]
+        cols = ', '.join(NUMERIC_COLUMNS)
+        marks = ', '.join('?' for _ in NUMERIC_COLUMNS)
+        updates = ', '.join(f'{c}=excluded.{c}' for c in NUMERIC_COLUMNS)
+        self.conn.execute(
+            f'INSERT INTO models(name, {cols}, use_secondary, computed, extras) '
+            f'VALUES(?, {marks}, ?, ?, ?) '
+            f'ON CONFLICT(name) DO UPDATE SET {updates}, use_secondary=excluded.use_secondary, '
+            f'computed=excluded.computed, extras=excluded.extras',
+            [name] + vals + [1 if data.get('use_secondary') else 0,
+                             json.dumps(data.get('computed', {}), ensure_ascii=False),
+                             json.dumps(data.get('extras', {}), ensure_ascii=False)])
+        model_id = self.conn.execute('SELECT id FROM models WHERE name=?', (name,)).fetchone()[0]
+        self.conn.execute('DELETE FROM model_fields WHERE model_id=?', (model_id,))
+        self.conn.executemany(
+            'INSERT INTO model_fields(model_id, field, value) VALUES(?, ?, ?)',
+            [(model_id, f, str(v)) for f, v in (data.get('fields') or {}).items()])
+
+    def put(self, name, data):
+        """保存单个型号（单条事务）。"""
+        with self._lock, self.conn:
+            self._put(name, data)
+
+    def put_many(self, items):
+        """批量保存 [(name, data), ...]，一次事务提交。"""
+        with self._lock, self.conn:
+            for name, data in items:
+                self._put(name, data)
+
+    def delete(self, name):
+        with self._lock, self.conn:
+            self.conn.execute('DELETE FROM models WHERE name=?', (name,))
+
+    def maybe_compact(self, models):
+        # SQLite 自带 WAL，无需另行合并
+        return False
+
+    def save_all(self, models):
+        """用给定目录整体替换数据库内容（单个事务）。"""
+        with self._lock, self.conn:
+            self.conn.execute('DELETE FROM models')
+            for name, data in export_dicts(models).items():
+                self._put(name, data)
+
+    def close(self, models=None):
+        with self._lock:
+            try:
+                self.conn.commit()
+                self.conn.close()
+            except Exception:
+                pass
+
+    # ---------------- 启动缓存 ----------------
+    def cache_sources(self):
+        """决定启动快照是否有效的源文件（正常关闭后 WAL 已合并进主文件）。"""
+        return [self.path]
+
+    def cache_safe(self):
+        # WAL 中还有未合并的页（例如上次异常退出）时主文件指纹不可信
+        try:
+            return os.path.getsize(self.path + '-wal') == 0
+        except OSError:
+            return True
+
+    # ---------------- 分页与索引查询 ----------------
+    def count(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM models').fetchone()[0]
+
+    def names_page(self, offset, limit):
+        """按名称顺序取一页型号名称（走 name 唯一索引）。"""
+        with self._lock:
+            return [r[0] for r in self.conn.execute(
+                'SELECT name FROM models ORDER BY name LIMIT ? OFFSET ?', (limit, offset))]
+
+    def find_names(self, **ranges):
+        """按数值参数区间查询型号名称，例如 find_names(belt_kmh=(16, None))。"""
+        where = []
+        args = []
+        for col, (lo, hi) in ranges.items():
+            if col not in NUMERIC_COLUMNS:
+                raise ValueError(f'未知参数: {col}')
+            if lo is not None:
+                where.append(f'{col} >= ?')
+                args.append(lo)
+            if hi is not None:
+                where.append(f'{col} <= ?')
+                args.append(hi)
+        sql = 'SELECT name FROM models'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        with self._lock:
+            return [r[0] for r in self.conn.execute(sql + ' ORDER BY name', args)]
+
+    def query_names(self, query):
+        """按编译后的结构化查询（model_query.CompiledQuery）筛选型号名称。
+
+        查询只涉及可下推的列时在数据库中求值（走数值列索引），否则返回 None。
+        """
+        plan = query.sql()
+        if plan is None:
+            return None
+        where, args = plan
+        with self._lock:
+            return [r[0] for r in self.conn.execute(
+                f'SELECT name FROM models WHERE {where} ORDER BY name', args)]
+
+    # ---------------- 字段列表 ----------------
+    def load_fields(self):
+        with self._lock:
+            return [json.loads(spec) for (spec,) in self.conn.execute('SELECT spec FROM field_list ORDER BY pos')]
+
+    def _save_fields(self, fields):
+        self.conn.execute('DELETE FROM field_list')
+        self.conn.executemany(
+            'INSERT INTO field_list(pos, name, spec) VALUES(?, ?, ?)',
+            [(i, f.get('name') if isinstance(f, dict) else str(f), json.dumps(f, ensure_ascii=False))
+             for i, f in enumerate(fields)])
+
+    def save_fields(self, fields):
+        with self._lock, self.conn:
+            self._save_fields(fields)
+
+    # ---------------- 迁移 / 导出 ----------------
+    def migrate_from_json(self, json_store):
+        """从 models.json(+.log) 与 fields.json 一次性导入；任一文件无法解析时抛出 ValueError，不写迁移标记。"""
+        models = json_store.load(strict=True)
+        try:
+            fields = json_store.load_fields()
+        except Exception as e:
+            raise ValueError(f'无法读取 {os.path.basename(json_store.fields_path)}: {e}') from e
+        with self._lock, self.conn:
+            for name, data in models.items():
+                self._put(name, data)
+            self._save_fields(fields)
+            self.conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES('migrated_from_json', '1')")
+
+    def export_json(self, path):
+        """导出为 models.json 格式。"""
+        atomic_write_json(path, self.load())
+
+
+def open_model_store(base_dir):
+    """打开默认型号目录：优先 SQLite（首次自动迁移 JSON），否则退回 JSON。
+
+    迁移失败时不写迁移标记（下次启动重试），本次退回 JSON 后端，
+    原因记在返回的 store.migration_error 中，由调用方提示。
+    """
+    json_store = JsonModelStore(os.path.join(base_dir, 'models.json'),
+                                os.path.join(base_dir, 'fields.json'))
+    if sqlite3 is None:
+        return json_store
+    try:
+        store = SqliteModelStore(os.path.join(base_dir, 'models.db'))
+    except Exception:
+        return json_store
+    if store.get_meta('migrated_from_json') is None:
+        try:
+            store.migrate_from_json(json_store)
+        except Exception as e:
+            store.close()
+            json_store.migration_error = f'从 models.json 迁移到 models.db 失败，本次直接使用 JSON 文件: {e}'
+            return json_store
+    return store
+
+
+def store_problem(store):
+    """迁移失败或 models.json 无法读取时给用户的提示（在 load 之后调用），没有问题时为 None。"""
+    if store.migration_error:
+        return store.migration_error
+    if store.load_error is not None:
+        return f'models.json 无法读取，目录暂按空处理（文件保持原样，修复后重新打开即可）: {store.load_error}'
+    return None
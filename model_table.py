@@ -0,0 +1,317 @@
+"""产品型号表的数据模型（model/view）
+
+`ModelTableModel` 直接读取内存中的型号目录（catalog.Catalog），不为单元格创建任何对象；
+QTableView 只会请求可见行的数据，因此几万个型号也能流畅显示。
+
+排序不走 QSortFilterProxyModel（它每次比较都要回调 Python 的 data()），
+而是在模型内部维护按排序键升序排列的型号列表：排序键按字段类型计算
+（field_schema.FieldSpec.sort_key，数值列按大小而不是按字符串）并按型号缓存，
+排序时对列表做一次 `list.sort(key=...)`，降序只是反向读取。
+单个型号的增删改用二分查找定位，只插入 / 删除 / 刷新这一行。
+
+过滤（搜索框）时另有一份只含匹配型号的可见列表，仍保持同样的顺序，
+全部型号的有序列表不必重排，清空过滤只是换回全量列表。
+
+自定义字段之后可以附加由程序计算的只读列（`ExtraColumn`，例如灵敏度），
+它们同样按数值排序，值由提供方按型号名称给出。
+"""
+from bisect import bisect_left
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from catalog import Catalog
+from field_schema import load_specs
+
+
+class ExtraColumn:
+    """附加的计算列：name 为稳定名称（布局方案用），value(型号) 返回 float / 文本 / None。"""
+
+    __slots__ = ('name', 'label', 'value', 'numeric', 'decimals')
+
+    def __init__(self, name, label, value, numeric=True, decimals=4):
+        self.name = name
+        self.label = label
+        self.value = value
+        self.numeric = numeric
+        self.decimals = decimals
+
+    def text(self, model_name):
+        v = self.value(model_name)
+        if v is None:
+            return ''
+        return f'{v:.{self.decimals}g}' if self.numeric else str(v)
+
+    def sort_key(self, model_name):
+        v = self.value(model_name)
+        if v is None:
+            return (1, 0.0, '')
+        return (0, v, '') if self.numeric else (0, 0.0, str(v))
+
+
+class ModelTableModel(QAbstractTableModel):
+    """列：'#'、'型号'，其后为自定义字段（字段名或 FieldSpec 列表）。"""
+
+    NAME_COLUMN = 1
+
+    def __init__(self, models=None, fields=None, parent=None):
+        super().__init__(parent)
+        self._models = models if models is not None else Catalog()
+        self._specs = load_specs(fields)
+        self._fields = [s.name for s in self._specs]
+        self._extra = []       # 附加的计算列（ExtraColumn），排在自定义字段之后
+        self._all = []         # 全部型号，按 (排序键, 型号) 升序排列
+        self._rows = self._all  # 可见型号（无过滤时即 _all）
+        self._keys = {}        # 型号 -> 当前排序列的排序键
+        self._filter = None    # 可见型号集合；None 表示不过滤
+        self._sort_column = self.NAME_COLUMN
+        self._descending = False
+        self._rebuild()
+
+    # ---------------- 数据源 ----------------
+    def _make_key(self, name):
+        col = self._sort_column
+        extra = col - 2 - len(self._fields)
+        if 0 <= extra < len(self._extra):
+            return self._extra[extra].sort_key(name) + (name,)
+        if col <= self.NAME_COLUMN or col - 2 >= len(self._fields):
+            # '#' 与 '型号' 都按名称顺序
+            return ('', name)
+        spec = self._specs[col - 2]
+        return spec.sort_key(self._models.field_text(name, spec.name)) + (name,)
+
+    def _rebuild(self):
+        self._keys = {name: self._make_key(name) for name in self._models}
+        self._all = sorted(self._keys, key=self._keys.__getitem__)
+        self._apply_filter()
+
+    def _apply_filter(self):
+        if self._filter is None:
+            self._rows = self._all
+        elif len(self._filter) * 8 < len(self._all):
+            # 命中较少：直接按缓存的排序键排序命中的型号
+            keys = self._keys
+            self._rows = sorted((n for n in self._filter if n in keys), key=keys.__getitem__)
+        else:
+            flt = self._filter
+            self._rows = [n for n in self._all if n in flt]
+
+    def _visible(self, name):
+        return self._filter is None or name in self._filter
+
+    def _display_row(self, pos):
+        return len(self._rows) - 1 - pos if self._descending else pos
+
+    def _find(self, name, seq=None):
+        """型号在 seq（默认 _rows）中的位置（基于缓存的排序键二分查找），不存在返回 -1。"""
+        seq = self._rows if seq is None else seq
+        key = self._keys.get(name)
+        if key is None:
+            return -1
+        pos = bisect_left(seq, key, key=self._keys.__getitem__)
+        if pos < len(seq) and seq[pos] == name:
+            return pos
+        return -1
+
+    def reset(self, models=None, fields=None):
+        """整体替换数据源（例如重新加载或字段变化后）。"""
+        self.beginResetModel()
+        if models is not None:
+            self._models = models
+        if fields is not None:
+            self._specs = load_specs(fields)
+            self._fields = [s.name for s in self._specs]
+        self._rebuild()
+        self.endResetModel()
+
+    def insert_field(self, pos, spec):
+        """在第 pos 个自定义字段处插入一列（不重建行）。"""
+        col = pos + 2
+        self.beginInsertColumns(QModelIndex(), col, col)
+        self._specs.insert(pos, spec)
+        self._fields.insert(pos, spec.name)
+        if self._sort_column >= col:
+            # 排序字段本身没变，只是列号后移
+            self._sort_column += 1
+        self.endInsertColumns()
+
+    def remove_field(self, pos):
+        """移除第 pos 个自定义字段对应的列；若正按该列排序则改回按型号排序。"""
+        col = pos + 2
+        self.beginRemoveColumns(QModelIndex(), col, col)
+        del self._specs[pos]
+        del self._fields[pos]
+        resort = self._sort_column == col
+        if self._sort_column > col:
+            self._sort_column -= 1
+        self.endRemoveColumns()
+        if resort:
+            self.sort(self.NAME_COLUMN, Qt.AscendingOrder)
+
+    def set_extra_columns(self, columns):
+        """替换附加的计算列（在自定义字段之后）；正按被移除的列排序时改回按型号排序。"""
+        first = 2 + len(self._fields)
+        resort = self._sort_column >= first
+        if self._extra:
+            self.beginRemoveColumns(QModelIndex(), first, first + len(self._extra) - 1)
+            self._extra = []
+            self.endRemoveColumns()
+        if resort:
+            self.sort(self.NAME_COLUMN, Qt.AscendingOrder)
+        if columns:
+            self.beginInsertColumns(QModelIndex(), first, first + len(columns) - 1)
+            self._extra = list(columns)
+            self.endInsertColumns()
+
+    def refresh_extra_columns(self):
+        """附加列的值整体变化后刷新（按附加列排序时重排）。"""
+        if not self._extra:
+            return
+        if self._sort_column >= 2 + len(self._fields):
+            self.layoutAboutToBeChanged.emit()
+            self._rebuild()
+            self.layoutChanged.emit()
+        first = 2 + len(self._fields)
+        self.dataChanged.emit(self.index(0, first), self.index(self.rowCount() - 1, self.columnCount() - 1))
+
+    def set_filter(self, names):
+        """只显示 names 中的型号（set）；None 取消过滤。"""
+        self.beginResetModel()
+        self._filter = names
+        self._apply_filter()
+        self.endResetModel()
+
+    def upsert(self, name, matched=None):
+        """型号已新增或修改：只插入或刷新这一行。
+
+        matched：过滤状态下该型号修改后是否仍匹配（None 表示保持原状）。
+        """
+        if name not in self._models:
+            return
+        if matched is not None and self._filter is not None:
+            if matched:
+                self._filter.add(name)
+            else:
+                self._filter.discard(name)
+        pos = self._find(name)
+        new_key = self._make_key(name)
+        visible = self._visible(name)
+        if self._keys.get(name) == new_key and (pos >= 0) == visible:
+            if pos >= 0:
+                row = self._display_row(pos)
+                self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+            return
+        self._discard(name)
+        self._keys[name] = new_key
+        if self._rows is not self._all:
+            self._all.insert(bisect_left(self._all, new_key, key=self._keys.__getitem__), name)
+        if not visible:
+            return
+        pos = bisect_left(self._rows, new_key, key=self._keys.__getitem__)
+        # 降序显示时，升序位置 pos 之前的行都在它下方
+        row = len(self._rows) - pos if self._descending else pos
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.insert(pos, name)
+        self.endInsertRows()
+
+    def remove(self, name):
+        """型号已删除：只移除这一行。"""
+        self._discard(name)
+        self._keys.pop(name, None)
+        if self._filter is not None:
+            self._filter.discard(name)
+
+    def _discard(self, name):
+        # 从可见列表（带行删除信号）与全量列表中移除
+        pos = self._find(name)
+        if pos >= 0:
+            self._remove_at(pos)
+        if self._rows is not self._all:
+            pos = self._find(name, self._all)
+            if pos >= 0:
+                del self._all[pos]
+
+    def _remove_at(self, pos):
+        row = self._display_row(pos)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[pos]
+        self.endRemoveRows()
+
+    def column_names(self):
+        """各列的稳定名称（布局方案按它保存列宽，不受单位显示与列号变化影响）。"""
+        return ['#', '型号'] + self._fields + [c.name for c in self._extra]
+
+    def headers(self):
+        return ['#', '型号'] + [s.label() for s in self._specs] + [c.label for c in self._extra]
+
+    def name_at(self, row):
+        if 0 <= row < len(self._rows):
+            return self._rows[self._display_row(row)]
+        return None
+
+    def row_of(self, name):
+        pos = self._find(name)
+        return self._display_row(pos) if pos >= 0 else -1
+
+    def cell_text(self, row, col):
+        name = self.name_at(row)
+        if name is None:
+            return ''
+        if col == 0:
+            return str(row + 1)
+        if col == self.NAME_COLUMN:
+            return name
+        if col - 2 >= len(self._fields):
+            return self._extra[col - 2 - len(self._fields)].text(name)
+        fld = self._fields[col - 2]
+        return self._models.field_text(name, fld)
+
+    # ---------------- QAbstractTableModel ----------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 2 + len(self._fields) + len(self._extra)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self.cell_text(index.row(), index.column())
+        if role == Qt.TextAlignmentRole:
+            col = index.column() - 2
+            if 0 <= col < len(self._specs) and self._specs[col].type == 'number':
+                return int(Qt.AlignRight | Qt.AlignVCenter)
+            col -= len(self._specs)
+            if 0 <= col < len(self._extra) and self._extra[col].numeric:
+                return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            hdr = self.headers()
+            return hdr[section] if 0 <= section < len(hdr) else None
+        return str(section + 1)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    # ---------------- 排序 ----------------
+    def sort(self, column, order=Qt.AscendingOrder):
+        if not (0 <= column < self.columnCount()):
+            return
+        self.layoutAboutToBeChanged.emit()
+        # 记住持久索引（选中行等）对应的型号，排序后映射到新行号
+        old = self.persistentIndexList()
+        old_names = [self.name_at(i.row()) for i in old]
+        if column != self._sort_column:
+            self._sort_column = column
+            self._rebuild()
+        self._descending = order == Qt.DescendingOrder
+        if old:
+            self.changePersistentIndexList(old, [self.index(self.row_of(n), i.column())
+                                                 for n, i in zip(old_names, old)])
+        self.layoutChanged.emit()
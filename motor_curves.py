@@ -0,0 +1,306 @@
+"""电机特性曲线：转矩 / 功率 / 效率随转速变化，按规格缓存，批量匹配（不依赖 Qt）
+
+每台电机由额定点描述（额定功率 W、额定转速 rpm、额定转矩 N·m，给出其中两项即可，
+P = T·ω），再加额定效率、最高转速与短时峰值倍数：
+
+- 'dc'（永磁有刷直流）：额定电压下机械特性为直线 T = T_s·(1 − n/n0)，
+  top_rpm 为空载转速 n0；输入功率 P_in = T·ω0 + P0（电枢铜损 T·(ω0 − ω)
+  加空载损耗 P0），P0 由额定效率反推，因此不需要电压与电阻；
+  连续转矩为 min(额定转矩, 直线)，峰值为 min(额定转矩 × peak_factor, 直线)。
+- 'bldc'（无刷直流 + 控制器）：额定转速以下恒转矩，额定转速到 top_rpm 恒功率；
+  损耗 = k_c·T² + k_w·ω，额定点的损耗按 COPPER_SHARE 分为铜损与转速相关损耗。
+
+`curve(spec)` 在稠密转速网格上一次求出整条曲线，按（规范化后可哈希的）规格做
+LRU 缓存；`MotorTable` 把几百台电机的参数排成列，对一个跑步机设计的工作点
+（motor_rpm / motor_power）一次向量化求出所有电机的转矩裕量与效率。
+"""
+import csv
+import json
+import math
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+import drivetrain
+import sensitivity
+
+KINDS = ('dc', 'bldc')
+KIND_LABELS = {'dc': '有刷直流', 'bldc': '无刷直流'}
+
+# 未给出时的默认值
+DEFAULT_EFFICIENCY = {'dc': 0.75, 'bldc': 0.85}
+# top_rpm / 额定转速：直流为空载转速，无刷为恒功率区的最高转速
+DEFAULT_TOP_RATIO = {'dc': 1.0 / 0.85, 'bldc': 1.5}
+DEFAULT_PEAK_FACTOR = 2.0
+# 无刷电机额定点损耗中铜损所占比例
+COPPER_SHARE = 0.6
+
+GRID_POINTS = 2001
+CURVE_CACHE_SIZE = 256
+
+RPM_TO_RAD = 2.0 * math.pi / 60.0
+
+# 规范化后的规格（全部为 float / str，可哈希，用作缓存键）
+MotorSpec = namedtuple('MotorSpec', 'name kind rated_power rated_rpm rated_torque efficiency top_rpm '
+                                    'peak_factor voltage')
+
+# 导入 / 保存的字段（及表头别名）
+SPEC_FIELDS = MotorSpec._fields
+FIELD_ALIASES = {
+    '名称': 'name', '型号': 'name', '类型': 'kind', '额定功率': 'rated_power', '功率': 'rated_power',
+    '额定转速': 'rated_rpm', '转速': 'rated_rpm', '额定转矩': 'rated_torque', '转矩': 'rated_torque',
+    '效率': 'efficiency', '最高转速': 'top_rpm', '空载转速': 'top_rpm', '峰值倍数': 'peak_factor',
+    '电压': 'voltage',
+}
+
+CURVE_DTYPE = np.dtype([
+    ('rpm', 'f8'),
+    ('torque', 'f8'),        # 连续转矩 N·m
+    ('peak_torque', 'f8'),   # 短时峰值转矩
+    ('power', 'f8'),         # 连续输出功率 W
+    ('efficiency', 'f8'),    # 连续转矩下的效率
+])
+
+MATCH_DTYPE = np.dtype([
+    ('feasible', '?'),       # 转速够、连续转矩够
+    ('torque_margin', 'f8'), # 可用连续转矩 / 需要的转矩 − 1
+    ('rpm_margin', 'f8'),    # top_rpm / 需要的转速 − 1
+    ('power_ratio', 'f8'),   # 额定功率 / 需要的功率
+    ('efficiency', 'f8'),    # 工作点效率
+])
+
+
+class MotorSpecError(ValueError):
+    pass
+
+
+def _num(value):
+    """文本或数值 -> float；空为 None。"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return None
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        raise MotorSpecError(f'无效数值: {value!r}')
+    return v if math.isfinite(v) else None
+
+
+def make_spec(name='', kind='bldc', rated_power=None, rated_rpm=None, rated_torque=None, efficiency=None,
+              top_rpm=None, peak_factor=None, voltage=None):
+    """输入值（文本或数值）-> 规范化的 MotorSpec；额定三项给出两项即可补全第三项。"""
+    kind = (kind or 'bldc').strip().lower() if isinstance(kind, str) else kind
+    if kind not in KINDS:
+        raise MotorSpecError(f'未知的电机类型: {kind}')
+    power, rpm, torque = _num(rated_power), _num(rated_rpm), _num(rated_torque)
+    given = [v is not None for v in (power, rpm, torque)]
+    if sum(given) < 2:
+        raise MotorSpecError('额定功率、额定转速、额定转矩至少给出两项')
+    if rpm is None:
+        rpm = power / torque / RPM_TO_RAD if torque else None
+    elif torque is None:
+        torque = power / (rpm * RPM_TO_RAD) if rpm else None
+    elif power is None:
+        power = torque * rpm * RPM_TO_RAD
+    if not (power and power > 0 and rpm and rpm > 0 and torque and torque > 0):
+        raise MotorSpecError('额定功率、转速、转矩必须为正')
+    if sum(given) == 3 and abs(power - torque * rpm * RPM_TO_RAD) > 0.02 * power:
+        raise MotorSpecError('额定功率与转速 × 转矩不一致（相差超过 2%）')
+    eff = _num(efficiency)
+    if eff is None:
+        eff = DEFAULT_EFFICIENCY[kind]
+    elif eff > 1.0:
+        eff /= 100.0   # 按百分数输入
+    if not 0 < eff <= 1.0:
+        raise MotorSpecError('效率应在 0~1（或 0~100%）之间')
+    top = _num(top_rpm)
+    if top is None:
+        top = rpm * DEFAULT_TOP_RATIO[kind]
+    if not top > rpm:
+        raise MotorSpecError('最高 / 空载转速必须大于额定转速')
+    peak = _num(peak_factor)
+    if peak is None:
+        peak = DEFAULT_PEAK_FACTOR
+    if not peak >= 1.0:
+        raise MotorSpecError('峰值倍数不能小于 1')
+    volt = _num(voltage)
+    return MotorSpec(str(name or '').strip(), kind, float(power), float(rpm), float(torque), float(eff),
+                     float(top), float(peak), float(volt) if volt is not None else 0.0)
+
+
+def spec_from_dict(data):
+    """字典（键为 SPEC_FIELDS 或 FIELD_ALIASES 中的中文表头）-> MotorSpec。"""
+    values = {}
+    for key, value in data.items():
+        key = FIELD_ALIASES.get(str(key).strip(), str(key).strip())
+        if key in SPEC_FIELDS:
+            values[key] = value
+    return make_spec(**values)
+
+
+def spec_to_dict(spec):
+    out = spec._asdict()
+    if not out['voltage']:
+        out['voltage'] = None
+    return out
+
+
+def load_motors(path):
+    """从 CSV（带表头）或 JSON（字典列表）导入电机 -> (规格列表, [(行号, 错误提示)])。"""
+    if path.lower().endswith('.csv'):
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+        first = 2
+    else:
+        with open(path, encoding='utf-8') as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = rows.get('motors', [])
+        first = 1
+    specs, errors = [], []
+    for i, row in enumerate(rows):
+        try:
+            if not isinstance(row, dict):
+                raise MotorSpecError('每项应为一个对象')
+            specs.append(spec_from_dict(row))
+        except MotorSpecError as e:
+            errors.append((first + i, str(e)))
+    return specs, errors
+
+
+class MotorTable:
+    """一组电机的参数列；所有求值对电机与转速同时向量化（广播规则同 NumPy）。
+
+    转速 rpm 可以是标量、(电机数,) 数组（每台电机各自的工作点），
+    或 (1, m) / (电机数, m) 数组（网格）。
+    """
+
+    def __init__(self, specs):
+        self.specs = list(specs)
+        col = lambda key: np.array([getattr(s, key) for s in self.specs], dtype=float)
+        self.names = [s.name for s in self.specs]
+        self.is_dc = np.array([s.kind == 'dc' for s in self.specs], dtype=bool)
+        self.rated_power = col('rated_power')
+        self.rated_rpm = col('rated_rpm')
+        self.rated_torque = col('rated_torque')
+        self.efficiency_rated = col('efficiency')
+        self.top_rpm = col('top_rpm')
+        self.peak_factor = col('peak_factor')
+        # 直流：堵转转矩与空载损耗 P0 = P_r/η_r − T_r·ω0（不小于 0）
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.stall_torque = self.rated_torque / (1.0 - self.rated_rpm / self.top_rpm)
+        omega0 = self.top_rpm * RPM_TO_RAD
+        self.p0 = np.maximum(0.0, self.rated_power / self.efficiency_rated - self.rated_torque * omega0)
+        # 无刷：额定点损耗分为 k_c·T² 与 k_w·ω
+        loss = self.rated_power * (1.0 / self.efficiency_rated - 1.0)
+        self.kc = COPPER_SHARE * loss / self.rated_torque ** 2
+        self.kw = (1.0 - COPPER_SHARE) * loss / (self.rated_rpm * RPM_TO_RAD)
+
+    def __len__(self):
+        return len(self.specs)
+
+    def _cols(self, rpm, *arrays):
+        """按 rpm 的维数把参数列变成可广播的形状。"""
+        if np.ndim(rpm) >= 2:
+            return [a[:, None] for a in arrays]
+        return list(arrays)
+
+    def _torque(self, rpm, base):
+        """额定 / 峰值转矩 base 下的可用转矩曲线。"""
+        rpm = np.asarray(rpm, dtype=float)
+        is_dc, rated_rpm, top, stall, base = self._cols(rpm, self.is_dc, self.rated_rpm, self.top_rpm,
+                                                        self.stall_torque, base)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            line = stall * (1.0 - rpm / top)
+            dc = np.minimum(base, line)
+            bldc = np.where(rpm <= rated_rpm, base, base * rated_rpm / rpm)
+        out = np.where(is_dc, dc, bldc)
+        return np.where((rpm >= 0) & (rpm <= top), np.maximum(out, 0.0), 0.0)
+
+    def continuous_torque(self, rpm):
+        return self._torque(rpm, self.rated_torque)
+
+    def peak_torque(self, rpm):
+        return self._torque(rpm, self.rated_torque * self.peak_factor)
+
+    def efficiency(self, rpm, torque):
+        """工作点 (rpm, 输出转矩) 的效率；转矩或转速为 0 时为 0。"""
+        rpm = np.asarray(rpm, dtype=float)
+        torque = np.asarray(torque, dtype=float)
+        is_dc, top, p0, kc, kw = self._cols(rpm if np.ndim(rpm) >= np.ndim(torque) else torque,
+                                            self.is_dc, self.top_rpm, self.p0, self.kc, self.kw)
+        omega = rpm * RPM_TO_RAD
+        out = torque * omega
+        p_in = np.where(is_dc, torque * top * RPM_TO_RAD + p0, out + kc * torque ** 2 + kw * omega)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            eff = np.where(p_in > 0, out / p_in, 0.0)
+        return np.clip(eff, 0.0, 1.0)
+
+    def grid(self, points=GRID_POINTS):
+        """各电机从 0 到 top_rpm 的转速网格 (电机数, points)。"""
+        return self.top_rpm[:, None] * np.linspace(0.0, 1.0, points)[None, :]
+
+    def curves(self, points=GRID_POINTS):
+        """所有电机的曲线 (电机数, points) 结构化数组。"""
+        rpm = self.grid(points)
+        out = np.empty(rpm.shape, dtype=CURVE_DTYPE)
+        torque = self.continuous_torque(rpm)
+        out['rpm'] = rpm
+        out['torque'] = torque
+        out['peak_torque'] = self.peak_torque(rpm)
+        out['power'] = torque * rpm * RPM_TO_RAD
+        out['efficiency'] = self.efficiency(rpm, torque)
+        return out
+
+    def match(self, required_rpm, required_power):
+        """一个工作点（电机转速 rpm、输出功率 W）对所有电机 -> MATCH_DTYPE 数组。"""
+        required_rpm = float(required_rpm)
+        required_power = float(required_power)
+        if not (required_rpm > 0 and required_power > 0):
+            raise MotorSpecError('需要的转速与功率必须为正')
+        need = required_power / (required_rpm * RPM_TO_RAD)
+        avail = self.continuous_torque(np.full(len(self), required_rpm))
+        out = np.empty(len(self), dtype=MATCH_DTYPE)
+        out['torque_margin'] = avail / need - 1.0
+        out['rpm_margin'] = self.top_rpm / required_rpm - 1.0
+        out['power_ratio'] = self.rated_power / required_power
+        out['efficiency'] = self.efficiency(required_rpm, np.minimum(need, np.maximum(avail, 0.0)))
+        out['feasible'] = (out['torque_margin'] >= -1e-9) & (out['rpm_margin'] >= 0)
+        return out
+
+    def rank(self, match):
+        """排序后的电机下标：可行的在前，其中额定功率最接近需要的在前（同档按效率）。"""
+        oversize = np.where(match['feasible'], match['power_ratio'], np.inf)
+        shortfall = np.where(match['feasible'], 0.0, -match['torque_margin'])
+        return np.lexsort((-match['efficiency'], np.round(oversize, 2), shortfall, ~match['feasible']))
+
+
+@lru_cache(maxsize=CURVE_CACHE_SIZE)
+def curve(spec, points=GRID_POINTS):
+    """单台电机的曲线（只读的 CURVE_DTYPE 数组），按规格与点数缓存。"""
+    out = MotorTable((spec,)).curves(points)[0]
+    out.setflags(write=False)
+    return out
+
+
+def catalog_requirements(catalog, names=None):
+    """目录中各型号对电机的要求 -> (型号名称列表, 电机转速数组, 功率数组)；参数不全的为 NaN。"""
+    cols = catalog.columns(names)
+    inputs = {key: cols.number(key) for key in drivetrain.DRIVE_VARS}
+    inputs['use_secondary'] = cols.flag()
+    design = sensitivity.solve_designs(inputs)
+    return list(cols.names), design['motor_rpm'], cols.number('motor_power')
+
+
+def drivable(spec, rpm, power):
+    """单台电机能否驱动各型号（按型号的 motor_rpm / motor_power，向量化）-> bool 数组。"""
+    table = MotorTable((spec,))
+    rpm = np.asarray(rpm, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        need = power / (rpm * RPM_TO_RAD)
+        avail = table.continuous_torque(rpm[None, :])[0]
+        return (rpm > 0) & (rpm <= spec.top_rpm) & (power > 0) & (avail >= need * (1 - 1e-9))
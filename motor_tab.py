@@ -0,0 +1,445 @@
+"""电机选项卡：录入 / 导入电机，查看特性曲线，按跑步机设计的工作点匹配电机（器材插件，见 equipment.py）"""
+import json
+import os
+
+import numpy as np
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QPointF, Qt, QTimer
+from PySide6.QtGui import QColor, QPainter, QPen
+from PySide6.QtWidgets import (
+    QComboBox,
+    QFileDialog,
+    QFormLayout,
+    QGroupBox,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QMessageBox,
+    QPushButton,
+    QTableView,
+    QVBoxLayout,
+    QWidget,
+)
+
+import motor_curves
+import persist_worker
+from model_store import atomic_write_json
+from qt_equipment import to_float
+
+
+class MotorCurveWidget(QWidget):
+    """电机曲线：连续 / 峰值转矩（左轴）与效率（右轴，0~100%），红点为工作点。"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.curve = None
+        self.point = None
+        self.setMinimumHeight(220)
+
+    def set_data(self, curve, point=None):
+        self.curve, self.point = curve, point
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.palette().base())
+        rect = self.rect().adjusted(40, 10, -40, -24)
+        if self.curve is None or rect.width() <= 0:
+            return
+        painter.setRenderHint(QPainter.Antialiasing)
+        # 按宽度抽取点，几千点的网格不必逐点绘制
+        step = max(1, len(self.curve) // max(1, rect.width()))
+        c = self.curve[::step]
+        x_max = float(self.curve['rpm'][-1]) or 1.0
+        t_max = float(max(self.curve['peak_torque'].max(), self.point[1] if self.point else 0.0)) * 1.05 or 1.0
+
+        def pts(ys, y_max):
+            return [QPointF(rect.left() + x / x_max * rect.width(), rect.bottom() - y / y_max * rect.height())
+                    for x, y in zip(c['rpm'].tolist(), ys.tolist())]
+
+        painter.setPen(QPen(QColor('#5b9bd5'), 2))
+        painter.drawPolyline(pts(c['torque'], t_max))
+        painter.setPen(QPen(QColor('#5b9bd5'), 1, Qt.DashLine))
+        painter.drawPolyline(pts(c['peak_torque'], t_max))
+        painter.setPen(QPen(QColor('#70ad47'), 2))
+        painter.drawPolyline(pts(c['efficiency'], 1.0))
+        if self.point is not None:
+            x = rect.left() + self.point[0] / x_max * rect.width()
+            y = rect.bottom() - self.point[1] / t_max * rect.height()
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor('#d9534f'))
+            painter.drawEllipse(QPointF(x, y), 4, 4)
+        painter.setPen(self.palette().text().color())
+        painter.setBrush(Qt.NoBrush)
+        painter.drawRect(rect)
+        fm = painter.fontMetrics()
+        painter.drawText(rect.left() - fm.horizontalAdvance(f'{t_max:.1f}') - 4, rect.top() + fm.ascent(),
+                         f'{t_max:.1f}')
+        painter.drawText(rect.right() + 4, rect.top() + fm.ascent(), '100%')
+        painter.drawText(rect.left(), self.height() - 6, '0')
+        text = f'{x_max:.0f} RPM'
+        painter.drawText(rect.right() - fm.horizontalAdvance(text), self.height() - 6, text)
+        painter.drawText(rect.left() + 6, rect.top() + fm.ascent() + 2, '转矩 N·m（虚线为峰值）／效率（绿）')
+
+
+class MotorListModel(QAbstractTableModel):
+    """电机列表（model/view，不为单元格创建对象）；行顺序与文本取自 MotorTab。"""
+
+    def __init__(self, tab):
+        super().__init__(tab)
+        self.tab = tab
+
+    def reset(self):
+        self.beginResetModel()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.tab.order)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(MotorTab.COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        i = self.tab.order[index.row()]
+        if role == Qt.DisplayRole:
+            return self.tab.cell_text(i, MotorTab.COLUMNS[index.column()][0])
+        if role == Qt.ForegroundRole and self.tab.match is not None and not self.tab.match['feasible'][i]:
+            # 不满足工作点的电机置灰
+            return QColor('#999999')
+        if role == Qt.TextAlignmentRole and index.column() >= 2:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return MotorTab.COLUMNS[section][1]
+        return super().headerData(section, orientation, role)
+
+
+class MotorTab(QWidget):
+    """电机选项卡：录入 / 导入电机额定参数，查看转矩—转速—效率曲线，按跑步机设计的工作点匹配电机。"""
+
+    COLUMNS = [
+        ('name', '名称'),
+        ('kind', '类型'),
+        ('rated_power', '额定功率 (W)'),
+        ('rated_rpm', '额定转速'),
+        ('rated_torque', '额定转矩 (N·m)'),
+        ('efficiency', '额定效率'),
+        ('top_rpm', '最高转速'),
+        ('torque_margin', '转矩裕量'),
+        ('op_efficiency', '工作点效率'),
+    ]
+    # 表单：字段 -> 标签
+    FORM = [
+        ('rated_power', '额定功率 (W)'),
+        ('rated_rpm', '额定转速 (RPM)'),
+        ('rated_torque', '额定转矩 (N·m)'),
+        ('efficiency', '额定效率 (0~1 或 %)'),
+        ('top_rpm', '最高 / 空载转速 (RPM)'),
+        ('peak_factor', '峰值倍数'),
+        ('voltage', '电压 (V)'),
+    ]
+
+    def __init__(self, treadmill, parent=None):
+        super().__init__(parent)
+        self.treadmill = treadmill
+        self.path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'motors.json')
+        self.load_error = None  # motors.json 无法读取时的错误，此时不覆盖文件
+        self.unparsed = []      # 本版本无法识别的电机，保存时原样写回
+        self.specs = self.load_motors()
+        self.motor_table = motor_curves.MotorTable(self.specs)
+        self.match = None      # 当前工作点的 MATCH_DTYPE，与 self.specs 对齐
+        self.order = list(range(len(self.specs)))   # 表格行 -> self.specs 下标
+        self.init_ui()
+        self.refresh_table()
+        problem = self.load_problem()
+        if problem:
+            QTimer.singleShot(0, lambda: QMessageBox.warning(self, '电机库', problem))
+
+    def init_ui(self):
+        form = QFormLayout()
+        form.setLabelAlignment(Qt.AlignRight)
+        self.name_edit = QLineEdit()
+        self.kind_combo = QComboBox()
+        for kind in motor_curves.KINDS:
+            self.kind_combo.addItem(motor_curves.KIND_LABELS[kind], kind)
+        form.addRow('名称', self.name_edit)
+        form.addRow('类型', self.kind_combo)
+        self.edits = {}
+        for key, label in self.FORM:
+            edt = QLineEdit()
+            edt.setPlaceholderText('可留空' if key not in ('rated_power', 'rated_rpm', 'rated_torque') else '')
+            form.addRow(label, edt)
+            self.edits[key] = edt
+        form.addRow(QLabel('额定功率 / 转速 / 转矩给出两项即可。'))
+        btn_save = QPushButton('保存电机')
+        btn_save.clicked.connect(self.save_motor)
+        btn_delete = QPushButton('删除')
+        btn_delete.clicked.connect(self.delete_motor)
+        btn_import = QPushButton('导入…')
+        btn_import.clicked.connect(self.import_motors)
+        h = QHBoxLayout()
+        h.addWidget(btn_save)
+        h.addWidget(btn_delete)
+        h.addWidget(btn_import)
+        form.addRow(h)
+        spec_box = QGroupBox('电机参数')
+        spec_box.setLayout(form)
+
+        # 工作点：默认取自跑步机当前设计
+        self.req_rpm = QLineEdit()
+        self.req_power = QLineEdit()
+        btn_from = QPushButton('取自跑步机')
+        btn_from.clicked.connect(self.requirement_from_treadmill)
+        btn_match = QPushButton('匹配')
+        btn_match.clicked.connect(lambda: self.run_match())
+        req_h = QHBoxLayout()
+        req_h.addWidget(QLabel('工作点 电机转速 (RPM)'))
+        req_h.addWidget(self.req_rpm)
+        req_h.addWidget(QLabel('功率 (W)'))
+        req_h.addWidget(self.req_power)
+        req_h.addWidget(btn_from)
+        req_h.addWidget(btn_match)
+
+        self.list_model = MotorListModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.list_model)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setSelectionMode(QTableView.SingleSelection)
+        self.table.selectionModel().selectionChanged.connect(self.on_selection_changed)
+
+        self.curve_widget = MotorCurveWidget()
+        self.lbl_info = QLabel('')
+        self.lbl_info.setWordWrap(True)
+        self.lbl_info.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        btn_apply = QPushButton('填入跑步机（功率 / 转速）')
+        btn_apply.clicked.connect(self.apply_to_treadmill)
+        info_h = QHBoxLayout()
+        info_h.addWidget(self.lbl_info, 1)
+        info_h.addWidget(btn_apply)
+
+        right = QVBoxLayout()
+        right.addLayout(req_h)
+        right.addWidget(self.table, 1)
+        right.addWidget(self.curve_widget, 1)
+        right.addLayout(info_h)
+
+        layout = QHBoxLayout()
+        layout.addWidget(spec_box)
+        layout.addLayout(right, 1)
+        self.setLayout(layout)
+
+    # ---------------- 电机库 ----------------
+    def load_motors(self):
+        """读取 motors.json；无法识别的项记入 unparsed（附出错原因），文件无法读取时记入 load_error。"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, list):
+                raise ValueError('顶层应为电机列表')
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            self.load_error = e
+            return []
+        specs = []
+        for i, item in enumerate(data):
+            try:
+                if not isinstance(item, dict):
+                    raise motor_curves.MotorSpecError('每项应为一个对象')
+                specs.append(motor_curves.spec_from_dict(item))
+            except motor_curves.MotorSpecError as e:
+                self.unparsed.append((i + 1, item, str(e)))
+        return specs
+
+    def load_problem(self):
+        """motors.json 无法读取或有无法识别的项时给用户的提示，没有问题时为 None。"""
+        if self.load_error is not None:
+            return (f'motors.json 无法读取，电机库暂按空处理，本次的修改不会保存'
+                    f'（文件保持原样，修复后重新打开即可）: {self.load_error}')
+        if self.unparsed:
+            lines = [f'第 {n} 项：{msg}' for n, _, msg in self.unparsed[:10]]
+            return (f'motors.json 中有 {len(self.unparsed)} 项无法识别，未显示（保存时原样保留）：\n'
+                    + '\n'.join(lines))
+        return None
+
+    def save_motors(self):
+        if self.load_error is not None:
+            return
+        data = [motor_curves.spec_to_dict(s) for s in self.specs] + [item for _, item, _ in self.unparsed]
+        persist_worker.get_worker().submit(('motors', self.path), atomic_write_json, self.path, data)
+
+    def set_specs(self, specs, select=None):
+        """替换电机库并保存；表格重排后重新选中 select（默认原来选中的电机）。"""
+        if select is None:
+            current = self.current_spec()
+            select = current.name if current is not None else None
+        self.specs = specs
+        self.motor_table = motor_curves.MotorTable(specs)
+        self.save_motors()
+        self.run_match(quiet=True, select=select)
+
+    def form_spec(self):
+        values = {key: edt.text() for key, edt in self.edits.items()}
+        return motor_curves.make_spec(self.name_edit.text(), self.kind_combo.currentData(), **values)
+
+    def save_motor(self):
+        try:
+            spec = self.form_spec()
+        except motor_curves.MotorSpecError as e:
+            QMessageBox.warning(self, '错误', str(e))
+            return
+        if not spec.name:
+            QMessageBox.warning(self, '错误', '请输入电机名称')
+            return
+        self.set_specs([s for s in self.specs if s.name != spec.name] + [spec], spec.name)
+
+    def delete_motor(self):
+        spec = self.current_spec()
+        if spec is None:
+            return
+        self.set_specs([s for s in self.specs if s.name != spec.name])
+
+    def import_motors(self):
+        path, _ = QFileDialog.getOpenFileName(self, '导入电机', '', '电机参数 (*.csv *.json)')
+        if not path:
+            return
+        try:
+            specs, errors = motor_curves.load_motors(path)
+        except Exception as e:
+            QMessageBox.warning(self, '错误', f'导入失败: {e}')
+            return
+        # 同名电机以导入的为准；没有名称的按序号命名
+        by_name = {s.name: s for s in self.specs}
+        for i, spec in enumerate(specs):
+            name = spec.name or f'{os.path.splitext(os.path.basename(path))[0]}-{i + 1}'
+            by_name[name] = spec._replace(name=name)
+        self.set_specs(list(by_name.values()))
+        msg = f'已导入 {len(specs)} 台电机。'
+        if errors:
+            msg += f'\n跳过 {len(errors)} 行：\n' + '\n'.join(f'第 {n} 行：{m}' for n, m in errors[:10])
+        QMessageBox.information(self, '导入', msg)
+
+    # ---------------- 匹配 ----------------
+    def requirement(self):
+        rpm, power = to_float(self.req_rpm.text()), to_float(self.req_power.text())
+        if rpm is None or power is None or rpm <= 0 or power <= 0:
+            return None
+        return rpm, power
+
+    def requirement_from_treadmill(self):
+        """跑步机当前设计的电机转速（求解结果优先）与 motor_power。"""
+        values = self.treadmill.live.values
+        rpm = values.get('out.motor_rpm') or values.get('motor_rpm')
+        power = values.get('motor_power')
+        self.req_rpm.setText('' if rpm is None else f'{rpm:.0f}')
+        self.req_power.setText('' if power is None else f'{power:g}')
+        self.run_match()
+
+    def run_match(self, quiet=False, select=None):
+        """按工作点给所有电机一次向量化打分并排序（可行、功率最接近的在前）。"""
+        if select is None:
+            current = self.current_spec()
+            select = current.name if current is not None else None
+        req = self.requirement()
+        if req is None or not self.specs:
+            if req is None and not quiet:
+                QMessageBox.information(self, '提示', '请填写工作点的电机转速与功率（或点“取自跑步机”）。')
+            self.match = None
+            self.order = list(range(len(self.specs)))
+        else:
+            self.match = self.motor_table.match(*req)
+            self.order = self.motor_table.rank(self.match).tolist()
+        self.refresh_table()
+        if select is not None:
+            self.select_name(select)
+
+    # ---------------- 显示 ----------------
+    def refresh_table(self):
+        self.list_model.reset()
+        self.show_curve()
+
+    def cell_text(self, i, key):
+        spec = self.specs[i]
+        if key == 'name':
+            return spec.name
+        if key == 'kind':
+            return motor_curves.KIND_LABELS[spec.kind]
+        if key in ('torque_margin', 'op_efficiency'):
+            if self.match is None:
+                return '-'
+            v = float(self.match[i]['torque_margin' if key == 'torque_margin' else 'efficiency'])
+            return f'{v * 100:+.1f}%' if key == 'torque_margin' else f'{v * 100:.1f}%'
+        v = getattr(spec, key)
+        if key == 'efficiency':
+            return f'{v * 100:.1f}%'
+        return f'{v:.3f}'.rstrip('0').rstrip('.')
+
+    def current_spec(self):
+        rows = self.table.selectionModel().selectedRows()
+        row = rows[0].row() if rows else -1
+        if not 0 <= row < len(self.order):
+            return None
+        return self.specs[self.order[row]]
+
+    def select_name(self, name):
+        for r, i in enumerate(self.order):
+            if self.specs[i].name == name:
+                self.table.selectRow(r)
+                self.table.scrollTo(self.list_model.index(r, 0))
+                self.show_curve()
+                return
+
+    def on_selection_changed(self, *args):
+        spec = self.current_spec()
+        if spec is not None:
+            self.name_edit.setText(spec.name)
+            self.kind_combo.setCurrentIndex(motor_curves.KINDS.index(spec.kind))
+            for key, edt in self.edits.items():
+                v = getattr(spec, key)
+                text = f'{v:.4f}'.rstrip('0').rstrip('.')
+                if key == 'rated_torque':
+                    # 额定转矩由功率与转速推出，只作提示，修改功率或转速时不会互相矛盾
+                    edt.clear()
+                    edt.setPlaceholderText(text)
+                else:
+                    edt.setText('' if key == 'voltage' and not v else text)
+        self.show_curve()
+
+    def show_curve(self):
+        spec = self.current_spec()
+        if spec is None:
+            self.curve_widget.set_data(None)
+            self.lbl_info.setText('')
+            return
+        req = self.requirement()
+        point = None
+        lines = [f'{motor_curves.KIND_LABELS[spec.kind]}，额定 {spec.rated_power:g} W @ {spec.rated_rpm:g} RPM，'
+                 f'{spec.rated_torque:.3f} N·m，峰值 ×{spec.peak_factor:g}']
+        if req is not None:
+            rpm, power = req
+            point = (rpm, power / (rpm * motor_curves.RPM_TO_RAD))
+            m = self.motor_table.match(rpm, power)[self.specs.index(spec)]
+            lines.append(f'工作点 {rpm:g} RPM / {power:g} W（{point[1]:.3f} N·m）：'
+                         f'{"满足" if m["feasible"] else "不满足"}，转矩裕量 {m["torque_margin"] * 100:+.1f}%，'
+                         f'效率 {m["efficiency"] * 100:.1f}%')
+        names, rpm_col, power_col = motor_curves.catalog_requirements(self.treadmill.models)
+        ok = motor_curves.drivable(spec, rpm_col, power_col)
+        valid = int((np.isfinite(rpm_col) & np.isfinite(power_col)).sum())
+        lines.append(f'可驱动目录中 {int(ok.sum())} / {valid} 个型号（按各型号的 motor_rpm / motor_power）')
+        self.curve_widget.set_data(motor_curves.curve(spec), point)
+        self.lbl_info.setText('\n'.join(lines))
+
+    def apply_to_treadmill(self):
+        spec = self.current_spec()
+        if spec is None:
+            return
+        self.treadmill.motor_power_edit.setText(f'{spec.rated_power:g}')
+        self.treadmill.motor_rpm_edit.setText(f'{spec.rated_rpm:g}')
+
+
+def make_tab(window):
+    """选项卡工厂：工作点与型号目录取自主窗口的跑步机选项卡。"""
+    return MotorTab(window.treadmill_tab)
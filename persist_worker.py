@@ -0,0 +1,113 @@
+"""后台持久化线程（不依赖 Qt）
+
+所有写盘操作（型号、字段列表、界面偏好）都通过 `submit(key, fn, *args)` 交给
+一个专用写线程执行，GUI 线程不再等待磁盘。
+
+- 写请求按 key 合并：同一个 key 在执行前被多次提交时只执行最后一次，
+  并移到队尾，保证合并后的执行顺序与最终状态和逐条执行一致；
+- 第一个请求到达后等待 `coalesce_delay` 秒再开始执行，让连续编辑合并成一次写；
+- 失败通过 `add_error_listener` 注册的回调报告（回调在写线程中调用），
+  不再静默吞掉异常；
+- `flush()` 等待所有已提交的写完成，`shutdown()` 在程序退出时调用。
+"""
+import threading
+import time
+import traceback
+from collections import OrderedDict
+
+
+class PersistWorker:
+    """单线程写队列，按 key 合并。"""
+
+    def __init__(self, coalesce_delay=0.05):
+        self.coalesce_delay = coalesce_delay
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._stopping = False
+        self._listeners = []
+        self._thread = threading.Thread(target=self._run, name='persist-worker', daemon=True)
+        self._thread.start()
+
+    def add_error_listener(self, callback):
+        """callback(key, exc) —— 在写线程中调用，Qt 端需自行转到 GUI 线程。"""
+        self._listeners.append(callback)
+
+    def submit(self, key, fn, *args, **kwargs):
+        """提交一次写操作；同 key 未执行的旧请求会被替换。"""
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError('persist worker 已关闭')
+            self._pending[key] = (fn, args, kwargs)
+            self._pending.move_to_end(key)
+            self._cond.notify_all()
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._pending)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if not self._pending and self._stopping:
+                    return
+            if self.coalesce_delay and not self._stopping:
+                # 让一连串的写请求先合并
+                time.sleep(self.coalesce_delay)
+            with self._cond:
+                batch = list(self._pending.items())
+                self._pending.clear()
+                self._busy = True
+            for key, (fn, args, kwargs) in batch:
+                try:
+                    fn(*args, **kwargs)
+                except Exception as e:
+                    self._report(key, e)
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def _report(self, key, exc):
+        if not self._listeners:
+            traceback.print_exception(type(exc), exc, exc.__traceback__)
+        for cb in list(self._listeners):
+            try:
+                cb(key, exc)
+            except Exception:
+                traceback.print_exc()
+
+    def flush(self, timeout=None):
+        """等待所有已提交的写完成；超时返回 False。"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def shutdown(self, timeout=None):
+        """执行完剩余写请求后停止线程。"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    """进程内共享的写线程（首次使用时启动）。"""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = PersistWorker()
+        return _worker
+
+
+def shutdown(timeout=None):
+    """程序退出时调用：写完所有挂起的请求。"""
+    global _worker
+    with _worker_lock:
+        worker, _worker = _worker, None
+    if worker is not None:
+        worker.shutdown(timeout)
@@ -0,0 +1,178 @@
+"""统一的界面偏好（不依赖 Qt）
+
+历史上有四个互相重叠的偏好文件：ui.json、ui_config.json、ui_state.json
+与 ui_prefs.json。现在只保留 ui_prefs.json，格式为::
+
+    {
+      "version": 2,
+      "dark_theme": false,
+      "apply_on_start": false,
+      "tables": {
+        "treadmill.models": {"col_widths": [...], "row_heights": [...], "locked": true}
+      }
+    }
+
+首次加载旧格式时按 ui_prefs.json > ui_state.json > ui.json > ui_config.json
+的优先级合并，只补缺失的项；旧文件保持原样，迁移后不再读取。
+
+偏好在进程内只加载一次，读取都走内存；修改交给后台写线程原子写回，
+短时间内的连续修改合并为一次写（persist_worker 按 key 合并）。
+每个表格有独立的布局方案（`table_profile(table_id)`），多个选项卡互不覆盖。
+"""
+import copy
+import json
+import os
+
+import persist_worker
+from model_store import atomic_write_json
+
+PREFS_VERSION = 2
+PREFS_FILE = 'ui_prefs.json'
+LEGACY_FILES = ('ui_state.json', 'ui.json', 'ui_config.json')
+
+# 跑步机选项卡下方共享的型号表
+TREADMILL_TABLE = 'treadmill.models'
+
+
+def _read_json(path):
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+    except Exception:
+        pass
+    return {}
+
+
+def _indexed_list(value):
+    """[w0, w1, ...] 或 {"0": w0, "1": w1} -> 列表（缺失的位置跳过之后的项）。"""
+    if isinstance(value, list):
+        return [int(v) for v in value]
+    if isinstance(value, dict):
+        out = []
+        while str(len(out)) in value:
+            out.append(int(value[str(len(out))]))
+        return out
+    return []
+
+
+def _legacy_profile(name, data):
+    """旧文件中的表格布局 -> 布局方案字典（只含文件中出现的项）。"""
+    profile = {}
+    if name == PREFS_FILE:
+        for key in ('col_widths', 'row_heights'):
+            if key in data:
+                profile[key] = _indexed_list(data[key])
+        if 'locked' in data:
+            profile['locked'] = bool(data['locked'])
+    elif name == 'ui_state.json':
+        if 'table_col_widths' in data:
+            profile['col_widths'] = _indexed_list(data['table_col_widths'])
+        if 'table_row_heights' in data:
+            profile['row_heights'] = _indexed_list(data['table_row_heights'])
+        if 'table_locked' in data:
+            profile['locked'] = bool(data['table_locked'])
+    elif name == 'ui.json':
+        layout = data.get('table_layout') or {}
+        if 'column_widths' in layout:
+            profile['col_widths'] = _indexed_list(layout['column_widths'])
+        if 'default_row_height' in layout:
+            profile['default_row_height'] = int(layout['default_row_height'])
+        if 'locked' in layout:
+            profile['locked'] = bool(layout['locked'])
+    elif name == 'ui_config.json':
+        table = data.get('table') or {}
+        if 'col_widths' in table:
+            profile['col_widths'] = _indexed_list(table['col_widths'])
+    return profile
+
+
+def migrate(base_dir, current):
+    """把旧格式（ui_prefs.json v1 与其它三个旧文件）合并为 v2 结构。"""
+    prefs = {'version': PREFS_VERSION, 'dark_theme': False, 'apply_on_start': False, 'tables': {}}
+    sources = [(PREFS_FILE, current)] + [(n, _read_json(os.path.join(base_dir, n))) for n in LEGACY_FILES]
+    profile = {}
+    seen = set()
+    for name, data in sources:
+        for key in ('dark_theme', 'apply_on_start'):
+            if key in data and key not in seen:
+                prefs[key] = bool(data[key])
+                seen.add(key)
+        try:
+            for key, value in _legacy_profile(name, data).items():
+                profile.setdefault(key, value)
+        except (TypeError, ValueError):
+            # 个别旧文件内容损坏时跳过该文件
+            continue
+    if profile:
+        prefs['tables'][TREADMILL_TABLE] = profile
+    return prefs
+
+
+class Preferences:
+    """进程内唯一的偏好存储：读内存，写后台合并、原子写回。"""
+
+    def __init__(self, base_dir, cache=None):
+        self.base_dir = base_dir
+        self.path = os.path.join(base_dir, PREFS_FILE)
+        if cache is not None:
+            # 启动快照中已有解析结果时不再读文件
+            data = cache.load_json(self.path, {}) or {}
+        else:
+            data = _read_json(self.path)
+        if data.get('version') == PREFS_VERSION:
+            self._data = copy.deepcopy(data)
+            self._data.setdefault('tables', {})
+        else:
+            self._data = migrate(base_dir, data)
+            self.save()
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def set(self, key, value):
+        if self._data.get(key) != value:
+            self._data[key] = value
+            self.save()
+
+    def update(self, **values):
+        changed = {k: v for k, v in values.items() if self._data.get(k) != v}
+        if changed:
+            self._data.update(changed)
+            self.save()
+
+    # ---------------- 表格布局方案 ----------------
+    def table_profile(self, table_id):
+        """表格布局（col_widths / row_heights / default_row_height / locked），返回副本。"""
+        return copy.deepcopy(self._data['tables'].get(table_id, {}))
+
+    def set_table_profile(self, table_id, profile):
+        self._data['tables'][table_id] = copy.deepcopy(profile)
+        self.save()
+
+    def update_table_profile(self, table_id, **values):
+        profile = self._data['tables'].setdefault(table_id, {})
+        profile.update(copy.deepcopy(values))
+        self.save()
+        return copy.deepcopy(profile)
+
+    # ---------------- 保存 ----------------
+    def snapshot(self):
+        return copy.deepcopy(self._data)
+
+    def save(self):
+        """交给后台写线程；同一文件未执行的旧写请求会被替换。"""
+        persist_worker.get_worker().submit(('prefs', self.path), atomic_write_json,
+                                           self.path, self.snapshot())
+
+
+_prefs = None
+
+
+def get_preferences(base_dir, cache=None):
+    """进程内共享的偏好（首次调用时加载并迁移）。"""
+    global _prefs
+    if _prefs is None:
+        _prefs = Preferences(base_dir, cache)
+    return _prefs
@@ -0,0 +1,187 @@
+"""带轮组合反推设计（不依赖 Qt）
+
+给定目标跑带时速范围、电机转速与滚筒直径，从标准带轮尺寸表中搜索并排序
+单级 / 二级传动的带轮组合。
+
+搜索不做暴力嵌套循环：先把目标时速换算成总传动比区间，再在排好序的
+传动比数组上用 `np.searchsorted` 定位区间内的全部候选；二级传动先枚举每一级的
+带轮对（n² 个），第二级按传动比排序后对每个第一级候选做区间查找。
+第一级按带轮直径之和从小到大处理，已有前 K 个结果后，用当前第 K 名的分数
+收窄每个第一级候选可取的传动比区间（分数更差的组合不必展开），直径之和大到
+不可能进入前 K 名时提前结束，因此 200 个尺寸的 200⁴ 种组合也能在秒级内
+得到与穷举相同的排序。
+
+`search_designs` 是生成器，按块返回当前最优的前 K 个结果，界面可以边算边显示。
+"""
+import numpy as np
+
+import drivetrain
+
+
+def standard_diameters():
+    """常用标准带轮节圆直径 (mm)，约 200 个，升序。"""
+    return np.unique(np.concatenate([
+        np.arange(15.0, 60.0, 0.5),
+        np.arange(60.0, 160.0, 1.0),
+        np.arange(160.0, 251.0, 5.0),
+    ]))
+
+
+STANDARD_DIAMETERS = standard_diameters()
+
+# 二级传动每块最多展开的组合数（控制内存）
+CANDIDATE_LIMIT = 1 << 20
+# 区间查找的相对余量：浮点舍入不会漏掉边界上的组合（展开后再按区间精确过滤）
+RATIO_EPS = 1e-12
+SCORE_EPS = 1e-12
+
+# 搜索结果的结构化类型
+DESIGN_DTYPE = np.dtype([
+    ('motor_pulley_d', 'f8'),
+    ('sec1', 'f8'),
+    ('sec2', 'f8'),
+    ('roller_pulley_d', 'f8'),
+    ('gear_ratio', 'f8'),
+    ('belt_kmh', 'f8'),
+    ('speed_error', 'f8'),   # 相对目标时速的偏差 (km/h)
+    ('score', 'f8'),         # 越小越好
+])
+
+
+def ratio_bounds(kmh_min, kmh_max, motor_rpm, roller_diameter):
+    """目标时速区间 -> 总传动比（滚筒转速 / 电机转速）区间；电机转速与滚筒直径须为正。"""
+    if not motor_rpm > 0:
+        raise ValueError('电机转速必须为正')
+    if not roller_diameter > 0:
+        raise ValueError('滚筒直径必须为正')
+    lo = float(drivetrain.roller_rpm_from_belt_kmh(kmh_min, roller_diameter)) / motor_rpm
+    hi = float(drivetrain.roller_rpm_from_belt_kmh(kmh_max, roller_diameter)) / motor_rpm
+    return min(lo, hi), max(lo, hi)
+
+
+def _in_range(d, rng):
+    if rng is None:
+        return np.ones(d.shape, dtype=bool)
+    return (d >= rng[0]) & (d <= rng[1])
+
+
+def _expand(lo, hi, limit):
+    """各行的下标区间 [lo, hi) 展开为 (行号, 下标)；展开数超过 limit 时只取前面的行（至少一行）。
+
+    返回 (处理的行数, 行号数组, 下标数组)。
+    """
+    counts = np.maximum(hi - lo, 0)
+    ends = np.cumsum(counts)
+    n_rows = max(1, int(np.searchsorted(ends, limit, 'right')))
+    counts, ends = counts[:n_rows], ends[:n_rows]
+    rows = np.repeat(np.arange(n_rows), counts)
+    idx = lo[rows] + np.arange(len(rows)) - np.repeat(ends - counts, counts)
+    return n_rows, rows, idx
+
+
+def _pairs(diameters, drive_range, driven_range, stage_ratio):
+    """某一级传动的所有带轮对，按传动比升序返回 (ratio, d_drive, d_driven)。"""
+    d_drive = diameters[_in_range(diameters, drive_range)]
+    d_driven = diameters[_in_range(diameters, driven_range)]
+    a, b = np.meshgrid(d_drive, d_driven, indexing='ij')
+    a = a.ravel()
+    b = b.ravel()
+    q = a / b
+    keep = (q >= stage_ratio[0]) & (q <= stage_ratio[1])
+    a, b, q = a[keep], b[keep], q[keep]
+    order = np.argsort(q, kind='stable')
+    return q[order], a[order], b[order]
+
+
+def _merge_top(best, cand, top_k):
+    if best is not None:
+        cand = np.concatenate([best, cand])
+    if len(cand) > top_k:
+        keep = np.argpartition(cand['score'], top_k - 1)[:top_k]
+        cand = cand[keep]
+    return cand[np.argsort(cand['score'], kind='stable')]
+
+
+def _score(out, target_kmh, size_weight):
+    out['speed_error'] = out['belt_kmh'] - target_kmh
+    size = out['motor_pulley_d'] + out['roller_pulley_d'] + np.nan_to_num(out['sec1']) + np.nan_to_num(out['sec2'])
+    out['score'] = np.abs(out['speed_error']) / target_kmh + size_weight * size
+
+
+def search_designs(kmh_min, kmh_max, motor_rpm, roller_diameter, use_secondary=False,
+                   diameters=None, motor_d_range=None, roller_d_range=None,
+                   stage_ratio=(1 / 8.0, 8.0), top_k=50, size_weight=1e-4,
+                   chunk_size=4096, candidate_limit=CANDIDATE_LIMIT):
+    """搜索满足目标时速的带轮组合，按块产出 (进度 0~1, 当前前 K 个结果)。
+
+    - `diameters`：标准尺寸表，默认 STANDARD_DIAMETERS；
+    - `motor_d_range` / `roller_d_range`：电机带轮、滚筒带轮允许的直径区间 (mm)；
+    - `stage_ratio`：每一级传动比允许的区间，用于剪枝；
+    - `chunk_size` / `candidate_limit`：每块最多处理的第一级候选数与展开的组合数；
+    - 排序分数 = |时速偏差| / 目标时速 + size_weight × 带轮直径之和。
+    """
+    d = np.sort(np.asarray(STANDARD_DIAMETERS if diameters is None else diameters, dtype=float))
+    r_lo, r_hi = ratio_bounds(kmh_min, kmh_max, motor_rpm, roller_diameter)
+    target_kmh = 0.5 * (kmh_min + kmh_max)
+    r_target = 0.5 * (r_lo + r_hi)
+    best = None
+
+    def finish(drive, sec1, sec2, driven, ratio):
+        out = np.empty(len(ratio), dtype=DESIGN_DTYPE)
+        out['motor_pulley_d'] = drive
+        out['sec1'] = sec1
+        out['sec2'] = sec2
+        out['roller_pulley_d'] = driven
+        out['gear_ratio'] = ratio
+        out['belt_kmh'] = drivetrain.belt_kmh_from_roller_rpm(motor_rpm * ratio, roller_diameter)
+        _score(out, target_kmh, size_weight)
+        return out
+
+    if not use_secondary:
+        q, a, b = _pairs(d, motor_d_range, roller_d_range, stage_ratio)
+        lo, hi = np.searchsorted(q, r_lo, 'left'), np.searchsorted(q, r_hi, 'right')
+        sel = slice(lo, hi)
+        if hi > lo:
+            best = _merge_top(None, finish(a[sel], np.nan, np.nan, b[sel], q[sel]), top_k)
+        yield 1.0, best if best is not None else np.empty(0, dtype=DESIGN_DTYPE)
+        return
+
+    # 二级传动：第一级 motor->sec1，第二级 sec2->roller
+    q1, a1, b1 = _pairs(d, motor_d_range, None, stage_ratio)
+    q2, a2, b2 = _pairs(d, None, roller_d_range, stage_ratio)
+    # 剪枝：第一级传动比必须能被某个第二级传动比补足到目标区间
+    if len(q2):
+        keep = (q1 * q2[-1] >= r_lo) & (q1 * q2[0] <= r_hi)
+        q1, a1, b1 = q1[keep], a1[keep], b1[keep]
+    total = len(q1)
+    if total == 0 or len(q2) == 0:
+        yield 1.0, np.empty(0, dtype=DESIGN_DTYPE)
+        return
+    # 第一级按直径之和升序：分数的下界随之增大，超过第 K 名时后面的都不必算
+    size1 = a1 + b1
+    order = np.argsort(size1, kind='stable')
+    q1, a1, b1, size1 = q1[order], a1[order], b1[order], size1[order]
+    min_size2 = float((a2 + b2).min())
+    start = 0
+    while start < total:
+        cutoff = best['score'][-1] if best is not None and len(best) == top_k else np.inf
+        stop = min(start + chunk_size, total)
+        # 时速与传动比成正比，偏差项 = |ratio / r_target − 1|，不能超过 cutoff 减去直径项的下界
+        slack = cutoff - size_weight * (size1[start:stop] + min_size2) + SCORE_EPS
+        if slack[0] < 0:
+            break
+        q = q1[start:stop]
+        lo = np.searchsorted(q2, np.maximum(r_lo, r_target * (1.0 - slack)) / q * (1.0 - RATIO_EPS), 'left')
+        hi = np.searchsorted(q2, np.minimum(r_hi, r_target * (1.0 + slack)) / q * (1.0 + RATIO_EPS), 'right')
+        n_rows, rows, j = _expand(lo, hi, candidate_limit)
+        if len(rows):
+            i = start + rows
+            ratio = q1[i] * q2[j]
+            ok = (ratio >= r_lo) & (ratio <= r_hi)
+            i, j = i[ok], j[ok]
+            if len(i):
+                best = _merge_top(best, finish(a1[i], b1[i], a2[j], b2[j], ratio[ok]), top_k)
+        start += n_rows
+        yield start / total, best if best is not None else np.empty(0, dtype=DESIGN_DTYPE)
+    if start < total:
+        yield 1.0, best
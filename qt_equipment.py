@@ -0,0 +1,189 @@
+"""器材选项卡共用的 Qt 部件：只读数组表格、按插件声明生成的选项卡与按需创建的容器
+
+器材注册表与插件约定见 equipment.py；MainWindow 启动时只导入本模块，
+各器材的模块在选项卡第一次被选中时才由 LazyTab（make_equipment_tab）导入。
+"""
+import numpy as np
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PySide6.QtWidgets import (
+    QFileDialog,
+    QFormLayout,
+    QGroupBox,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QMessageBox,
+    QPushButton,
+    QTableView,
+    QVBoxLayout,
+    QWidget,
+)
+
+import equipment
+
+
+def to_float(s):
+    try:
+        s = s.strip()
+        if s == "":
+            return None
+        return float(s)
+    except Exception:
+        return None
+
+
+class ArrayTableModel(QAbstractTableModel):
+    """只读表格（model/view）：行数与单元格文本由 cell_text(row, key) 提供。"""
+
+    def __init__(self, columns, cell_text, parent=None):
+        super().__init__(parent)
+        self.columns = columns    # [(key, 标题)]
+        self.cell_text = cell_text
+        self.rows = 0
+
+    def reset(self, rows, columns=None):
+        self.beginResetModel()
+        self.rows = rows
+        if columns is not None:
+            self.columns = columns
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self.cell_text(index.row(), self.columns[index.column()][0])
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section][1]
+        return super().headerData(section, orientation, role)
+
+
+class EquipmentTab(QWidget):
+    """由器材插件（见 equipment.py）声明的参数、求解器与表格列生成的选项卡。"""
+
+    def __init__(self, plugin, parent=None):
+        super().__init__(parent)
+        self.plugin = plugin
+        self.rows = None
+        self.formats = {c.key: c.fmt for c in plugin.COLUMNS}
+        self.init_ui()
+        self.solve(quiet=True)
+
+    def init_ui(self):
+        form = QFormLayout()
+        form.setLabelAlignment(Qt.AlignRight)
+        self.edits = {}
+        for param in self.plugin.PARAMS:
+            default = param.default
+            edt = QLineEdit(default if isinstance(default, str) else f'{default:g}')
+            if param.multi:
+                edt.setPlaceholderText('多个值：8, 10, 12 或 起:止:步长')
+            edt.returnPressed.connect(self.solve)
+            form.addRow(param.label, edt)
+            self.edits[param.name] = edt
+        btn_solve = QPushButton('计算')
+        btn_solve.clicked.connect(lambda: self.solve())
+        btn_export = QPushButton('导出 CSV…')
+        btn_export.clicked.connect(self.export_csv)
+        h = QHBoxLayout()
+        h.addWidget(btn_solve)
+        h.addWidget(btn_export)
+        form.addRow(h)
+        param_box = QGroupBox('参数')
+        param_box.setLayout(form)
+
+        self.model = ArrayTableModel([(c.key, c.label) for c in self.plugin.COLUMNS], self.cell_text, self)
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.lbl_notes = QLabel('')
+        self.lbl_notes.setWordWrap(True)
+        self.lbl_notes.setTextInteractionFlags(Qt.TextSelectableByMouse)
+
+        right = QVBoxLayout()
+        right.addWidget(self.view, 1)
+        right.addWidget(self.lbl_notes)
+        layout = QHBoxLayout()
+        layout.addWidget(param_box)
+        layout.addLayout(right, 1)
+        self.setLayout(layout)
+
+    def solve(self, quiet=False):
+        try:
+            values = {p.name: equipment.parse_param(p, self.edits[p.name].text()) for p in self.plugin.PARAMS}
+            rows, notes = self.plugin.solve(values)
+        except ValueError as e:
+            if not quiet:
+                QMessageBox.warning(self, '错误', str(e))
+            return
+        self.rows = rows
+        self.model.reset(len(rows))
+        self.lbl_notes.setText('\n'.join(notes))
+
+    def cell_text(self, row, key):
+        v = float(self.rows[key][row])
+        return format(v, self.formats[key]) if np.isfinite(v) else '-'
+
+    def export_csv(self):
+        if self.rows is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, '导出计算结果', 'result.csv', 'CSV (*.csv)')
+        if not path:
+            return
+        try:
+            equipment.write_csv(path, self.rows.dtype.names, self.rows.tolist())
+            QMessageBox.information(self, '导出', f'已导出到：{path}')
+        except Exception as e:
+            QMessageBox.warning(self, '错误', f'导出失败: {e}')
+
+
+class LazyTab(QWidget):
+    """选项卡的容器：第一次被选中时才调用 factory 创建内容（插件模块也在此时导入）。"""
+
+    def __init__(self, factory, parent=None):
+        super().__init__(parent)
+        self.factory = factory
+        self.widget = None
+        self.setLayout(QVBoxLayout())
+        self.layout().setContentsMargins(0, 0, 0, 0)
+
+    def ensure(self):
+        if self.widget is None:
+            try:
+                self.widget = self.factory()
+            except Exception as e:
+                self.widget = QLabel(f'加载失败: {e}')
+                self.widget.setAlignment(Qt.AlignTop | Qt.AlignLeft)
+            self.layout().addWidget(self.widget)
+        return self.widget
+
+
+def placeholder(title):
+    w = QWidget()
+    l = QVBoxLayout()
+    l.addWidget(QLabel(f'{title} 内容占位'))
+    l.addStretch(1)
+    w.setLayout(l)
+    return w
+
+
+def make_equipment_tab(entry, window):
+    """创建器材选项卡：插件提供 make_tab(window) 时由它创建，否则按声明生成 EquipmentTab；没有模块时为占位。"""
+    if entry.module is None:
+        return placeholder(entry.title)
+    plugin = equipment.load(entry.key)
+    make_tab = getattr(plugin, 'make_tab', None)
+    if make_tab is not None:
+        return make_tab(window)
+    return EquipmentTab(plugin)
@@ -3,14 +3,22 @@
 
 运行: python3 qt_main.py
 
-依赖: PySide6
+依赖: PySide6, numpy
 """
-from math import pi
 import sys
 import json
+import multiprocessing
 import os
+import time
+from collections import Counter
 
-from PySide6.QtCore import Qt
+# 启动计时起点（在导入 Qt 之前）
+_T0 = time.perf_counter()
+
+import numpy as np
+
+from PySide6.QtCore import QObject, Qt, QThread, QTimer, Signal
+from PySide6.QtGui import QColor, QPainter
 from PySide6.QtWidgets import (
     QApplication,
     QCheckBox,
@@ -24,6 +32,7 @@ from PySide6.QtWidgets import (
     QTabWidget,
     QVBoxLayout,
     QWidget,
+    QTableView,
     QTableWidget,
     QTableWidgetItem,
     QGroupBox,
@@ -33,17 +42,32 @@ from PySide6.QtWidgets import (
     QHeaderView,
     QSpinBox,
     QMenu,
+    QDialog,
+    QDoubleSpinBox,
+    QFileDialog,
+    QComboBox,
+    QProgressDialog,
 )
 
-
-def to_float(s):
-    try:
-        s = s.strip()
-        if s == "":
-            return None
-        return float(s)
-    except Exception:
-        return None
+import catalog
+import drivetrain
+import equipment
+import field_registry
+import field_schema
+import live_calc
+import model_query
+import preferences
+import persist_worker
+import sensitivity
+import snapshot_cache
+from catalog import Catalog
+from model_store import open_model_store, store_problem
+from model_table import ExtraColumn, ModelTableModel
+from qt_equipment import LazyTab, make_equipment_tab, to_float
+from search_index import SearchIndex
+
+startup_timer = snapshot_cache.StartupTimer(_T0)
+startup_timer.mark('imports')
 
 
 class TreadmillTab(QWidget):
@@ -51,14 +75,39 @@ class TreadmillTab(QWidget):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        # models persistence
-        self.models = {}
-        self.models_path = os.path.join(os.path.dirname(__file__), 'models.json')
-        self.fields = []
-        self.fields_path = os.path.join(os.path.dirname(__file__), 'fields.json')
+        # models persistence（内存中为带类型的 Catalog）
+        self.models = Catalog()
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        # 型号目录：默认 SQLite（models.db），首次启动自动从 models.json / fields.json 迁移
+        self.store = open_model_store(base_dir)
+        # 启动快照：源文件未变化时直接反序列化上次的目录与字段列表
+        self.cache = snapshot_cache.get_cache(base_dir)
+        # 界面偏好：进程内只加载一次（含旧偏好文件的迁移），读取都走内存
+        self.prefs = preferences.get_preferences(base_dir, self.cache)
+        # 自定义字段由进程内共享的注册表持有，各选项卡通过信号同步
+        self.registry = field_registry.get_registry()
+        self.registry.set_store(self.store)
+        self._snapshot_fields = None
         self.load_models()
         self.load_fields()
+        startup_timer.mark('catalogue_loaded')
         self.init_ui()
+        # 迁移失败或 models.json 无法读取：窗口显示后提示
+        problem = store_problem(self.store)
+        if problem:
+            QTimer.singleShot(0, lambda: QMessageBox.warning(self, '型号目录', problem))
+
+    @property
+    def field_specs(self):
+        return self.registry.specs
+
+    @property
+    def fields(self):
+        return self.registry.names()
+
+    @property
+    def raw_fields(self):
+        return self.registry.raw()
 
     def init_ui(self):
         # 左侧输入表单
@@ -108,6 +157,10 @@ class TreadmillTab(QWidget):
 
         btn_compute = QPushButton('计算（当且仅当有且只有一项为空时）')
         btn_compute.clicked.connect(self.compute_missing)
+        btn_search = QPushButton('反推带轮组合…')
+        btn_search.clicked.connect(self.open_pulley_search)
+        btn_tolerance = QPushButton('公差分析…')
+        btn_tolerance.clicked.connect(self.open_tolerance_analysis)
 
         left_v = QVBoxLayout()
         left_v.addLayout(form)
@@ -120,6 +173,8 @@ class TreadmillTab(QWidget):
         btn_box = QHBoxLayout()
         btn_box.addStretch(1)
         btn_box.addWidget(btn_compute)
+        btn_box.addWidget(btn_search)
+        btn_box.addWidget(btn_tolerance)
         btn_box.addStretch(1)
         left_v.addLayout(btn_box)
 
@@ -128,6 +183,8 @@ class TreadmillTab(QWidget):
         self.lbl_motor_rpm = QLabel('-')
         self.lbl_belt_kmh = QLabel('-')
         self.lbl_gear_ratio = QLabel('-')
+        self.lbl_motor_pulley_d = QLabel('-')
+        self.lbl_roller_pulley_d = QLabel('-')
         self.lbl_sec1 = QLabel('-')
         self.lbl_sec2 = QLabel('-')
         self.lbl_roller_diameter = QLabel('-')
@@ -138,29 +195,95 @@ class TreadmillTab(QWidget):
         res_form.addRow('电机转速 (RPM)', self.lbl_motor_rpm)
         res_form.addRow('跑带时速 (km/h)', self.lbl_belt_kmh)
         res_form.addRow('总传动比 (motor->roller)', self.lbl_gear_ratio)
+        res_form.addRow('电机带轮 (mm)', self.lbl_motor_pulley_d)
         res_form.addRow('二级带轮（电机侧）(mm)', self.lbl_sec1)
         res_form.addRow('二级带轮（滚筒侧）(mm)', self.lbl_sec2)
+        res_form.addRow('滚筒带轮 (mm)', self.lbl_roller_pulley_d)
         res_form.addRow('滚筒直径 (mm)', self.lbl_roller_diameter)
+        # 实时计算的状态提示（代替弹窗）
+        self.lbl_live_status = QLabel('')
+        self.lbl_live_status.setWordWrap(True)
+        res_form.addRow(self.lbl_live_status)
+
+        # 当前设计的灵敏度：各输入每变化一个单位，时速 / 滚筒转速的变化
+        self.sens_table = QTableWidget(len(sensitivity.SENS_INPUTS), len(sensitivity.SENS_OUTPUTS))
+        self.sens_table.setHorizontalHeaderLabels(['∂时速/∂x (km/h)', '∂滚筒转速/∂x (RPM)'])
+        self.sens_table.setVerticalHeaderLabels([sensitivity.INPUT_LABELS[x] for x in sensitivity.SENS_INPUTS])
+        self.sens_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.sens_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.sens_table.setMaximumHeight(200)
+        res_form.addRow('<b>灵敏度</b>', QLabel('(每单位输入)'))
+        res_form.addRow(self.sens_table)
+        self.show_sensitivity({})
+
+        # 输入变化后防抖，再由依赖图只更新受影响的结果
+        self.live = live_calc.LiveCalculator()
+        self.live.add('out.sensitivity', ('solution',), lambda sol: sensitivity.design_sensitivity(sol.values))
+        self._live_timer = QTimer(self)
+        self._live_timer.setSingleShot(True)
+        self._live_timer.setInterval(self.LIVE_DEBOUNCE_MS)
+        self._live_timer.timeout.connect(self.live_update)
+        for edt in self.live_inputs().values():
+            edt.textChanged.connect(self._live_timer.start)
+        self.use_secondary_chk.toggled.connect(self._live_timer.start)
 
         model_h = QHBoxLayout()
         self.model_name_edit = QLineEdit()
         self.model_name_edit.setPlaceholderText('输入产品型号名称')
         self.btn_save_model = QPushButton('保存为产品型号')
         self.btn_save_model.clicked.connect(self.save_model)
+        self.btn_recompute = QPushButton('重新计算全部型号')
+        self.btn_recompute.setToolTip('按各型号保存的输入参数重新推导计算结果（多进程，后台执行）')
+        self.btn_recompute.clicked.connect(self.recompute_all)
         model_h.addWidget(self.model_name_edit)
         model_h.addWidget(self.btn_save_model)
-
-        # model table (像 Excel 的表格视图)
-        self.model_table = QTableWidget()
-        self.model_table.setColumnCount(2 + len(self.fields))
-        headers = ['#', '型号'] + list(self.fields)
-        self.model_table.setHorizontalHeaderLabels(headers)
-        # 允许通过点击表头排序
+        model_h.addWidget(self.btn_recompute)
+
+        # model table (像 Excel 的表格视图)：model/view，只渲染可见行
+        self.table_model = ModelTableModel(self.models, self.field_specs, self)
+        self.model_table = QTableView()
+        self.model_table.setModel(self.table_model)
+        self.model_table.setSelectionBehavior(QTableView.SelectRows)
+        # 允许通过点击表头排序（由模型按缓存的排序键重排行顺序）
         try:
+            self.model_table.horizontalHeader().setSortIndicator(ModelTableModel.NAME_COLUMN, Qt.AscendingOrder)
             self.model_table.setSortingEnabled(True)
         except Exception:
             pass
-        self.model_table.cellClicked.connect(lambda r, c: self.on_table_clicked(r, c))
+        self.model_table.clicked.connect(lambda idx: self.on_table_clicked(idx.row(), idx.column()))
+        # 例外行高按型号名称记录，行顺序变化后重新对应
+        self._row_overrides = {}
+        self._override_rows = set()
+        self._applying_rows = False
+        self.table_model.modelReset.connect(self.reapply_row_overrides)
+        self.table_model.layoutChanged.connect(self.reapply_row_overrides)
+        self.table_model.rowsInserted.connect(self.reapply_row_overrides)
+        self.table_model.rowsRemoved.connect(self.reapply_row_overrides)
+        # 字段增删只插入 / 移除一列
+        self.registry.field_inserted.connect(self.on_field_inserted)
+        self.registry.field_removed.connect(self.on_field_removed)
+        self.registry.fields_reset.connect(self.on_fields_reset)
+        # 全目录重算：后台线程 + 进程池计算，GUI 线程分批写回
+        self._recompute_worker = None
+        self._recompute_progress = None
+        self._recompute_timer = QTimer(self)
+        self._recompute_timer.setInterval(0)
+        self._recompute_timer.timeout.connect(self._recompute_apply_step)
+        # 搜索框：按型号名称与字段值即时过滤（n-gram 索引，空闲时分批建立）
+        self.search_index = None
+        self._indexed_models = None
+        self._index_backlog = []
+        self._index_timer = QTimer(self)
+        self._index_timer.setInterval(0)
+        self._index_timer.timeout.connect(self._index_step)
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText('搜索型号 / 字段值，或输入条件如 belt_kmh >= 16 and use_secondary')
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.apply_search)
+        # 灵敏度列（按需计算）
+        self.sensitivity = None
+        self.chk_sensitivity = QCheckBox('显示灵敏度列')
+        self.chk_sensitivity.setToolTip('在型号表中显示各型号跑带时速对各输入的偏导数，可点击表头排序')
         # 右键菜单：在表格行上右键可删除该型号
         try:
             self.model_table.setContextMenuPolicy(Qt.CustomContextMenu)
@@ -179,6 +302,10 @@ class TreadmillTab(QWidget):
         # 型号管理包装
         self.model_box = QGroupBox('产品型号管理')
         model_box_layout = QVBoxLayout()
+        search_h = QHBoxLayout()
+        search_h.addWidget(self.search_edit, 1)
+        search_h.addWidget(self.chk_sensitivity)
+        model_box_layout.addLayout(search_h)
         model_box_layout.addLayout(model_h)
         model_box_layout.addLayout(field_h)
         model_box_layout.addWidget(self.model_table)
@@ -215,19 +342,20 @@ class TreadmillTab(QWidget):
             self.model_table.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
             self.model_table.setMinimumHeight(300)
             header = self.model_table.horizontalHeader()
+            # 自动列宽只测量前若干行，避免 O(行数) 的测量
+            header.setResizeContentsPrecision(200)
             # 允许用户通过鼠标拖拽调整列宽
             header.setSectionResizeMode(QHeaderView.Interactive)
             # 允许通过垂直表头拖拽调整行高
             try:
                 vh = self.model_table.verticalHeader()
                 vh.setSectionResizeMode(QHeaderView.Interactive)
+                vh.sectionResized.connect(self.on_row_resized)
             except Exception:
                 pass
         except Exception:
             pass
 
-        # UI 偏好文件路径
-        self.prefs_path = os.path.join(os.path.dirname(__file__), 'ui_prefs.json')
         try:
             self.load_ui_prefs()
         except Exception:
@@ -235,24 +363,14 @@ class TreadmillTab(QWidget):
 
         # 刷新已保存模型列表（不创建左侧自定义输入）
         self.refresh_model_list()
+        if self.prefs.get('show_sensitivity'):
+            self.chk_sensitivity.setChecked(True)
+            self.set_sensitivity_columns(True)
+        self.chk_sensitivity.toggled.connect(self.on_sensitivity_toggled)
 
     def format_gear_ratio(self, ratio):
         """格式化传动比为 N:1 或 1:N 形式，保留最多 3 位小数并去除多余零。"""
-        if ratio is None:
-            return '-'
-        try:
-            r = float(ratio)
-        except Exception:
-            return str(ratio)
-        if r == 0:
-            return '0:1'
-        if r >= 1.0:
-            s = f"{r:.3f}".rstrip('0').rstrip('.')
-            return f"{s}:1"
-        else:
-            inv = 1.0 / r
-            s = f"{inv:.3f}".rstrip('0').rstrip('.')
-            return f"1:{s}"
+        return drivetrain.format_gear_ratio(ratio)
 
     def compute_missing(self):
         motor_power = to_float(self.motor_power_edit.text())
@@ -266,175 +384,171 @@ class TreadmillTab(QWidget):
         sec1 = to_float(self.sec1_d_edit.text())
         sec2 = to_float(self.sec2_d_edit.text())
 
-        # helper funcs
-        def compute_roller_rpm_from_belt_kmh(kmh, roller_d_mm):
-            v = kmh / 3.6
-            if roller_d_mm is None or roller_d_mm <= 0:
-                return None
-            return v * 60.0 / (pi * (roller_d_mm / 1000.0))
+        # 与批量计算共用同一引擎（单行）
+        try:
+            res = drivetrain.solve(motor_rpm, motor_pulley_d, roller_pulley_d, roller_diameter, belt_kmh,
+                                   use_secondary=use_secondary, sec1=sec1, sec2=sec2,
+                                   motor_power=drivetrain.as_array(motor_power))[0]
+        except Exception as e:
+            QMessageBox.critical(self, '异常', f'计算时发生异常: {e}')
+            return
 
-        def compute_belt_kmh_from_roller_rpm(roller_rpm, roller_d_mm):
-            if roller_d_mm is None:
-                return None
-            v = (pi * (roller_d_mm / 1000.0) * roller_rpm) / 60.0
-            return v * 3.6
-
-        def gear_ratio_total(motor_pulley, roller_pulley, use_sec, s1, s2):
-            if use_sec:
-                if None in (motor_pulley, s1, s2, roller_pulley):
-                    return None
-                return (motor_pulley / s1) * (s2 / roller_pulley)
+        err = int(res['error'])
+        if err != drivetrain.OK:
+            level, msg = drivetrain.ERROR_MESSAGES[err]
+            if level == 'information':
+                QMessageBox.information(self, '提示', msg)
             else:
-                if None in (motor_pulley, roller_pulley):
-                    return None
-                return (motor_pulley / roller_pulley)
-
-        # Try compute roller_rpm from belt if possible
-        roller_rpm = None
-        if belt_kmh is not None and roller_diameter is not None:
-            roller_rpm = compute_roller_rpm_from_belt_kmh(belt_kmh, roller_diameter)
-
-        # If secondary enabled and exactly one sec missing, try compute it using rpm ratio
-        if use_secondary:
-            sec_missing = None
-            if sec1 is None and sec2 is not None:
-                sec_missing = 'sec1'
-            if sec2 is None and sec1 is not None:
-                sec_missing = 'sec2'
-            if sec_missing is not None and motor_rpm is not None and (roller_rpm is not None or belt_kmh is not None):
-                # ensure roller_rpm is available
-                if roller_rpm is None and belt_kmh is not None and roller_diameter is not None:
-                    roller_rpm = compute_roller_rpm_from_belt_kmh(belt_kmh, roller_diameter)
-                if roller_rpm is not None and motor_rpm != 0:
-                    ratio_total = roller_rpm / motor_rpm
-                    if sec_missing == 'sec1':
-                        # sec1 = motor_pulley * (sec2 / roller_pulley) / ratio_total
-                        if None not in (motor_pulley_d, sec2, roller_pulley_d) and ratio_total != 0:
-                            val = motor_pulley_d * (sec2 / roller_pulley_d) / ratio_total
-                            self.lbl_sec1.setText(f"{val:.3f}")
-                    else:
-                        # sec2 = ratio_total * (sec1 * roller_pulley) / motor_pulley
-                        if None not in (motor_pulley_d, sec1, roller_pulley_d):
-                            val = ratio_total * (sec1 * roller_pulley_d) / motor_pulley_d
-                            self.lbl_sec2.setText(f"{val:.3f}")
-
-        # Count empties among core fields for main calculation
-        core = {
-            'motor_power': motor_power,
-            'motor_rpm': motor_rpm,
-            'motor_pulley_d': motor_pulley_d,
-            'roller_pulley_d': roller_pulley_d,
-            'roller_diameter': roller_diameter,
-            'belt_kmh': belt_kmh,
-        }
-        empty_keys = [k for k, v in core.items() if v is None]
-        if len(empty_keys) == 0:
-            QMessageBox.information(self, '信息', '没有留空项 — 无需计算。')
-            return
-        if len(empty_keys) > 1:
-            QMessageBox.warning(self, '错误', '请只留空一项以便计算。')
+                QMessageBox.warning(self, '错误', msg)
             return
 
-        missing = empty_keys[0]
-
-        try:
-            if missing == 'belt_kmh':
-                if roller_diameter is None:
-                    QMessageBox.warning(self, '错误', '计算跑带时速需要已知滚筒直径。')
-                    return
-                if motor_rpm is not None:
-                    ratio = gear_ratio_total(motor_pulley_d, roller_pulley_d, use_secondary, sec1, sec2)
-                    if ratio is None:
-                        QMessageBox.warning(self, '错误', '需要完整的带轮尺寸以计算。')
-                        return
-                    roller_rpm = motor_rpm * ratio
-                    belt_kmh = compute_belt_kmh_from_roller_rpm(roller_rpm, roller_diameter)
-                    # 只在结果标签显示，不写回输入框（保持原始留空）
-                    self.lbl_roller_rpm.setText(f"{roller_rpm:.3f}")
-                    self.lbl_motor_rpm.setText(f"{motor_rpm:.3f}")
-                    self.lbl_belt_kmh.setText(f"{belt_kmh:.3f}")
-                    self.lbl_gear_ratio.setText(self.format_gear_ratio(ratio))
-                    return
-                QMessageBox.warning(self, '错误', '缺少电机转速或带轮信息，无法计算时速。')
-                return
-
-            if missing == 'motor_rpm':
-                if belt_kmh is None:
-                    QMessageBox.warning(self, '错误', '计算电机转速需要已知跑带时速或滚筒转速。')
-                    return
-                if roller_diameter is None:
-                    QMessageBox.warning(self, '错误', '计算电机转速需要滚筒直径。')
-                    return
-                roller_rpm = compute_roller_rpm_from_belt_kmh(belt_kmh, roller_diameter)
-                ratio = gear_ratio_total(motor_pulley_d, roller_pulley_d, use_secondary, sec1, sec2)
-                if ratio is None or ratio == 0:
-                    QMessageBox.warning(self, '错误', '需要完整的带轮尺寸以计算电机转速。')
-                    return
-                motor_rpm = roller_rpm / ratio
-                # 只显示在结果标签（保持输入框留空）
-                self.lbl_roller_rpm.setText(f"{roller_rpm:.3f}")
-                self.lbl_motor_rpm.setText(f"{motor_rpm:.3f}")
-                self.lbl_belt_kmh.setText(f"{belt_kmh:.3f}")
-                self.lbl_gear_ratio.setText(self.format_gear_ratio(ratio))
-                return
-
-            if missing == 'roller_diameter':
-                if belt_kmh is None and motor_rpm is None:
-                    QMessageBox.warning(self, '错误', '计算滚筒直径需要已知跑带时速或电机转速。')
-                    return
-                if motor_rpm is not None and (motor_pulley_d is None or roller_pulley_d is None):
-                    QMessageBox.warning(self, '错误', '计算滚筒直径需要带轮直径信息。')
-                    return
-                if belt_kmh is not None and motor_rpm is None:
-                    QMessageBox.warning(self, '错误', '无法仅用时速反推滚筒直径，请提供电机转速或带轮比例。')
-                    return
-                ratio = gear_ratio_total(motor_pulley_d, roller_pulley_d, use_secondary, sec1, sec2)
-                if ratio is None or ratio == 0:
-                    QMessageBox.warning(self, '错误', '需要带轮完整信息以计算滚筒直径。')
-                    return
-                roller_rpm = motor_rpm * ratio
-                if belt_kmh is None:
-                    QMessageBox.warning(self, '错误', '计算滚筒直径需要目标跑带时速（km/h）。')
-                    return
-                v = belt_kmh / 3.6
-                D_m = v * 60.0 / (pi * roller_rpm)
-                D_mm = D_m * 1000.0
-                self.lbl_roller_rpm.setText(f"{roller_rpm:.3f}")
-                self.lbl_motor_rpm.setText(f"{motor_rpm:.3f}")
-                self.lbl_belt_kmh.setText(f"{belt_kmh:.3f}")
-                self.lbl_gear_ratio.setText(self.format_gear_ratio(ratio))
-                self.lbl_sec1.setText(self.lbl_sec1.text())
-                self.lbl_sec2.setText(self.lbl_sec2.text())
-                # 显示计算得到的滚筒直径（在结果区显示，不写回输入）
-                self.lbl_roller_diameter.setText(f"{D_mm:.3f}")
-                return
-
-            if missing in ('motor_pulley_d', 'roller_pulley_d'):
-                QMessageBox.information(self, '提示', '电机带轮或滚筒带轮的直径通常由机械结构决定，请手动填写其中一个以便计算。')
-                return
+        # 只在结果标签显示，不写回输入框（保持原始留空）
+        self.lbl_roller_rpm.setText(f"{res['roller_rpm']:.3f}")
+        self.lbl_motor_rpm.setText(f"{res['motor_rpm']:.3f}")
+        self.lbl_belt_kmh.setText(f"{res['belt_kmh']:.3f}")
+        self.lbl_gear_ratio.setText(self.format_gear_ratio(float(res['gear_ratio'])))
+        # 求得的带轮 / 滚筒直径显示在对应结果标签
+        missing = drivetrain.CORE_FIELDS[int(res['missing'])]
+        lbl = {
+            'motor_pulley_d': self.lbl_motor_pulley_d,
+            'sec1': self.lbl_sec1,
+            'sec2': self.lbl_sec2,
+            'roller_pulley_d': self.lbl_roller_pulley_d,
+            'roller_diameter': self.lbl_roller_diameter,
+        }.get(missing)
+        if lbl is not None:
+            lbl.setText(f"{res[missing]:.3f}")
+
+    def open_pulley_search(self):
+        dlg = PulleySearchDialog(self)
+        dlg.exec()
+
+    def open_tolerance_analysis(self):
+        # 名义设计取实时计算的结果（唯一留空项已求出，或参数完整）
+        if self._live_timer.isActive():
+            self.live_update()
+        sol = self.live.values['solution']
+        if not sol.values:
+            QMessageBox.information(self, '提示', '请先填写完整的设计（或只留空一项），再做公差分析。')
+            return
+        dlg = ToleranceDialog(sol.values, self.use_secondary_chk.isChecked(), self)
+        dlg.exec()
+
+    def apply_design(self, design):
+        """把反推得到的一组带轮尺寸写回输入框（时速留空以便重新计算）。"""
+        self.motor_pulley_d_edit.setText(f"{design['motor_pulley_d']:g}")
+        self.roller_pulley_d_edit.setText(f"{design['roller_pulley_d']:g}")
+        use_sec = bool(np.isfinite(design['sec1']))
+        self.use_secondary_chk.setChecked(use_sec)
+        self.sec1_d_edit.setText(f"{design['sec1']:g}" if use_sec else '')
+        self.sec2_d_edit.setText(f"{design['sec2']:g}" if use_sec else '')
+        self.belt_speed_edit.setText('')
 
-            if missing == 'motor_power':
-                QMessageBox.information(self, '提示', '电机功率需基于负载或扭矩估算，目前无法仅用带轮/转速计算。')
-                return
+    # ----------------- model save/load / custom params -----------------
+    # ---------------- 实时计算 ----------------
+    LIVE_DEBOUNCE_MS = 150
+
+    def live_inputs(self):
+        """live_calc.INPUTS（use_secondary 除外）-> 输入框。"""
+        return {
+            'motor_power': self.motor_power_edit,
+            'motor_rpm': self.motor_rpm_edit,
+            'motor_pulley_d': self.motor_pulley_d_edit,
+            'sec1': self.sec1_d_edit,
+            'sec2': self.sec2_d_edit,
+            'roller_pulley_d': self.roller_pulley_d_edit,
+            'roller_diameter': self.roller_diameter_edit,
+            'belt_kmh': self.belt_speed_edit,
+        }
 
-        except Exception as e:
-            QMessageBox.critical(self, '异常', f'计算时发生异常: {e}')
+    def live_update(self, refresh=False):
+        """按当前输入更新结果面板；只改动值有变化的标签（refresh=True 时全部重写）。"""
+        self._live_timer.stop()
+        values = {k: edt.text() for k, edt in self.live_inputs().items()}
+        values['use_secondary'] = self.use_secondary_chk.isChecked()
+        changed = self.live.update(values)
+        if refresh:
+            changed = {k: v for k, v in self.live.values.items() if k.startswith('out.') or k == 'status'}
+        labels = {
+            'out.roller_rpm': self.lbl_roller_rpm,
+            'out.motor_rpm': self.lbl_motor_rpm,
+            'out.belt_kmh': self.lbl_belt_kmh,
+            'out.gear_ratio': self.lbl_gear_ratio,
+            'out.motor_pulley_d': self.lbl_motor_pulley_d,
+            'out.sec1': self.lbl_sec1,
+            'out.sec2': self.lbl_sec2,
+            'out.roller_pulley_d': self.lbl_roller_pulley_d,
+            'out.roller_diameter': self.lbl_roller_diameter,
+        }
+        for name, value in changed.items():
+            if name == 'out.sensitivity':
+                self.show_sensitivity(value)
+            elif name == 'status':
+                level, msg = value
+                self.lbl_live_status.setText(msg)
+                self.lbl_live_status.setStyleSheet('color: #d9534f;' if level == 'warning' else '')
+            elif name == 'out.gear_ratio':
+                self.lbl_gear_ratio.setText(self.format_gear_ratio(value))
+            elif name in labels:
+                labels[name].setText('-' if value is None else f'{value:.3f}')
+
+    def show_sensitivity(self, values):
+        for r, x in enumerate(sensitivity.SENS_INPUTS):
+            for c, o in enumerate(sensitivity.SENS_OUTPUTS):
+                v = values.get((o, x))
+                item = QTableWidgetItem('-' if v is None else f'{v:.4g}')
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.sens_table.setItem(r, c, item)
+
+    # ---------------- 目录灵敏度列 ----------------
+    def sensitivity_columns(self):
+        cols = []
+        for x in sensitivity.SENS_INPUTS:
+            field = sensitivity.column('belt_kmh', x)
+            cols.append(ExtraColumn(f'sens:{field}', f'∂时速/∂{sensitivity.INPUT_LABELS[x]}',
+                                    lambda n, f=field: self.sensitivity.value(n, f)))
+        cols.append(ExtraColumn('sens:dominant', '时速主导尺寸',
+                                lambda n: sensitivity.INPUT_LABELS.get(self.sensitivity.dominant(n)),
+                                numeric=False))
+        return cols
+
+    def on_sensitivity_toggled(self, checked):
+        self.prefs.set('show_sensitivity', bool(checked))
+        self.set_sensitivity_columns(checked)
+
+    def set_sensitivity_columns(self, show):
+        """在型号表的自定义字段之后显示 / 隐藏灵敏度列（整目录批量计算一次，之后按型号增量更新）。"""
+        if show:
+            if self.sensitivity is None:
+                self.sensitivity = sensitivity.CatalogSensitivity(self.models)
+            self.table_model.set_extra_columns(self.sensitivity_columns())
+        else:
+            self.table_model.set_extra_columns([])
+            self.sensitivity = None
 
-    # ----------------- model save/load / custom params -----------------
     def save_model(self):
+        # 还在防抖等待中的输入先算完，保存的结果与输入一致
+        if self._live_timer.isActive():
+            self.live_update()
         name = self.model_name_edit.text().strip()
         if not name:
             QMessageBox.warning(self, '错误', '请输入产品型号名称')
             return
-        extras = self.models.get(name, {}).get('extras', {})
+        existing = self.models.export(name) if name in self.models else {}
+        extras = existing.get('extras', {})
         # collect field values (if left-side custom edits exist — otherwise preserve existing)
         fields_values = {}
         cf = getattr(self, 'custom_field_edits', {})
         if cf:
-            for f, edt in cf.items():
-                fields_values[f] = edt.text().strip()
+            # 按字段类型校验并规范化（数值、枚举、是/否）
+            try:
+                fields_values = field_schema.validate_values(
+                    self.field_specs, {f: edt.text() for f, edt in cf.items()})
+            except field_schema.FieldSchemaError as e:
+                QMessageBox.warning(self, '字段值错误', str(e))
+                return
         else:
-            fields_values = self.models.get(name, {}).get('fields', {})
+            fields_values = existing.get('fields', {})
         data = {
             'motor_power': self.motor_power_edit.text().strip(),
             'motor_rpm': self.motor_rpm_edit.text().strip(),
@@ -457,9 +571,14 @@ class TreadmillTab(QWidget):
             'extras': extras,
             'fields': fields_values,
         }
-        self.models[name] = data
-        self.persist_models()
-        self.refresh_model_list()
+        # 文本只在这里解析一次，内存中保存为带类型的记录
+        self.models.put_dict(name, data)
+        # 单条记录写入（后台线程）+ 只刷新这一行
+        persist_worker.get_worker().submit(('model', name), self.store.put, name, self.models.export(name))
+        self.maybe_compact_store()
+        if self.sensitivity is not None:
+            self.sensitivity.update(name)
+        self.table_model.upsert(name, self.update_search_index(name))
         QMessageBox.information(self, '保存', f'已保存型号：{name}')
 
     def load_model_from_item(self, item):
@@ -469,124 +588,312 @@ class TreadmillTab(QWidget):
 
     def on_table_clicked(self, row, col):
         # load model by row
-        it = self.model_table.item(row, 1)
-        if it:
-            name = it.text()
+        name = self.table_model.name_at(row)
+        if name:
             self.load_model(name)
 
     def load_model(self, name):
-        data = self.models.get(name)
-        if not data:
+        rec = self.models.get(name)
+        if rec is None:
             return
+        num = catalog.format_number
         self.model_name_edit.setText(name)
-        self.motor_power_edit.setText(data.get('motor_power', ''))
-        self.motor_rpm_edit.setText(data.get('motor_rpm', ''))
-        self.motor_pulley_d_edit.setText(data.get('motor_pulley_d', ''))
-        self.use_secondary_chk.setChecked(bool(data.get('use_secondary', False)))
-        self.sec1_d_edit.setText(data.get('sec1', ''))
-        self.sec2_d_edit.setText(data.get('sec2', ''))
-        self.roller_pulley_d_edit.setText(data.get('roller_pulley_d', ''))
-        self.roller_diameter_edit.setText(data.get('roller_diameter', ''))
-        self.belt_speed_edit.setText(data.get('belt_kmh', ''))
-        comp = data.get('computed', {})
-        self.lbl_roller_rpm.setText(comp.get('roller_rpm', '-'))
-        self.lbl_motor_rpm.setText(comp.get('motor_rpm', '-'))
-        self.lbl_belt_kmh.setText(comp.get('belt_kmh', '-'))
-        # 如果存储的是数字字符串或数值，则格式化为 N:1 风格，否则原样显示
-        gr = comp.get('gear_ratio', '-')
-        gr_float = to_float(str(gr))
-        if gr_float is not None:
-            self.lbl_gear_ratio.setText(self.format_gear_ratio(gr_float))
-        else:
-            self.lbl_gear_ratio.setText(str(gr))
-        self.lbl_sec1.setText(comp.get('sec1', '-'))
-        self.lbl_sec2.setText(comp.get('sec2', '-'))
+        self.motor_power_edit.setText(num(rec.motor_power))
+        self.motor_rpm_edit.setText(num(rec.motor_rpm))
+        self.motor_pulley_d_edit.setText(num(rec.motor_pulley_d))
+        self.use_secondary_chk.setChecked(rec.use_secondary)
+        self.sec1_d_edit.setText(num(rec.sec1))
+        self.sec2_d_edit.setText(num(rec.sec2))
+        self.roller_pulley_d_edit.setText(num(rec.roller_pulley_d))
+        self.roller_diameter_edit.setText(num(rec.roller_diameter))
+        self.belt_speed_edit.setText(num(rec.belt_kmh))
+        # 结果面板按载入的输入立即重算（保存的 computed 块可能已过期）
+        self.live_update(refresh=True)
         # extras previously shown in details; now omitted (table suffices)
-        # load fields values into custom_field_edits
-        fields_vals = data.get('fields', {})
         # if left-side edits exist, populate them; otherwise ignore (fields are displayed in table)
         for f, edt in getattr(self, 'custom_field_edits', {}).items():
-            edt.setText(fields_vals.get(f, ''))
+            edt.setText(rec.field(self.models.schema, f))
 
     # inline parameter editing removed — 使用设置页与表格管理字段和值
 
     def persist_models(self):
+        # 整体重写目录（批量操作时使用），在后台写线程执行
+        persist_worker.get_worker().submit(('models',), self.store.save_all, self.models.copy())
+
+    def maybe_compact_store(self):
+        # JSON 后端的日志过大时在后台合并；在 GUI 线程取目录快照，避免与编辑并发
         try:
-            with open(self.models_path, 'w', encoding='utf-8') as f:
-                json.dump(self.models, f, ensure_ascii=False, indent=2)
-        except Exception:
-            pass
+            self.store.maybe_compact(self.models)
+        except Exception as e:
+            QMessageBox.warning(self, '保存失败', f'合并型号日志失败: {e}')
+
+    # ---------------- 全目录重算 computed 块 ----------------
+    RECOMPUTE_APPLY_BATCH = 2000
+
+    def recompute_all(self):
+        if self._recompute_worker is not None or self._recompute_timer.isActive():
+            return
+        if not len(self.models):
+            QMessageBox.information(self, '重新计算', '目录中没有型号。')
+            return
+        dlg = QProgressDialog('正在重新计算全部型号…', '取消', 0, len(self.models), self)
+        dlg.setWindowTitle('重新计算')
+        dlg.setMinimumDuration(300)
+        dlg.setAutoClose(False)
+        dlg.setAutoReset(False)
+        dlg.canceled.connect(self.cancel_recompute)
+        self._recompute_progress = dlg
+        self.btn_recompute.setEnabled(False)
+        # 记录只会被整体替换，浅拷贝即可交给后台线程读取
+        worker = RecomputeWorker(self.models.copy(), self)
+        worker.progress.connect(lambda done, total: dlg.setValue(done))
+        worker.finished_result.connect(self.on_recompute_finished)
+        worker.failed.connect(self.on_recompute_failed)
+        self._recompute_worker = worker
+        worker.start()
+
+    def cancel_recompute(self):
+        worker = self._recompute_worker
+        if worker is not None:
+            worker.cancel()
+            worker.wait()
+        if self._recompute_timer.isActive():
+            # 写回中途取消（或关闭窗口）：已改到内存中的型号照样保存，内存与型号目录保持一致
+            self._recompute_timer.stop()
+            self._commit_recompute(self._recompute_updated)
+            self._recompute_job = self._recompute_result = None
+        self._end_recompute()
+
+    def _end_recompute(self):
+        self._recompute_worker = None
+        if self._recompute_progress is not None:
+            self._recompute_progress.canceled.disconnect(self.cancel_recompute)
+            self._recompute_progress.close()
+            self._recompute_progress = None
+        self.btn_recompute.setEnabled(True)
+
+    def on_recompute_failed(self, msg):
+        self._end_recompute()
+        QMessageBox.critical(self, '异常', f'重新计算时发生异常: {msg}')
+
+    def on_recompute_finished(self, job, result):
+        if self._recompute_worker is None:
+            # 已取消
+            return
+        self._recompute_worker = None
+        self._recompute_job = job
+        self._recompute_result = result
+        self._recompute_rows = result.changed_rows()
+        self._recompute_pos = 0
+        self._recompute_updated = []
+        if self._recompute_progress is not None:
+            self._recompute_progress.setLabelText('正在写回计算结果…')
+            self._recompute_progress.setRange(0, max(1, len(self._recompute_rows)))
+            self._recompute_progress.setValue(0)
+        self._recompute_timer.start()
+
+    def _recompute_apply_step(self):
+        # 每次事件循环空闲时写回一批，避免界面卡顿
+        rows = self._recompute_rows[self._recompute_pos:self._recompute_pos + self.RECOMPUTE_APPLY_BATCH]
+        self._recompute_updated += self._recompute_job.apply(self.models, self._recompute_result, rows)
+        self._recompute_pos += len(rows)
+        if self._recompute_progress is not None:
+            self._recompute_progress.setValue(self._recompute_pos)
+        if self._recompute_pos < len(self._recompute_rows):
+            return
+        self._recompute_timer.stop()
+        updated = self._recompute_updated
+        self._commit_recompute(updated)
+        result = self._recompute_result
+        self._recompute_job = self._recompute_result = None
+        self._end_recompute()
+        QMessageBox.information(self, '重新计算', self.recompute_report(result, updated))
+
+    def _commit_recompute(self, updated):
+        """把已写回内存的型号交给写线程保存。"""
+        if not updated:
+            return
+        # 一次批量写入（一次事务 / 一次 fsync）；导出在写线程中进行
+        self._recompute_seq = getattr(self, '_recompute_seq', 0) + 1
+        snapshot = self.models.copy()
+        persist_worker.get_worker().submit(
+            ('recompute', self._recompute_seq), self.store.put_many,
+            ((name, snapshot.export(name)) for name in updated))
+        self.maybe_compact_store()
+        if model_query.looks_structured(self.search_edit.text()):
+            # 条件中可能引用了计算结果
+            self.apply_search()
+
+    def recompute_report(self, result, updated, limit=20):
+        import recompute
+        counts = result.counts()
+        lines = [f'共 {len(result.names)} 个型号：' + '，'.join(
+            f'{recompute.STATUS_LABELS[s]} {counts[s]}' for s in recompute.STATUS_LABELS) + '。']
+        lines.append(f'计算结果有变化并已更新：{len(updated)} 个。')
+        skipped = int(result.changed.sum()) - len(updated)
+        if skipped:
+            lines.append(f'计算期间被修改或删除而未更新：{skipped} 个。')
+        bad = np.flatnonzero(result.status == recompute.INCONSISTENT)
+        if len(bad):
+            lines.append('')
+            lines.append('参数不一致（没有留空项，但跑带时速与其它参数不符）：')
+            for row in bad[:limit]:
+                lines.append(f'  {result.names[row]}（偏差 {result.residual[row] * 100:+.2f}%）')
+            if len(bad) > limit:
+                lines.append(f'  … 另有 {len(bad) - limit} 个')
+        return '\n'.join(lines)
 
     def persist_fields(self):
+        self.registry.persist()
+
+    def load_models(self):
         try:
-            with open(self.fields_path, 'w', encoding='utf-8') as f:
-                json.dump(self.fields, f, ensure_ascii=False, indent=2)
+            snap = None
+            if self.store.cache_safe():
+                snap = self.cache.get('catalogue', self.store.cache_sources())
+            if snap is not None:
+                self.models = snap['models']
+                self._snapshot_fields = snap['fields']
+            else:
+                self.models = Catalog.from_dicts(self.store.load())
         except Exception:
-            pass
+            self.models = Catalog()
 
-    def load_models(self):
+    def save_startup_cache(self):
+        # 在目录关闭（WAL 已合并）之后调用，记录当前文件指纹
         try:
-            if os.path.exists(self.models_path):
-                with open(self.models_path, 'r', encoding='utf-8') as f:
-                    self.models = json.load(f)
+            self.cache.put('catalogue', self.store.cache_sources(),
+                           {'models': self.models, 'fields': self.raw_fields})
+            self.cache.load_json(self.prefs.path, {})
+            self.cache.save()
         except Exception:
-            self.models = {}
+            pass
+
+    def close_store(self):
+        # 先写完后台队列中的请求，再关闭目录
+        persist_worker.get_worker().flush()
+        try:
+            self.store.close(self.models)
+        except Exception as e:
+            QMessageBox.warning(self, '保存失败', f'关闭型号目录失败: {e}')
 
     def load_fields(self):
         try:
-            if os.path.exists(self.fields_path):
-                with open(self.fields_path, 'r', encoding='utf-8') as f:
-                    # preserve legacy simple-list format
-                    raw = json.load(f)
-                    if isinstance(raw, list) and raw and isinstance(raw[0], dict):
-                        # new format list of dicts
-                        self.fields = [it.get('name') for it in raw]
-                    else:
-                        self.fields = raw
+            if self._snapshot_fields is not None:
+                raw, self._snapshot_fields = self._snapshot_fields, None
+            else:
+                # 字段列表可能刚由设置页提交到后台写线程，先等它写完
+                persist_worker.get_worker().flush()
+                raw = self.store.load_fields()
+            # 字段名字符串（旧格式）与带类型的字典都可以
+            self.registry.load(raw)
         except Exception:
-            self.fields = []
+            self.registry.load([])
 
     def refresh_model_list(self):
         # refresh table view
         self.refresh_table()
 
     def refresh_table(self):
-        names = sorted(self.models.keys())
-        cols = ['#', '型号'] + list(self.fields)
-        self.model_table.clear()
-        self.model_table.setColumnCount(len(cols))
-        self.model_table.setHorizontalHeaderLabels(cols)
-        self.model_table.setRowCount(len(names))
-        for r, name in enumerate(names):
-            self.model_table.setItem(r, 0, QTableWidgetItem(str(r+1)))
-            self.model_table.setItem(r, 1, QTableWidgetItem(name))
-            data = self.models.get(name, {})
-            fvals = data.get('fields', {})
-            for c, fld in enumerate(self.fields, start=2):
-                self.model_table.setItem(r, c, QTableWidgetItem(str(fvals.get(fld, ''))))
-        # resize columns to contents
+        if self.sensitivity is not None:
+            self.sensitivity.rebuild(self.models)
+        self.table_model.reset(self.models, self.field_specs)
+        self.schedule_search_index()
+        if self.search_edit.text().strip():
+            self.apply_search()
+        # resize columns to contents（只采样部分行，避免大表逐行测量）
         try:
             self.model_table.resizeColumnsToContents()
         except Exception:
             pass
 
+    SEARCH_INDEX_CHUNK = 2000
+
+    def schedule_search_index(self):
+        # 目录对象被整体替换后重建；在事件循环空闲时分批索引，不阻塞界面
+        if self.search_index is not None and self._indexed_models is self.models:
+            return
+        self.search_index = SearchIndex()
+        self._indexed_models = self.models
+        self._index_backlog = list(self.models)
+        self._index_timer.start()
+
+    def _index_step(self, limit=SEARCH_INDEX_CHUNK):
+        backlog = self._index_backlog
+        chunk = backlog[-limit:] if limit else backlog[:]
+        del backlog[len(backlog) - len(chunk):]
+        for name in chunk:
+            # 排队期间被删除的型号跳过；被修改的型号已在保存时更新过，重复更新无副作用
+            if name in self.models:
+                self.search_index.update(name, self.models.field_values(name))
+        if not backlog:
+            self._index_timer.stop()
+
+    def ensure_search_index(self):
+        self.schedule_search_index()
+        if self._index_backlog:
+            # 索引尚未建完就开始搜索：一次性补完
+            self._index_step(limit=None)
+        return self.search_index
+
+    def apply_search(self, text=None):
+        text = self.search_edit.text() if text is None else text
+        self.show_query_error(None)
+        if not text.strip():
+            self.table_model.set_filter(None)
+            return
+        if model_query.looks_structured(text):
+            # 结构化条件：编译（带缓存）后在列式数据上求值
+            try:
+                names = model_query.compile_query(text).filter(self.models)
+            except model_query.QuerySyntaxError as e:
+                # 输入中途的不完整条件很常见：只提示，保留当前过滤结果
+                self.show_query_error(str(e))
+                return
+            self.table_model.set_filter(names)
+            return
+        self.table_model.set_filter(self.ensure_search_index().query(text))
+
+    def show_query_error(self, message):
+        self.search_edit.setToolTip(message or '')
+        self.search_edit.setStyleSheet('QLineEdit { border: 1px solid #d9534f; }' if message else '')
+
+    def update_search_index(self, name):
+        """保存型号后增量更新索引；返回它是否匹配当前搜索（未在搜索时为 None）。"""
+        if self.search_index is None or self._indexed_models is not self.models:
+            return None
+        self.search_index.update(name, self.models.field_values(name))
+        text = self.search_edit.text()
+        if not text.strip():
+            return None
+        if model_query.looks_structured(text):
+            try:
+                return model_query.compile_query(text).matches(self.models, name)
+            except model_query.QuerySyntaxError:
+                return None
+        return self.search_index.matches(name, text)
+
     def delete_selected_model(self):
-        sel = self.model_table.currentRow()
+        sel = self.model_table.currentIndex().row()
         if sel < 0:
             QMessageBox.information(self, '提示', '请先选择一行要删除的型号')
             return
-        it = self.model_table.item(sel, 1)
-        if not it:
+        name = self.table_model.name_at(sel)
+        if not name:
             QMessageBox.warning(self, '错误', '无法识别选中型号')
             return
-        name = it.text()
         ok = QMessageBox.question(self, '确认', f'确认删除型号：{name} ?')
         if ok != QMessageBox.Yes:
             return
         if name in self.models:
             del self.models[name]
-            self.persist_models()
-            self.refresh_table()
+            persist_worker.get_worker().submit(('model', name), self.store.delete, name)
+            self.maybe_compact_store()
+            if self.search_index is not None:
+                self.search_index.remove(name)
+            if self.sensitivity is not None:
+                self.sensitivity.remove(name)
+            self.table_model.remove(name)
             QMessageBox.information(self, '已删除', f'已删除型号：{name}')
 
     # expose a helper for MainWindow to reparent the model_box
@@ -619,9 +926,9 @@ class TreadmillTab(QWidget):
         col = idx.column()
         if action == act_copy:
             try:
-                cols = self.model_table.columnCount()
-                headers = [self.model_table.horizontalHeaderItem(c).text() if self.model_table.horizontalHeaderItem(c) else '' for c in range(cols)]
-                vals = [self.model_table.item(row, c).text() if self.model_table.item(row, c) else '' for c in range(cols)]
+                cols = self.table_model.columnCount()
+                headers = self.table_model.headers()
+                vals = [self.table_model.cell_text(row, c) for c in range(cols)]
                 parts = [f"{h}:{v}" if h else v for h, v in zip(headers, vals)]
                 text = '\t'.join(parts)
                 QApplication.clipboard().setText(text)
@@ -630,12 +937,12 @@ class TreadmillTab(QWidget):
                 pass
         elif action == act_sort_asc:
             try:
-                self.model_table.sortItems(col, Qt.AscendingOrder)
+                self.model_table.sortByColumn(col, Qt.AscendingOrder)
             except Exception:
                 pass
         elif action == act_sort_desc:
             try:
-                self.model_table.sortItems(col, Qt.DescendingOrder)
+                self.model_table.sortByColumn(col, Qt.DescendingOrder)
             except Exception:
                 pass
         elif action == act_delete:
@@ -645,28 +952,39 @@ class TreadmillTab(QWidget):
 
     # ---------------- UI prefs: 保存/加载列宽与行高与锁定 ----------------
     def apply_ui_prefs(self, prefs: dict):
+        """应用型号表的布局方案（preferences.table_profile）。
+
+        行高 = 统一的默认行高 + 少量按型号名称记录的例外，列宽按列名记录；
+        默认行高通过表头的 defaultSectionSize 一次设置，不逐行调用 setRowHeight。
+        """
         if not prefs:
             return
-        # apply column widths
-        cols = self.model_table.columnCount()
-        cw = prefs.get('col_widths', [])
-        for i in range(min(cols, len(cw))):
-            try:
-                self.model_table.setColumnWidth(i, int(cw[i]))
-            except Exception:
-                pass
-        # apply row heights
-        rows = self.model_table.rowCount()
-        rh = prefs.get('row_heights', [])
-        for r in range(min(rows, len(rh))):
+        vh = self.model_table.verticalHeader()
+        header = self.model_table.horizontalHeader()
+        default = prefs.get('default_row_height') or self._legacy_default_row_height(prefs)
+        if default:
+            self._applying_rows = True
             try:
-                self.model_table.setRowHeight(r, int(rh[r]))
+                vh.setDefaultSectionSize(int(default))
             except Exception:
                 pass
+            finally:
+                self._applying_rows = False
+        # apply column widths（按列名；旧格式为按列号的列表）
+        widths = prefs.get('column_widths')
+        if widths is None:
+            widths = dict(zip(self.table_model.column_names(), prefs.get('col_widths', [])))
+        for i, name in enumerate(self.table_model.column_names()):
+            if name in widths:
+                try:
+                    self.model_table.setColumnWidth(i, int(widths[name]))
+                except Exception:
+                    pass
+        # apply row heights：只有例外行需要单独设置
+        self._row_overrides = {n: int(h) for n, h in (prefs.get('row_overrides') or {}).items()}
+        self.reapply_row_overrides()
         # apply locked state
         locked = prefs.get('locked', False)
-        header = self.model_table.horizontalHeader()
-        vh = self.model_table.verticalHeader()
         if locked:
             try:
                 header.setSectionResizeMode(QHeaderView.Fixed)
@@ -684,13 +1002,63 @@ class TreadmillTab(QWidget):
             except Exception:
                 pass
 
+    @staticmethod
+    def _legacy_default_row_height(prefs):
+        # 旧格式按行号保存每一行的高度：取出现最多的值作为默认行高
+        heights = prefs.get('row_heights') or []
+        if not heights:
+            return None
+        return Counter(int(h) for h in heights).most_common(1)[0][0]
+
+    def table_layout_profile(self):
+        """当前型号表的布局方案（供设置页保存）。"""
+        names = self.table_model.column_names()
+        return {
+            'column_widths': {n: self.model_table.columnWidth(i) for i, n in enumerate(names)},
+            'default_row_height': self.model_table.verticalHeader().defaultSectionSize(),
+            'row_overrides': dict(self._row_overrides),
+        }
+
+    def on_row_resized(self, row, old, new):
+        # 用户拖动行高：按型号名称记录例外（程序设置行高时忽略）
+        if self._applying_rows:
+            return
+        name = self.table_model.name_at(row)
+        if name is None:
+            return
+        if new == self.model_table.verticalHeader().defaultSectionSize():
+            self._row_overrides.pop(name, None)
+            self._override_rows.discard(row)
+        else:
+            self._row_overrides[name] = new
+            self._override_rows.add(row)
+
+    def reapply_row_overrides(self, *args):
+        """行顺序变化（排序、过滤、重置）后，把例外行高重新对应到当前行号。"""
+        if not self._row_overrides and not self._override_rows:
+            return
+        vh = self.model_table.verticalHeader()
+        default = vh.defaultSectionSize()
+        self._applying_rows = True
+        try:
+            count = self.table_model.rowCount()
+            for row in self._override_rows:
+                if row < count:
+                    self.model_table.setRowHeight(row, default)
+            rows = set()
+            for name, height in self._row_overrides.items():
+                row = self.table_model.row_of(name)
+                if row >= 0:
+                    self.model_table.setRowHeight(row, height)
+                    rows.add(row)
+            self._override_rows = rows
+        finally:
+            self._applying_rows = False
+
     def load_ui_prefs(self):
         try:
-            if os.path.exists(self.prefs_path):
-                with open(self.prefs_path, 'r', encoding='utf-8') as f:
-                    prefs = json.load(f)
-                    # apply saved field row height to settings tree later handled by SettingsTab
-                    self.apply_ui_prefs(prefs)
+            # 与设置页共用同一份偏好（内存中）
+            self.apply_ui_prefs(self.prefs.table_profile(preferences.TREADMILL_TABLE))
         except Exception:
             pass
 
@@ -714,11 +1082,11 @@ class TreadmillTab(QWidget):
             pass
         # create new edits
         new_edits = {}
-        for fld in self.fields:
+        for spec in self.field_specs:
             edt = QLineEdit()
-            edt.setPlaceholderText(fld)
-            self.custom_fields_form.addRow(fld, edt)
-            new_edits[fld] = edt
+            edt.setPlaceholderText(spec.describe())
+            self.custom_fields_form.addRow(spec.label(), edt)
+            new_edits[spec.name] = edt
         self.custom_field_edits = new_edits
 
     def add_field(self):
@@ -729,24 +1097,415 @@ class TreadmillTab(QWidget):
         if name in self.fields:
             QMessageBox.information(self, '信息', '字段已存在')
             return
-        self.fields.append(name)
-        self.persist_fields()
-        self.create_custom_field_inputs()
-        self.refresh_table()
+        try:
+            self.registry.add(field_schema.FieldSpec(name))
+        except field_schema.FieldSchemaError as e:
+            QMessageBox.warning(self, '字段定义错误', str(e))
+            return
         self.new_field_edit.clear()
 
+    # ---------------- 字段注册表通知 ----------------
+    def on_field_inserted(self, pos, spec):
+        self.table_model.insert_field(pos, spec)
+        if hasattr(self, 'custom_field_edits'):
+            self.create_custom_field_inputs()
+
+    def on_field_removed(self, pos, spec):
+        sorted_col = self.model_table.horizontalHeader().sortIndicatorSection()
+        self.table_model.remove_field(pos)
+        if sorted_col == pos + 2:
+            # 正按被删除的列排序：改回按型号排序
+            self.model_table.horizontalHeader().setSortIndicator(ModelTableModel.NAME_COLUMN, Qt.AscendingOrder)
+        if hasattr(self, 'custom_field_edits'):
+            self.create_custom_field_inputs()
+
+    def on_fields_reset(self):
+        self.table_model.reset(fields=self.field_specs)
+        if hasattr(self, 'custom_field_edits'):
+            self.create_custom_field_inputs()
+
+
+class RecomputeWorker(QThread):
+    """在后台线程取出目录快照的输入参数，交给 recompute 的进程池分块重算。"""
+
+    progress = Signal(int, int)
+    finished_result = Signal(object, object)
+    failed = Signal(str)
+
+    def __init__(self, snapshot, parent=None):
+        super().__init__(parent)
+        self.snapshot = snapshot
+        self._cancel = False
+
+    def cancel(self):
+        self._cancel = True
+
+    def run(self):
+        # 计算模块在第一次用到时才导入，不计入启动耗时
+        import recompute
+        try:
+            job = recompute.RecomputeJob(self.snapshot)
+            result = job.run(progress=self.progress.emit, cancelled=lambda: self._cancel)
+            if result is not None and not self._cancel:
+                self.finished_result.emit(job, result)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class PulleySearchWorker(QThread):
+    """在后台线程运行 pulley_search.search_designs，逐块发回当前最优结果。"""
+
+    progress = Signal(float, object)
+    failed = Signal(str)
+
+    def __init__(self, kwargs, parent=None):
+        super().__init__(parent)
+        self.kwargs = kwargs
+        self._cancel = False
+
+    def cancel(self):
+        self._cancel = True
+
+    def run(self):
+        import pulley_search
+        try:
+            for frac, best in pulley_search.search_designs(**self.kwargs):
+                if self._cancel:
+                    return
+                self.progress.emit(frac, best.copy())
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class PulleySearchDialog(QDialog):
+    """反推设计：给定目标时速范围，从标准带轮尺寸中搜索并排序组合。"""
+
+    COLUMNS = [
+        ('motor_pulley_d', '电机带轮'),
+        ('sec1', '二级(电机侧)'),
+        ('sec2', '二级(滚筒侧)'),
+        ('roller_pulley_d', '滚筒带轮'),
+        ('gear_ratio', '总传动比'),
+        ('belt_kmh', '时速 (km/h)'),
+        ('speed_error', '偏差 (km/h)'),
+    ]
+
+    def __init__(self, treadmill, parent=None):
+        super().__init__(parent or treadmill)
+        self.treadmill = treadmill
+        self.worker = None
+        self.results = None
+        self.setWindowTitle('反推带轮组合')
+        self.resize(720, 480)
+
+        def spin(lo, hi, val, decimals=2):
+            sp = QDoubleSpinBox()
+            sp.setRange(lo, hi)
+            sp.setDecimals(decimals)
+            sp.setValue(val)
+            return sp
+
+        kmh = to_float(treadmill.belt_speed_edit.text()) or 16.0
+        self.kmh_min = spin(0.1, 100.0, kmh * 0.99)
+        self.kmh_max = spin(0.1, 100.0, kmh * 1.01)
+        self.motor_rpm = spin(1.0, 100000.0, to_float(treadmill.motor_rpm_edit.text()) or 3000.0, 0)
+        self.roller_d = spin(1.0, 1000.0, to_float(treadmill.roller_diameter_edit.text()) or 50.0, 1)
+        self.chk_secondary = QCheckBox('二级传动')
+        self.chk_secondary.setChecked(treadmill.use_secondary_chk.isChecked())
+        self.top_k = QSpinBox()
+        self.top_k.setRange(1, 1000)
+        self.top_k.setValue(50)
+
+        form = QFormLayout()
+        form.addRow('目标时速下限 (km/h)', self.kmh_min)
+        form.addRow('目标时速上限 (km/h)', self.kmh_max)
+        form.addRow('电机转速 (RPM)', self.motor_rpm)
+        form.addRow('滚筒直径 (mm)', self.roller_d)
+        form.addRow(self.chk_secondary)
+        form.addRow('保留前 N 个', self.top_k)
+
+        self.btn_run = QPushButton('搜索')
+        self.btn_run.clicked.connect(self.start_search)
+        self.status = QLabel('')
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels([t for _, t in self.COLUMNS])
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.cellDoubleClicked.connect(self.on_apply)
+
+        btn_apply = QPushButton('应用所选组合')
+        btn_apply.clicked.connect(lambda: self.on_apply(self.table.currentRow(), 0))
+        h = QHBoxLayout()
+        h.addWidget(self.btn_run)
+        h.addWidget(self.status, 1)
+        h.addWidget(btn_apply)
+
+        layout = QVBoxLayout()
+        layout.addLayout(form)
+        layout.addLayout(h)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+
+    def start_search(self):
+        self.stop_search()
+        kwargs = dict(
+            kmh_min=self.kmh_min.value(),
+            kmh_max=self.kmh_max.value(),
+            motor_rpm=self.motor_rpm.value(),
+            roller_diameter=self.roller_d.value(),
+            use_secondary=self.chk_secondary.isChecked(),
+            top_k=self.top_k.value(),
+        )
+        self.worker = PulleySearchWorker(kwargs, self)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.failed.connect(lambda msg: QMessageBox.critical(self, '异常', f'搜索时发生异常: {msg}'))
+        self.status.setText('搜索中…')
+        self.worker.start()
+
+    def stop_search(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+            self.worker = None
+
+    def on_progress(self, frac, best):
+        # 结果最多 top_k 行，直接整表刷新
+        self.results = best
+        self.table.setRowCount(len(best))
+        for r, row in enumerate(best):
+            for c, (key, _) in enumerate(self.COLUMNS):
+                v = float(row[key])
+                text = '-' if not np.isfinite(v) else (
+                    self.treadmill.format_gear_ratio(v) if key == 'gear_ratio' else f'{v:.3f}'.rstrip('0').rstrip('.'))
+                self.table.setItem(r, c, QTableWidgetItem(text))
+        self.status.setText(f'{frac * 100:.0f}% — 已找到 {len(best)} 个组合' if frac < 1 else f'完成 — 共 {len(best)} 个组合')
+
+    def on_apply(self, row, col):
+        if self.results is None or not (0 <= row < len(self.results)):
+            return
+        self.treadmill.apply_design(self.results[row])
+
+    def done(self, result):
+        self.stop_search()
+        super().done(result)
+
+
+class ToleranceWorker(QThread):
+    """在后台线程运行 tolerance.iter_simulate，逐片发回累计结果的副本。"""
+
+    progress = Signal(float, object)
+    failed = Signal(str)
+
+    def __init__(self, tolerances, kwargs, parent=None):
+        super().__init__(parent)
+        self.tolerances = tolerances
+        self.kwargs = kwargs
+        self._cancel = False
+
+    def cancel(self):
+        self._cancel = True
+
+    def run(self):
+        import tolerance
+        try:
+            for frac, result in tolerance.iter_simulate(self.tolerances, **self.kwargs):
+                if self._cancel:
+                    return
+                self.progress.emit(frac, result.copy())
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class HistogramWidget(QWidget):
+    """简单的直方图：柱形为样本数，红线为规格上下限。"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.edges = None
+        self.counts = None
+        self.limits = ()
+        self.setMinimumHeight(180)
+
+    def set_data(self, edges, counts, limits=()):
+        self.edges, self.counts, self.limits = edges, counts, limits
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = self.rect().adjusted(8, 8, -8, -24)
+        painter.fillRect(self.rect(), self.palette().base())
+        if self.counts is None or not len(self.counts) or rect.width() <= 0:
+            return
+        lo, hi = float(self.edges[0]), float(self.edges[-1])
+        lo = min([lo] + [v for v in self.limits if v is not None])
+        hi = max([hi] + [v for v in self.limits if v is not None])
+        span = (hi - lo) or 1.0
+        top = float(self.counts.max()) or 1.0
+
+        def x_of(v):
+            return rect.left() + (v - lo) / span * rect.width()
+
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor('#5b9bd5'))
+        for i, c in enumerate(self.counts):
+            x0, x1 = x_of(self.edges[i]), x_of(self.edges[i + 1])
+            h = c / top * rect.height()
+            painter.drawRect(int(x0), int(rect.bottom() - h), max(1, int(x1 - x0) - 1), int(h))
+        painter.setPen(QColor('#d9534f'))
+        for v in self.limits:
+            if v is not None:
+                painter.drawLine(int(x_of(v)), rect.top(), int(x_of(v)), rect.bottom())
+        painter.setPen(self.palette().text().color())
+        painter.drawText(rect.left(), self.height() - 6, f'{lo:.3f}')
+        text = f'{hi:.3f} km/h'
+        painter.drawText(rect.right() - painter.fontMetrics().horizontalAdvance(text), self.height() - 6, text)
+
+
+class ToleranceDialog(QDialog):
+    """公差分析：按各尺寸的公差分布抽样大量样机，统计跑带时速的分布与不合格比例。"""
+
+    # 变量 -> (显示名称, 默认公差, 默认分布)；motor_rpm 的默认公差为名义值的 1%
+    VARIABLES = [
+        ('motor_rpm', '电机转速 (RPM)', None, 'normal'),
+        ('motor_pulley_d', '电机带轮 (mm)', 0.1, 'uniform'),
+        ('sec1', '二级带轮（电机侧）(mm)', 0.1, 'uniform'),
+        ('sec2', '二级带轮（滚筒侧）(mm)', 0.1, 'uniform'),
+        ('roller_pulley_d', '滚筒带轮 (mm)', 0.1, 'uniform'),
+        ('roller_diameter', '滚筒直径 (mm)', 0.1, 'normal'),
+        ('slip', '跑带打滑 (%)', 0.0, 'uniform'),
+    ]
+
+    def __init__(self, design, use_secondary=False, parent=None):
+        import tolerance
+        super().__init__(parent)
+        self.use_secondary = use_secondary
+        self.worker = None
+        self.setWindowTitle('跑带时速公差分析')
+        self.resize(640, 640)
+
+        def spin(lo, hi, val, decimals=3):
+            sp = QDoubleSpinBox()
+            sp.setRange(lo, hi)
+            sp.setDecimals(decimals)
+            sp.setValue(val)
+            return sp
+
+        form = QFormLayout()
+        form.addRow(QLabel('<b>名义值 ± 公差 与分布</b>'))
+        self.rows = {}
+        for name, label, tol, dist in self.VARIABLES:
+            if name in ('sec1', 'sec2') and not use_secondary:
+                continue
+            nominal = 0.0 if name == 'slip' else float(design.get(name) or 0.0)
+            nom = spin(0.0, 1e6, nominal)
+            if name == 'slip':
+                nom.setRange(0.0, 50.0)
+            tol_spin = spin(0.0, 1e5, nominal * 0.01 if tol is None else tol)
+            combo = QComboBox()
+            for d in tolerance.DISTRIBUTIONS:
+                combo.addItem(tolerance.DIST_LABELS[d], d)
+            combo.setCurrentIndex(tolerance.DISTRIBUTIONS.index(dist))
+            h = QHBoxLayout()
+            h.addWidget(nom)
+            h.addWidget(QLabel('±'))
+            h.addWidget(tol_spin)
+            h.addWidget(combo)
+            form.addRow(label, h)
+            self.rows[name] = (nom, tol_spin, combo)
+
+        rated = float(design.get('belt_kmh') or 0.0)
+        self.rated = spin(0.0, 1000.0, rated)
+        self.allowed = spin(0.0, 100.0, 2.0, 2)
+        self.samples = QSpinBox()
+        self.samples.setRange(1000, 100000000)
+        self.samples.setSingleStep(1000000)
+        self.samples.setValue(2000000)
+        self.seed = QSpinBox()
+        self.seed.setRange(0, 2 ** 31 - 1)
+        form.addRow('额定时速 (km/h)', self.rated)
+        form.addRow('允许偏差 (±%)', self.allowed)
+        form.addRow('样本数', self.samples)
+        form.addRow('随机种子', self.seed)
+
+        self.btn_run = QPushButton('开始分析')
+        self.btn_run.clicked.connect(self.start)
+        self.status = QLabel('')
+        h = QHBoxLayout()
+        h.addWidget(self.btn_run)
+        h.addWidget(self.status, 1)
+
+        self.summary = QLabel('')
+        self.summary.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.histogram = HistogramWidget()
+
+        layout = QVBoxLayout()
+        layout.addLayout(form)
+        layout.addLayout(h)
+        layout.addWidget(self.summary)
+        layout.addWidget(self.histogram, 1)
+        self.setLayout(layout)
+
+    def tolerances(self):
+        import tolerance
+        return [tolerance.VariableTolerance(name, nom.value(), tol.value(), combo.currentData())
+                for name, (nom, tol, combo) in self.rows.items()]
+
+    def start(self):
+        self.stop()
+        rated, allowed = self.rated.value(), self.allowed.value() / 100.0
+        self.limits = (rated * (1 - allowed), rated * (1 + allowed))
+        kwargs = dict(use_secondary=self.use_secondary, n_samples=self.samples.value(),
+                      seed=self.seed.value(), spec_min=self.limits[0], spec_max=self.limits[1])
+        try:
+            tols = self.tolerances()
+        except ValueError as e:
+            QMessageBox.warning(self, '错误', str(e))
+            return
+        self.worker = ToleranceWorker(tols, kwargs, self)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.failed.connect(lambda msg: QMessageBox.critical(self, '异常', f'公差分析时发生异常: {msg}'))
+        self.status.setText('抽样中…')
+        self.worker.start()
+
+    def stop(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+            self.worker = None
+
+    def on_progress(self, frac, result):
+        pct = result.percentiles()
+        lines = [
+            f'样本 {result.n:,}：平均 {result.mean:.3f} km/h，标准差 {result.std:.4f}，'
+            f'范围 {result.min:.3f} ~ {result.max:.3f}',
+            '分位数：' + '，'.join(f'P{q:g} {v:.3f}' for q, v in pct.items()),
+            f'超出 {self.limits[0]:.3f} ~ {self.limits[1]:.3f} km/h：{result.fraction_out * 100:.3f}%'
+            f'（偏慢 {result.below / result.n * 100:.3f}%，偏快 {result.above / result.n * 100:.3f}%）',
+        ]
+        self.summary.setText('\n'.join(lines))
+        edges, counts = result.histogram(60)
+        self.histogram.set_data(edges, counts, self.limits)
+        self.status.setText(f'{frac * 100:.0f}%' if frac < 1 else '完成')
+
+    def done(self, result):
+        self.stop()
+        super().done(result)
+
 
 class SettingsTab(QWidget):
     """设置：管理自定义字段，仅通过此面板修改字段列表。
-    负责保存 UI 偏好到 `ui_prefs.json`（列宽、行高、锁定、字段行高、深色主题）。
+    负责修改 UI 偏好（表格布局方案、深色主题），由 preferences 统一保存到 `ui_prefs.json`。
     """
 
     def __init__(self, treadmill=None, parent=None):
         super().__init__(parent)
         self.treadmill = treadmill
         self.fields_path = os.path.join(os.path.dirname(__file__), 'fields.json')
-        self.prefs_path = os.path.join(os.path.dirname(__file__), 'ui_prefs.json')
-        self.fields = []
+        # 字段列表与型号目录存放在同一后端（默认 SQLite）
+        self.store = getattr(treadmill, 'store', None)
+        self.prefs = preferences.get_preferences(os.path.dirname(os.path.abspath(__file__)),
+                                                 getattr(treadmill, 'cache', None))
+        self.registry = field_registry.get_registry()
         self.load_fields()
         self.init_ui()
         # 尝试加载并应用 ui prefs（但表格可能尚未就绪）
@@ -759,15 +1518,33 @@ class SettingsTab(QWidget):
         layout = QVBoxLayout()
         self.list = QListWidget()
         self.refresh_list()
+        # 字段列表与其它选项卡共享：增删只改动列表中的一行
+        self.registry.field_inserted.connect(lambda pos, spec: self.list.insertItem(pos, spec.describe()))
+        self.registry.field_removed.connect(lambda pos, spec: self.list.takeItem(pos))
+        self.registry.fields_reset.connect(self.refresh_list)
 
         h = QHBoxLayout()
         self.new_field = QLineEdit()
         self.new_field.setPlaceholderText('字段名称，例如：跑带宽度')
+        # 字段类型：数值可带单位，枚举需填写可选值（逗号分隔）
+        self.new_field_type = QComboBox()
+        for typ in field_schema.FIELD_TYPES:
+            self.new_field_type.addItem(field_schema.TYPE_LABELS[typ], typ)
+        self.new_field_unit = QLineEdit()
+        self.new_field_unit.setPlaceholderText('单位，如 mm')
+        self.new_field_unit.setMaximumWidth(80)
+        self.new_field_choices = QLineEdit()
+        self.new_field_choices.setPlaceholderText('可选值，如 黑,白,灰')
+        self.new_field_type.currentIndexChanged.connect(self.on_field_type_changed)
+        self.on_field_type_changed()
         self.btn_add = QPushButton('添加')
         self.btn_remove = QPushButton('删除所选')
         self.btn_add.clicked.connect(self.add_field)
         self.btn_remove.clicked.connect(self.remove_selected)
         h.addWidget(self.new_field)
+        h.addWidget(self.new_field_type)
+        h.addWidget(self.new_field_unit)
+        h.addWidget(self.new_field_choices)
         h.addWidget(self.btn_add)
         h.addWidget(self.btn_remove)
         layout.addWidget(QLabel('自定义字段（仅显示于型号表）'))
@@ -785,6 +1562,14 @@ class SettingsTab(QWidget):
         ctrl_h.addWidget(self.chk_apply_on_start)
         layout.addLayout(ctrl_h)
 
+        # 型号目录导出（JSON 格式）
+        export_h = QHBoxLayout()
+        self.btn_export = QPushButton('导出型号为 models.json…')
+        self.btn_export.clicked.connect(self.export_models_json)
+        export_h.addWidget(self.btn_export)
+        export_h.addStretch(1)
+        layout.addLayout(export_h)
+
         # 主题控制
         theme_h = QHBoxLayout()
         self.chk_dark = QCheckBox('启用深色主题')
@@ -794,52 +1579,65 @@ class SettingsTab(QWidget):
 
         self.setLayout(layout)
 
+    @property
+    def specs(self):
+        return self.registry.specs
+
     def load_fields(self):
+        # 跑步机选项卡已把字段加载进共享注册表（可能来自启动缓存），不再重复读取
+        if self.registry.loaded:
+            return
         try:
-            if os.path.exists(self.fields_path):
+            if self.store is not None:
+                self.registry.set_store(self.store)
+                raw = self.store.load_fields()
+            elif os.path.exists(self.fields_path):
                 with open(self.fields_path, 'r', encoding='utf-8') as f:
-                    self.fields = json.load(f)
+                    raw = json.load(f)
+            else:
+                raw = []
+            self.registry.load(raw)
         except Exception:
-            self.fields = []
+            self.registry.load([])
 
-    def persist_fields(self):
+    def on_field_type_changed(self, *args):
+        typ = self.new_field_type.currentData()
+        self.new_field_unit.setEnabled(typ == 'number')
+        self.new_field_choices.setEnabled(typ == 'enum')
+
+    def export_models_json(self):
+        if self.store is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, '导出型号', 'models.json', 'JSON (*.json)')
+        if not path:
+            return
         try:
-            with open(self.fields_path, 'w', encoding='utf-8') as f:
-                json.dump(self.fields, f, ensure_ascii=False, indent=2)
-        except Exception:
-            pass
+            self.store.export_json(path)
+            QMessageBox.information(self, '导出', f'已导出到：{path}')
+        except Exception as e:
+            QMessageBox.warning(self, '错误', f'导出失败: {e}')
 
     def refresh_list(self):
         self.list.clear()
-        for f in self.fields:
-            self.list.addItem(f)
-
-    # ---------------- UI prefs persistence ----------------
-    def save_ui_prefs(self, prefs: dict):
-        try:
-            with open(self.prefs_path, 'w', encoding='utf-8') as f:
-                json.dump(prefs, f, ensure_ascii=False, indent=2)
-        except Exception:
-            pass
+        for spec in self.specs:
+            self.list.addItem(spec.describe())
 
+    # ---------------- UI prefs ----------------
     def load_ui_prefs(self):
         try:
-            if os.path.exists(self.prefs_path):
-                with open(self.prefs_path, 'r', encoding='utf-8') as f:
-                    prefs = json.load(f)
-                    # (no field row height control anymore)
-                    # apply dark theme
-                    if prefs.get('dark_theme'):
-                        self.chk_dark.setChecked(True)
-                        self.apply_dark_theme(True)
-                    # if apply_on_start and treadmill exists, apply table prefs
-                    if prefs.get('apply_on_start') and self.treadmill:
-                        try:
-                            self.treadmill.apply_ui_prefs(prefs)
-                        except Exception:
-                            pass
-                    # set checkbox state
-                    self.chk_apply_on_start.setChecked(bool(prefs.get('apply_on_start', False)))
+            # (no field row height control anymore)
+            # apply dark theme
+            if self.prefs.get('dark_theme'):
+                self.chk_dark.setChecked(True)
+                self.apply_dark_theme(True)
+            # if apply_on_start and treadmill exists, apply table prefs
+            if self.prefs.get('apply_on_start') and self.treadmill:
+                try:
+                    self.treadmill.apply_ui_prefs(self.prefs.table_profile(preferences.TREADMILL_TABLE))
+                except Exception:
+                    pass
+            # set checkbox state
+            self.chk_apply_on_start.setChecked(bool(self.prefs.get('apply_on_start', False)))
         except Exception:
             pass
 
@@ -848,36 +1646,32 @@ class SettingsTab(QWidget):
         if not name:
             QMessageBox.warning(self, '错误', '请输入字段名称')
             return
-        if name in self.fields:
+        if any(s.name == name for s in self.specs):
             QMessageBox.information(self, '信息', '字段已存在')
             return
-        self.fields.append(name)
-        self.persist_fields()
-        self.refresh_list()
-        # 更新 treadmill tab 的字段并刷新表格头
+        typ = self.new_field_type.currentData()
+        choices = []
+        if typ == 'enum':
+            text = self.new_field_choices.text().replace('，', ',')
+            choices = [c.strip() for c in text.split(',') if c.strip()]
+        spec = field_schema.FieldSpec(name, typ,
+                                      self.new_field_unit.text().strip() if typ == 'number' else '',
+                                      choices)
         try:
-            if self.treadmill:
-                self.treadmill.load_fields()
-                self.treadmill.refresh_table()
-        except Exception:
-            pass
+            # 注册表校验、保存并通知各选项卡插入这一列
+            self.registry.add(spec)
+        except field_schema.FieldSchemaError as e:
+            QMessageBox.warning(self, '字段定义错误', str(e))
+            return
         self.new_field.clear()
+        self.new_field_unit.clear()
+        self.new_field_choices.clear()
 
     def remove_selected(self):
-        it = self.list.currentItem()
-        if not it:
+        row = self.list.currentRow()
+        if not (0 <= row < len(self.specs)):
             return
-        name = it.text()
-        if name in self.fields:
-            self.fields.remove(name)
-            self.persist_fields()
-            self.refresh_list()
-            try:
-                if self.treadmill:
-                    self.treadmill.load_fields()
-                    self.treadmill.refresh_table()
-            except Exception:
-                pass
+        self.registry.remove(self.specs[row].name)
 
     def on_row_height_changed(self, val):
         # removed: no-op since row-height control was deleted
@@ -887,35 +1681,25 @@ class SettingsTab(QWidget):
         if not self.treadmill:
             QMessageBox.warning(self, '错误', '找不到表格控件')
             return
-        tbl = self.treadmill.model_table
-        prefs = {}
-        prefs['col_widths'] = [tbl.columnWidth(i) for i in range(tbl.columnCount())]
-        prefs['row_heights'] = [tbl.rowHeight(r) for r in range(tbl.rowCount())]
-        prefs['locked'] = True
-        prefs['dark_theme'] = bool(self.chk_dark.isChecked())
-        prefs['apply_on_start'] = bool(self.chk_apply_on_start.isChecked())
-        self.save_ui_prefs(prefs)
+        # 默认行高 + 按型号名称的例外行高，大小与型号数量无关
+        profile = self.treadmill.table_layout_profile()
+        profile['locked'] = True
+        self.prefs.set_table_profile(preferences.TREADMILL_TABLE, profile)
+        self.prefs.update(dark_theme=bool(self.chk_dark.isChecked()),
+                          apply_on_start=bool(self.chk_apply_on_start.isChecked()))
         # apply and lock
         try:
-            self.treadmill.apply_ui_prefs(prefs)
+            self.treadmill.apply_ui_prefs(profile)
             QMessageBox.information(self, '保存', '表格尺寸已保存并锁定')
         except Exception:
             pass
 
     def unlock_table_prefs(self):
-        # load existing prefs, clear locked flag
-        prefs = {}
-        try:
-            if os.path.exists(self.prefs_path):
-                with open(self.prefs_path, 'r', encoding='utf-8') as f:
-                    prefs = json.load(f)
-        except Exception:
-            prefs = {}
-        prefs['locked'] = False
-        self.save_ui_prefs(prefs)
+        # clear locked flag（内存中修改，后台写回）
+        profile = self.prefs.update_table_profile(preferences.TREADMILL_TABLE, locked=False)
         if self.treadmill:
             try:
-                self.treadmill.apply_ui_prefs(prefs)
+                self.treadmill.apply_ui_prefs(profile)
             except Exception:
                 pass
         QMessageBox.information(self, '解锁', '表格尺寸已解锁，可手动调整')
@@ -924,21 +1708,13 @@ class SettingsTab(QWidget):
         enabled = bool(state)
         self.apply_dark_theme(enabled)
         # persist change
-        try:
-            prefs = {}
-            if os.path.exists(self.prefs_path):
-                with open(self.prefs_path, 'r', encoding='utf-8') as f:
-                    prefs = json.load(f)
-        except Exception:
-            prefs = {}
-        prefs['dark_theme'] = enabled
-        self.save_ui_prefs(prefs)
+        self.prefs.set('dark_theme', enabled)
 
     def apply_dark_theme(self, enabled: bool):
         if enabled:
             dark = '''
             QWidget { background: #1e1e1e; color: #d4d4d4; }
-            QTableWidget, QListWidget { background: #252526; color: #d4d4d4; }
+            QTableView, QListWidget { background: #252526; color: #d4d4d4; }
             QHeaderView::section { background: #2d2d30; color: #d4d4d4; }
             QPushButton { background: #0e639c; color: #fff; }
             QLineEdit { background: #2d2d30; color: #d4d4d4; }
@@ -949,31 +1725,33 @@ class SettingsTab(QWidget):
 
 
 
+class PersistErrorBridge(QObject):
+    """把写线程中的失败转到 GUI 线程（跨线程信号自动排队）。"""
+
+    failed = Signal(str, str)
+
+
 class MainWindow(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle('FitnessToolbox (Qt6)')
+        # 后台写盘失败时提示用户
+        self.persist_errors = PersistErrorBridge(self)
+        self.persist_errors.failed.connect(self.on_persist_failed)
+        persist_worker.get_worker().add_error_listener(
+            lambda key, exc: self.persist_errors.failed.emit(str(key), str(exc)))
         self.resize(900, 600)
         tabs = QTabWidget()
         # 创建实例以便后续刷新
         self.treadmill_tab = TreadmillTab()
         tabs.addTab(self.treadmill_tab, '跑步机')
 
-        # 为其它选项卡创建带顶层占位内容的容器（产品型号管理会在切换时复用显示）
-        def make_tab_placeholder(title):
-            w = QWidget()
-            l = QVBoxLayout()
-            l.addWidget(QLabel(f'{title} 内容占位'))
-            l.addStretch(1)
-            w.setLayout(l)
-            return w
-
-        tabs.addTab(make_tab_placeholder('电机'), '电机')
-        tabs.addTab(make_tab_placeholder('划船器'), '划船器')
-        tabs.addTab(make_tab_placeholder('抖抖机'), '抖抖机')
-        tabs.addTab(make_tab_placeholder('力量'), '力量')
-        tabs.addTab(make_tab_placeholder('健身车'), '健身车')
-        tabs.addTab(make_tab_placeholder('筋膜枪'), '筋膜枪')
+        # 其它器材的选项卡按注册表（equipment.py）排列，第一次选中时才导入模块并创建
+        self.lazy_tabs = {}
+        for entry in equipment.entries():
+            self.lazy_tabs[entry.key] = LazyTab(lambda entry=entry: make_equipment_tab(entry, self))
+            tabs.addTab(self.lazy_tabs[entry.key], entry.title)
+        tabs.currentChanged.connect(lambda i: isinstance(tabs.widget(i), LazyTab) and tabs.widget(i).ensure())
 
         # 设置选项卡：字段管理
         self.settings_tab = SettingsTab(self.treadmill_tab)
@@ -996,19 +1774,46 @@ class MainWindow(QWidget):
         QWidget { font-family: -apple-system, system-ui, "Segoe UI", Roboto, "Helvetica Neue", Arial; font-size: 13px; }
         QGroupBox { font-weight: 600; margin-top: 6px; }
         QGroupBox::title { subcontrol-origin: margin; left: 8px; padding: 2px 6px; }
-        QTableWidget { gridline-color: #e6e6e6; }
+        QTableView { gridline-color: #e6e6e6; }
         QHeaderView::section { background: #f3f4f6; padding: 6px; border: 1px solid #e6e6e6; }
         QPushButton { padding: 6px 10px; }
         QLineEdit { padding: 4px 6px; }
         ''')
 
+    def on_persist_failed(self, key, message):
+        QMessageBox.warning(self, '保存失败', f'写入 {key} 失败: {message}')
+
+    def closeEvent(self, event):
+        # 退出前写完型号目录，并更新启动快照
+        self.treadmill_tab.cancel_recompute()
+        # 有后台计算的器材选项卡（如划船器）提供 stop()
+        for lazy in self.lazy_tabs.values():
+            stop = getattr(lazy.widget, 'stop', None)
+            if stop is not None:
+                stop()
+        self.treadmill_tab.close_store()
+        self.treadmill_tab.save_startup_cache()
+        super().closeEvent(event)
+
 
 def main():
     app = QApplication(sys.argv)
+    startup_timer.mark('qapplication')
     w = MainWindow()
+    startup_timer.mark('main_window_built')
     w.show()
-    sys.exit(app.exec())
+    # 事件循环第一次空闲时视为启动完成
+    QTimer.singleShot(0, lambda: (startup_timer.mark('first_event_loop'),
+                                  startup_timer.report(os.path.dirname(os.path.abspath(__file__)),
+                                                       w.treadmill_tab.cache)))
+    ret = app.exec()
+    # 退出前写完所有挂起的持久化请求
+    persist_worker.shutdown()
+    sys.exit(ret)
 
 
 if __name__ == '__main__':
+    # 打包后的程序中，重算用的进程池子进程从这里进入
+    multiprocessing.freeze_support()
     main()
+
@@ -0,0 +1,234 @@
+"""按存储的输入参数批量重算型号的 'computed' 块（不依赖 Qt）
+
+'computed' 块原本是保存时从结果标签上抄下来的文本，经常是过期的或 '-'。
+这里按与界面“计算”按钮相同的语义（drivetrain.solve，有且只有一项留空）
+从每个型号的输入参数重新推导：
+
+- 有唯一留空项：滚筒转速、电机转速、跑带时速、传动比取求解结果，
+  求得的二级带轮 / 滚筒直径写入对应项，其余为空；
+- 没有留空项：按输入直接推导，并检查方程是否自洽（相对误差超过
+  CONSISTENCY_TOL 的型号报告为“不一致”）；
+- 其它情况（多项留空、只留空功率、数值无效）：无法计算，结果为空；
+  但带轮参数完整时传动比仍按带轮给出（与界面实时计算的 ratio 节点相同）。
+
+输入先按列取出（Catalog.columns），再切成块交给进程池并行计算；
+行数较少时直接在本进程计算，省去启动子进程的开销。结果与保存时一样
+保留 3 位小数，因此没有变化的型号不会被误报。
+"""
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+import drivetrain
+from catalog import COMPUTED_KEYS, INPUT_KEYS
+
+CHUNK_SIZE = 20000
+# 少于这么多行时不启动进程池：单进程约 1 µs/行，启动子进程（spawn 需要重新导入模块）
+# 的固定开销只有在行数很多时才值得
+PARALLEL_MIN = 200000
+# 没有留空项时方程允许的相对误差（输入通常只保留 3 位小数）
+CONSISTENCY_TOL = 1e-3
+
+# 每行的重算状态
+SOLVED = 0          # 求得唯一留空项
+CONSISTENT = 1      # 没有留空项，参数自洽
+INCONSISTENT = 2    # 没有留空项，参数互相矛盾
+UNSOLVABLE = 3      # 无法计算
+
+STATUS_LABELS = {
+    SOLVED: '已求解',
+    CONSISTENT: '参数完整',
+    INCONSISTENT: '参数不一致',
+    UNSOLVABLE: '无法计算',
+}
+
+# 求得时写入 computed 块对应项的留空字段
+_SOLVED_SLOTS = ('sec1', 'sec2', 'roller_diameter')
+
+
+def gather_inputs(cols):
+    """列式视图（Catalog.columns）中的输入参数列：INPUT_KEYS 与 use_secondary。"""
+    inputs = {key: cols.number(key) for key in INPUT_KEYS}
+    inputs['use_secondary'] = cols.flag()
+    return inputs
+
+
+def _round3(values):
+    """与结果标签的 '%.3f' 文本一致。"""
+    return np.round(values, 3)
+
+
+def _round_ratio(ratio):
+    """与 format_gear_ratio 的 'N:1' / '1:N' 文本一致。"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(ratio >= 1.0, np.round(ratio, 3), 1.0 / np.round(1.0 / ratio, 3))
+
+
+def compute_block(inputs):
+    """一块输入参数 -> (computed 数组 (n, len(COMPUTED_KEYS))，状态数组，相对误差数组)。
+
+    供进程池调用，参数与返回值都只含 NumPy 数组。
+    """
+    res = drivetrain.solve(inputs['motor_rpm'], inputs['motor_pulley_d'], inputs['roller_pulley_d'],
+                           inputs['roller_diameter'], inputs['belt_kmh'],
+                           use_secondary=inputs['use_secondary'], sec1=inputs['sec1'],
+                           sec2=inputs['sec2'], motor_power=inputs['motor_power'])
+    n = res.shape[0]
+    full = res['error'] == drivetrain.ERR_NO_EMPTY
+    residual = np.full(n, np.nan)
+    values = {key: np.full(n, np.nan) for key in COMPUTED_KEYS}
+    if full.any():
+        # 没有留空项：按输入推导，同时得到方程的相对误差
+        sub = {key: col[full] for key, col in inputs.items()}
+        drv = drivetrain.solve_drive(sub['motor_rpm'], sub['motor_pulley_d'], sub['sec1'], sub['sec2'],
+                                     sub['roller_pulley_d'], sub['roller_diameter'], sub['belt_kmh'],
+                                     use_secondary=sub['use_secondary'])
+        residual[full] = drv['residual']
+        for key in ('roller_rpm', 'motor_rpm', 'belt_kmh', 'gear_ratio'):
+            values[key][full] = drv[key]
+    solved = res['error'] == drivetrain.OK
+    for key in ('roller_rpm', 'motor_rpm', 'belt_kmh', 'gear_ratio'):
+        values[key][solved] = res[key][solved]
+    # 没有求解结果的行：传动比只依赖带轮，带轮齐全时照常给出
+    with np.errstate(invalid='ignore'):
+        ratio = drivetrain.gear_ratio_total(inputs['motor_pulley_d'], inputs['roller_pulley_d'],
+                                            inputs['use_secondary'], inputs['sec1'], inputs['sec2'])
+    ratio = np.where(np.isfinite(ratio), ratio, np.nan)
+    values['gear_ratio'] = np.where(np.isnan(values['gear_ratio']), ratio, values['gear_ratio'])
+    missing = res['missing']
+    for key in _SOLVED_SLOTS:
+        rows = solved & (missing == drivetrain.CORE_FIELDS.index(key))
+        values[key][rows] = res[key][rows]
+
+    status = np.full(n, UNSOLVABLE, dtype=np.int8)
+    status[solved] = SOLVED
+    with np.errstate(invalid='ignore'):
+        ok = np.abs(residual) <= CONSISTENCY_TOL
+    status[full & ok] = CONSISTENT
+    status[full & ~ok] = INCONSISTENT
+    computed = np.column_stack([_round_ratio(values[key]) if key == 'gear_ratio' else _round3(values[key])
+                                for key in COMPUTED_KEYS])
+    return computed, status, residual
+
+
+def _slice(inputs, start, stop):
+    return {key: col[start:stop] for key, col in inputs.items()}
+
+
+def iter_blocks(inputs, chunk_size=CHUNK_SIZE, workers=None):
+    """按块计算，完成一块产出一块：(start, stop, computed, status, residual)。
+
+    行数不少于 PARALLEL_MIN 且有多个 CPU 时交给进程池（子进程用 spawn 启动，
+    不继承界面进程的线程）；
+    完成顺序不一定与块的顺序相同。生成器提前关闭时取消尚未开始的块。
+    """
+    n = len(inputs['motor_rpm'])
+    bounds = [(i, min(i + chunk_size, n)) for i in range(0, n, chunk_size)]
+    workers = min(len(bounds), workers or os.cpu_count() or 1)
+    if n < PARALLEL_MIN or workers < 2:
+        for start, stop in bounds:
+            yield (start, stop) + compute_block(_slice(inputs, start, stop))
+        return
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        pending = {pool.submit(compute_block, _slice(inputs, start, stop)): (start, stop)
+                   for start, stop in bounds}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                start, stop = pending.pop(fut)
+                yield (start, stop) + fut.result()
+    finally:
+        # 已开始的块很快就会结束，未开始的直接取消
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+class RecomputeResult:
+    """整个目录的重算结果；names 的顺序即各数组的行顺序。"""
+
+    def __init__(self, names, old, computed, status, residual):
+        self.names = names
+        self.old = old
+        self.computed = computed
+        self.status = status
+        self.residual = residual
+        # 3 位小数下没有变化的不算（两边都为空也视为相同）
+        same = np.isclose(old, computed, rtol=1e-9, atol=0.0) | (np.isnan(old) & np.isnan(computed))
+        self.changed = ~same.all(axis=1)
+
+    def names_where(self, mask):
+        return [self.names[i] for i in np.flatnonzero(mask)]
+
+    def changed_rows(self):
+        return np.flatnonzero(self.changed)
+
+    def changed_names(self):
+        return self.names_where(self.changed)
+
+    def counts(self):
+        """状态 -> 型号数。"""
+        return {s: int((self.status == s).sum()) for s in STATUS_LABELS}
+
+    def computed_tuple(self, row):
+        """第 row 行的 computed 块（ModelRecord.computed 的格式，空为 None）。"""
+        return tuple(None if v != v else v for v in self.computed[row].tolist())
+
+
+class RecomputeJob:
+    """一次重算：构造时（在修改目录的线程中）取出输入参数与原 computed 块，
+    run 只处理数组，可以放到后台线程执行；apply 回到修改目录的线程写回。"""
+
+    def __init__(self, catalog, names=None):
+        # 整个目录时复用目录缓存的列
+        cols = catalog.columns(names)
+        self.names = list(cols.names)
+        # 记下当时的记录对象：记录只会被整体替换，apply 时据此跳过期间被修改的型号
+        self.records = [catalog[n] for n in self.names]
+        self.inputs = gather_inputs(cols)
+        self.old = np.column_stack([cols.computed(key) for key in COMPUTED_KEYS]) if self.names \
+            else np.empty((0, len(COMPUTED_KEYS)))
+
+    def __len__(self):
+        return len(self.names)
+
+    def run(self, chunk_size=CHUNK_SIZE, workers=None, progress=None, cancelled=None):
+        """计算全部块，返回 RecomputeResult；cancelled() 为真时停止并返回 None。
+
+        progress(done_rows, total_rows) 在每块完成后调用。
+        """
+        n = len(self.names)
+        computed = np.full((n, len(COMPUTED_KEYS)), np.nan)
+        status = np.full(n, UNSOLVABLE, dtype=np.int8)
+        residual = np.full(n, np.nan)
+        done = 0
+        blocks = iter_blocks(self.inputs, chunk_size, workers)
+        try:
+            for start, stop, block, st, rs in blocks:
+                if cancelled is not None and cancelled():
+                    return None
+                computed[start:stop] = block
+                status[start:stop] = st
+                residual[start:stop] = rs
+                done += stop - start
+                if progress is not None:
+                    progress(done, n)
+        finally:
+            blocks.close()
+        return RecomputeResult(self.names, self.old, computed, status, residual)
+
+    def apply(self, catalog, result, rows=None):
+        """把有变化的 computed 块写回目录，返回实际更新的型号列表。
+
+        rows 为要写回的行号（默认全部有变化的行，可分批传入）；
+        期间被删除或重新保存的型号保持不变（它们的结果已经过期）。
+        """
+        updated = []
+        for row in (result.changed_rows() if rows is None else rows):
+            name = self.names[row]
+            if catalog.get(name) is not self.records[row]:
+                continue
+            catalog.set_computed(name, result.computed_tuple(row))
+            updated.append(name)
+        return updated
@@ -0,0 +1,360 @@
+"""划船器飞轮 / 阻力 / 单向离合的逐桨仿真，对大量参数组合同时向量化（不依赖 Qt）
+
+每个工况（CASE_DTYPE 的一行）描述一台划船器与一种划桨方式：
+
+- 飞轮转动惯量 I = shape · m · r²；阻力矩 τ = k·ω² + c·ω，k 为风阻系数
+  （drag_factor = k × 10⁶，与 Concept2 显示屏的“阻力系数”同单位），c 为磁阻系数；
+- 拉桨阶段拉力为半个正弦（峰值 peak_force），回桨阶段拉力为 0、手柄不驱动飞轮；
+- 单向离合：未接合时拉力只使手柄（等效质量 handle_mass）加速，手柄带动的
+  链轮角速度 v/r_s 追上飞轮时接合，按角动量守恒与飞轮合为一体
+  （等效惯量 I + m_h·r_s²）；回桨时自由减速。自由减速的方程
+  dω/dt = −(k/I)ω² − (c/I)ω 有闭式解，每步精确推进，因此固定步长只影响
+  离合接合时刻的分辨率。
+
+飞轮获得的能量按每步“接合后的动能 − 自由减速后的动能”累计（即显示屏测得的功）。
+每桨输出（STROKE_DTYPE）：平均功率、500 m 配速（Concept2 的 P = 2.80 / pace³）、
+按回桨阶段 1/ω 的斜率估算的阻力系数（与显示屏的算法相同，有磁阻时会偏大）、
+拉桨行程、拉桨开始到离合接合的时间（空拉）与飞轮转速范围。
+
+所有工况在同一组时间步上推进（每个工况有各自的桨频与相位），一步只做几次
+整列运算；工况很多时分块交给进程池（同 tolerance / recompute）。
+"""
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+# 固定步长（秒）
+DT = 0.005
+# 从静止开始，约 10 桨后进入稳态
+STROKES = 12
+# 稳态统计取最后几桨
+STEADY_STROKES = 3
+# 每块工况数（约 1 s 一块，取消时最多等一块）；少于 PARALLEL_MIN 个工况时在本进程计算
+CASE_BLOCK = 4000
+PARALLEL_MIN = 40000
+# 进程池计算时检查是否取消的间隔（秒）
+CANCEL_POLL = 0.1
+
+# Concept2 的功率—配速关系 P = 2.80 / pace³（pace 单位 s/m）
+PACE_CONSTANT = 2.80
+
+CASE_DTYPE = np.dtype([
+    ('flywheel_mass', 'f8'),     # kg
+    ('flywheel_radius', 'f8'),   # m
+    ('shape', 'f8'),             # I = shape · m · r²（实心圆盘 0.5，轮缘集中接近 1）
+    ('drag_factor', 'f8'),       # 风阻系数 k × 10⁶ (N·m·s²)
+    ('magnetic', 'f8'),          # 磁阻系数 c (N·m·s)
+    ('sprocket_radius', 'f8'),   # 链轮半径 m
+    ('stroke_rate', 'f8'),       # 桨频 spm
+    ('drive_ratio', 'f8'),       # 拉桨时间 / 一桨时间
+    ('peak_force', 'f8'),        # 拉力峰值 N
+    ('handle_mass', 'f8'),       # 手柄（含手臂）的等效质量 kg
+])
+
+DEFAULT_CASE = {
+    'flywheel_mass': 10.0,
+    'flywheel_radius': 0.15,
+    'shape': 0.5,
+    'drag_factor': 120.0,
+    'magnetic': 0.0,
+    'sprocket_radius': 0.016,
+    'stroke_rate': 24.0,
+    'drive_ratio': 0.35,
+    'peak_force': 600.0,
+    'handle_mass': 3.0,
+}
+
+CASE_LABELS = {
+    'flywheel_mass': '飞轮质量 (kg)',
+    'flywheel_radius': '飞轮半径 (m)',
+    'shape': '惯量系数',
+    'drag_factor': '风阻系数',
+    'magnetic': '磁阻系数 (N·m·s)',
+    'sprocket_radius': '链轮半径 (m)',
+    'stroke_rate': '桨频 (spm)',
+    'drive_ratio': '拉桨占比',
+    'peak_force': '拉力峰值 (N)',
+    'handle_mass': '手柄等效质量 (kg)',
+}
+
+STROKE_DTYPE = np.dtype([
+    ('power', 'f8'),         # 平均功率 W
+    ('split', 'f8'),         # 500 m 配速 s
+    ('drag_factor', 'f8'),   # 回桨阶段估算的阻力系数
+    ('work', 'f8'),          # 每桨输入的能量 J
+    ('distance', 'f8'),      # 每桨的等效距离 m
+    ('stroke_length', 'f8'), # 拉桨行程 m
+    ('slip', 'f8'),          # 拉桨开始到离合接合的时间 s
+    ('rpm_min', 'f8'),
+    ('rpm_max', 'f8'),
+])
+
+STROKE_LABELS = {
+    'power': '功率 (W)',
+    'split': '配速 (/500m)',
+    'drag_factor': '阻力系数（估算）',
+    'work': '每桨做功 (J)',
+    'distance': '每桨距离 (m)',
+    'stroke_length': '拉桨行程 (m)',
+    'slip': '空拉时间 (s)',
+    'rpm_min': '飞轮最低转速',
+    'rpm_max': '飞轮最高转速',
+}
+
+_RAD_TO_RPM = 60.0 / (2.0 * np.pi)
+
+
+def make_cases(n=1, **values):
+    """n 个工况，未给出的参数取 DEFAULT_CASE；values 中的值可以是标量或长度为 n 的数组。"""
+    cases = np.empty(n, dtype=CASE_DTYPE)
+    for name in CASE_DTYPE.names:
+        cases[name] = values.get(name, DEFAULT_CASE[name])
+    return cases
+
+
+def grid(**axes):
+    """各参数取值的全组合（笛卡尔积）；未给出的参数取 DEFAULT_CASE。
+
+    例：grid(flywheel_mass=[8, 10, 12], drag_factor=range(80, 221, 10)) 得到 3 × 15 个工况。
+    """
+    for name in axes:
+        if name not in CASE_DTYPE.names:
+            raise ValueError(f'未知参数: {name}')
+    names = list(axes)
+    values = [np.atleast_1d(np.asarray(axes[n], dtype=float)) for n in names]
+    mesh = np.meshgrid(*values, indexing='ij') if values else []
+    n = int(np.prod([len(v) for v in values])) if values else 1
+    return make_cases(n, **{name: m.ravel() for name, m in zip(names, mesh)})
+
+
+def validate(cases):
+    """参数的合法性检查，返回出错提示或 None。"""
+    positive = ('flywheel_mass', 'flywheel_radius', 'shape', 'sprocket_radius', 'stroke_rate', 'peak_force',
+                'handle_mass')
+    for name in positive:
+        if not (cases[name] > 0).all():
+            return f'{CASE_LABELS[name]} 必须为正'
+    for name in ('drag_factor', 'magnetic'):
+        if not (cases[name] >= 0).all():
+            return f'{CASE_LABELS[name]} 不能为负'
+    if not ((cases['drag_factor'] > 0) | (cases['magnetic'] > 0)).all():
+        return '风阻系数与磁阻系数不能同时为 0'
+    if not ((cases['drive_ratio'] > 0) & (cases['drive_ratio'] < 1)).all():
+        return '拉桨占比应在 0~1 之间'
+    return None
+
+
+def inertia(cases):
+    return cases['shape'] * cases['flywheel_mass'] * cases['flywheel_radius'] ** 2
+
+
+def split_from_power(power):
+    """平均功率 (W) -> 500 m 配速 (s)。"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(power > 0, 500.0 * np.cbrt(PACE_CONSTANT / power), np.inf)
+
+
+def format_split(seconds):
+    """配速秒数 -> 'm:ss.s'。"""
+    if not np.isfinite(seconds):
+        return '-'
+    m, s = divmod(float(seconds), 60.0)
+    return f'{int(m)}:{s:04.1f}'
+
+
+def simulate_block(cases, strokes=STROKES, dt=DT, cancelled=None):
+    """一块工况的逐桨结果 (工况数, strokes) STROKE_DTYPE（供进程池调用）；cancelled() 为真时中途返回 None。"""
+    n = len(cases)
+    out = np.zeros((n, strokes), dtype=STROKE_DTYPE)
+    if not n:
+        return out
+    inert = inertia(cases)
+    a = cases['drag_factor'] * 1e-6 / inert          # ω² 项
+    b = cases['magnetic'] / inert                    # ω 项
+    # 自由减速一步的闭式解：ω' = ω·e / (1 + a·ω·g)，e = exp(−b·dt)，g = (1 − e)/b（b = 0 时为 dt）
+    e = np.exp(-b * dt)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        g = np.where(b > 0, -np.expm1(-b * dt) / b, dt)
+    period = 60.0 / cases['stroke_rate']
+    drive = period * cases['drive_ratio']
+    r_s = cases['sprocket_radius']
+    m_h = cases['handle_mass']
+    impulse = cases['peak_force'] * dt / m_h          # 峰值拉力下每步手柄速度的增量
+    # 接合时的角动量合并：ω' = (I·ω_free + m_h·r_s·v) / (I + m_h·r_s²)
+    j_hand = m_h * r_s
+    j_total = inert + m_h * r_s * r_s
+    half_i = 0.5 * inert
+
+    state = _StrokeState(n)
+    omega = np.zeros(n)
+    v_hand = np.zeros(n)
+    stroke_no = np.zeros(n, dtype=np.int64)
+
+    steps = int(np.ceil(float(period.max()) * strokes / dt))
+    for step in range(1, steps + 1):
+        if cancelled is not None and cancelled():
+            return None
+        t = step * dt
+        k = np.floor(t / period).astype(np.int64)
+        phase = t - k * period
+        wrapped = k != stroke_no
+        if wrapped.any():
+            rows = np.flatnonzero(wrapped & (stroke_no < strokes))
+            if len(rows):
+                # omega 仍是上一桨最后一步的值
+                state.close(out, rows, stroke_no[rows], period, omega, t - dt, inert)
+            state.reset(wrapped)
+            stroke_no = k
+        driving = phase < drive
+        # 手柄：拉桨时在拉力下加速，回桨时回到起点（速度对飞轮无作用）
+        v_hand = np.where(driving, v_hand + impulse * np.sin(np.pi * phase / drive), 0.0)
+        w_free = omega * e / (1.0 + a * omega * g)
+        engaged = v_hand > w_free * r_s
+        new = np.where(engaged, (inert * w_free + j_hand * v_hand) / j_total, w_free)
+        if engaged.any():
+            state.work += np.where(engaged, half_i * (new * new - w_free * w_free), 0.0)
+            # 接合后手柄随链轮运动
+            v_hand = np.where(engaged, new * r_s, v_hand)
+            first = engaged & np.isnan(state.slip)
+            state.slip[first] = phase[first]
+        state.travel += np.where(driving, v_hand * dt, 0.0)
+        omega = new
+        np.minimum(state.w_min, omega, out=state.w_min)
+        np.maximum(state.w_max, omega, out=state.w_max)
+        # 进入回桨阶段的第一步记下 1/ω
+        starting = ~driving & ~state.in_recovery
+        if starting.any():
+            with np.errstate(divide='ignore'):
+                state.rec_inv[starting] = 1.0 / omega[starting]
+            state.rec_t[starting] = t
+            state.in_recovery |= starting
+    # 最后一桨恰好在最后一步结束时还没有换桨
+    rows = np.flatnonzero(stroke_no < strokes)
+    if len(rows):
+        t = steps * dt
+        rows = rows[np.isclose(t - stroke_no[rows] * period[rows], period[rows], atol=dt)]
+        state.close(out, rows, stroke_no[rows], period, omega, t, inert)
+    return out
+
+
+class _StrokeState:
+    """当前这一桨的累计量（每个工况一个元素）。"""
+
+    def __init__(self, n):
+        self.work = np.zeros(n)
+        self.travel = np.zeros(n)
+        self.slip = np.full(n, np.nan)
+        self.w_min = np.full(n, np.inf)
+        self.w_max = np.zeros(n)
+        # 回桨开始时的 1/ω 与时刻（估算阻力系数用）
+        self.rec_inv = np.full(n, np.nan)
+        self.rec_t = np.zeros(n)
+        self.in_recovery = np.zeros(n, dtype=bool)
+
+    def reset(self, mask):
+        self.work[mask] = 0.0
+        self.travel[mask] = 0.0
+        self.slip[mask] = np.nan
+        self.w_min[mask] = np.inf
+        self.w_max[mask] = 0.0
+        self.rec_inv[mask] = np.nan
+        self.in_recovery[mask] = False
+
+    def close(self, out, rows, idx, period, omega, t, inert):
+        """把一批工况刚结束的那一桨写入结果表。"""
+        p = period[rows]
+        power = self.work[rows] / p
+        rec = out[rows, idx]
+        rec['work'] = self.work[rows]
+        rec['power'] = power
+        rec['split'] = split_from_power(power)
+        rec['distance'] = p * np.cbrt(np.maximum(power, 0.0) / PACE_CONSTANT)
+        rec['stroke_length'] = self.travel[rows]
+        rec['slip'] = self.slip[rows]
+        rec['rpm_min'] = self.w_min[rows] * _RAD_TO_RPM
+        rec['rpm_max'] = self.w_max[rows] * _RAD_TO_RPM
+        with np.errstate(divide='ignore', invalid='ignore'):
+            span = t - self.rec_t[rows]
+            df = inert[rows] * (1.0 / omega[rows] - self.rec_inv[rows]) / span * 1e6
+        rec['drag_factor'] = np.where(span > 0, df, np.nan)
+        out[rows, idx] = rec
+
+
+def simulate_steady_block(cases, strokes=STROKES, dt=DT, cancelled=None):
+    """一块工况的稳态结果 (工况数,)（供进程池调用，只传回汇总）；cancelled() 为真时中途返回 None。"""
+    out = simulate_block(cases, strokes, dt, cancelled)
+    return None if out is None else steady(out)
+
+
+def iter_simulate(cases, strokes=STROKES, dt=DT, block=CASE_BLOCK, workers=None, cancelled=None, summary=False):
+    """分块计算，每完成一块产出 (进度 0~1, start, stop, 逐桨结果)；完成顺序不一定与块的顺序相同。
+
+    summary 为真时每块只产出稳态结果 steady()（工况数,），逐桨结果不离开计算进程。
+
+    cancelled() 为真时停止：本进程计算时在块中途停止；进程池计算时取消尚未开始的块，
+    不等正在计算的块（子进程算完这一块后自行退出）。
+    """
+    err = validate(cases)
+    if err:
+        raise ValueError(err)
+    n = len(cases)
+    bounds = [(i, min(i + block, n)) for i in range(0, n, block)]
+    workers = min(len(bounds), workers or os.cpu_count() or 1)
+    func = simulate_steady_block if summary else simulate_block
+    if n < PARALLEL_MIN or workers < 2:
+        for i, (start, stop) in enumerate(bounds):
+            out = func(cases[start:stop], strokes, dt, cancelled)
+            if out is None:
+                return
+            yield (i + 1) / len(bounds), start, stop, out
+        return
+    done = 0
+    stopped = False
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        pending = {pool.submit(func, cases[start:stop], strokes, dt): (start, stop)
+                   for start, stop in bounds}
+        while pending:
+            finished, _ = wait(pending, timeout=CANCEL_POLL, return_when=FIRST_COMPLETED)
+            if cancelled is not None and cancelled():
+                stopped = True
+                return
+            for fut in finished:
+                start, stop = pending.pop(fut)
+                done += 1
+                yield done / len(bounds), start, stop, fut.result()
+    finally:
+        pool.shutdown(wait=not stopped, cancel_futures=True)
+
+
+def simulate(cases, strokes=STROKES, dt=DT, workers=None):
+    """全部工况的逐桨结果 (工况数, strokes)。"""
+    out = np.zeros((len(cases), strokes), dtype=STROKE_DTYPE)
+    for _, start, stop, block in iter_simulate(cases, strokes, dt, workers=workers):
+        out[start:stop] = block
+    return out
+
+
+def steady(table, last=STEADY_STROKES):
+    """每个工况最后 last 桨的平均（稳态），返回 (工况数,) STROKE_DTYPE。"""
+    tail = table[:, -min(last, table.shape[1]):]
+    out = np.empty(table.shape[0], dtype=STROKE_DTYPE)
+    for name in STROKE_DTYPE.names:
+        if name in ('rpm_min',):
+            out[name] = tail[name].min(axis=1)
+        elif name == 'rpm_max':
+            out[name] = tail[name].max(axis=1)
+        else:
+            out[name] = tail[name].mean(axis=1)
+    out['split'] = split_from_power(out['power'])
+    return out
+
+
+def case_rows(cases, summary):
+    """工况参数与稳态结果合并为 (列名, 逐行的值)（导出 CSV 用）；估算的阻力系数列名为 drag_factor_est。"""
+    names = list(CASE_DTYPE.names) + [n + '_est' if n in CASE_DTYPE.names else n for n in STROKE_DTYPE.names]
+    cols = [cases[n].tolist() for n in CASE_DTYPE.names] + [summary[n].tolist() for n in STROKE_DTYPE.names]
+    return names, zip(*cols)
+
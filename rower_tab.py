@@ -0,0 +1,270 @@
+"""划船器选项卡：飞轮 / 阻力 / 划桨方式的参数扫描（器材插件，见 equipment.py；计算见 rower_sim.py）"""
+import time
+
+import numpy as np
+from PySide6.QtCore import QThread, Qt, Signal
+from PySide6.QtWidgets import (
+    QFileDialog,
+    QFormLayout,
+    QGroupBox,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QMessageBox,
+    QPushButton,
+    QSpinBox,
+    QTableView,
+    QVBoxLayout,
+    QWidget,
+)
+
+import equipment
+import rower_sim
+from qt_equipment import ArrayTableModel
+
+
+class RowerWorker(QThread):
+    """在后台线程运行 rower_sim.iter_simulate，逐块发回稳态结果。"""
+
+    progress = Signal(float, int, int, object)
+    failed = Signal(str)
+
+    def __init__(self, cases, strokes, parent=None):
+        super().__init__(parent)
+        self.cases = cases
+        self.strokes = strokes
+        self._cancel = False
+
+    def cancel(self):
+        self._cancel = True
+
+    def run(self):
+        try:
+            # 块中途也检查，停止时不必等整块算完
+            blocks = rower_sim.iter_simulate(self.cases, self.strokes, cancelled=lambda: self._cancel, summary=True)
+            for frac, start, stop, block in blocks:
+                if self._cancel:
+                    return
+                self.progress.emit(frac, start, stop, block)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class RowerTab(QWidget):
+    """划船器选项卡：飞轮 / 阻力 / 划桨方式的参数扫描，查看各工况的稳态结果与逐桨数据。"""
+
+    # 工况汇总表中显示的稳态结果
+    SUMMARY = ('power', 'split', 'drag_factor', 'stroke_length', 'slip', 'rpm_max')
+    # 单次最多计算的工况数（每个工况只保留参数与稳态结果，约 150 B；逐桨数据选中时再单独计算）
+    MAX_CASES = 2000000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.worker = None
+        self.cases = None      # CASE_DTYPE 数组
+        self.n_strokes = 0     # 本次仿真的桨数
+        self.pending = None    # 计算中逐块填入的稳态结果
+        self.summary = None    # 稳态结果 (工况数,) STROKE_DTYPE，计算完成后才有
+        self.stroke_rows = None  # (工况序号, 该工况的逐桨结果)，选中工况时重新仿真这一个工况
+        self.axes = []         # 取多个值的参数（汇总表只显示这些参数列）
+        self.init_ui()
+        self.update_count()
+
+    def init_ui(self):
+        form = QFormLayout()
+        form.setLabelAlignment(Qt.AlignRight)
+        self.edits = {}
+        for name in rower_sim.CASE_DTYPE.names:
+            edt = QLineEdit(f'{rower_sim.DEFAULT_CASE[name]:g}')
+            edt.textChanged.connect(self.update_count)
+            form.addRow(rower_sim.CASE_LABELS[name], edt)
+            self.edits[name] = edt
+        self.strokes = QSpinBox()
+        self.strokes.setRange(rower_sim.STEADY_STROKES, 100)
+        self.strokes.setValue(rower_sim.STROKES)
+        form.addRow('仿真桨数', self.strokes)
+        hint = QLabel('每项可填单个值、逗号分隔的多个值（8, 10, 12）\n或范围 起:止:步长（80:200:20），按全组合计算。')
+        hint.setWordWrap(True)
+        form.addRow(hint)
+        self.lbl_count = QLabel('')
+        form.addRow(self.lbl_count)
+        self.btn_run = QPushButton('开始仿真')
+        self.btn_run.clicked.connect(self.start)
+        btn_export = QPushButton('导出 CSV…')
+        btn_export.clicked.connect(self.export_csv)
+        h = QHBoxLayout()
+        h.addWidget(self.btn_run)
+        h.addWidget(btn_export)
+        form.addRow(h)
+        self.status = QLabel('')
+        form.addRow(self.status)
+        param_box = QGroupBox('工况参数')
+        param_box.setLayout(form)
+
+        self.case_model = ArrayTableModel([], self.case_text, self)
+        self.case_view = QTableView()
+        self.case_view.setModel(self.case_model)
+        self.case_view.setSelectionBehavior(QTableView.SelectRows)
+        self.case_view.setSelectionMode(QTableView.SingleSelection)
+        self.case_view.selectionModel().selectionChanged.connect(self.show_strokes)
+
+        stroke_columns = [('stroke', '桨')] + [(n, rower_sim.STROKE_LABELS[n]) for n in rower_sim.STROKE_DTYPE.names]
+        self.stroke_model = ArrayTableModel(stroke_columns, self.stroke_text, self)
+        self.stroke_view = QTableView()
+        self.stroke_view.setModel(self.stroke_model)
+        self.lbl_case = QLabel('')
+        self.lbl_case.setWordWrap(True)
+        self.lbl_case.setTextInteractionFlags(Qt.TextSelectableByMouse)
+
+        right = QVBoxLayout()
+        right.addWidget(QLabel('各工况稳态结果（最后几桨的平均）'))
+        right.addWidget(self.case_view, 2)
+        right.addWidget(self.lbl_case)
+        right.addWidget(self.stroke_view, 1)
+
+        layout = QHBoxLayout()
+        layout.addWidget(param_box)
+        layout.addLayout(right, 1)
+        self.setLayout(layout)
+
+    # ---------------- 工况 ----------------
+    def axis_values(self):
+        """{参数: 取值数组}；输入有误时抛出 ValueError（提示中带参数名）。"""
+        values = {}
+        for name, edt in self.edits.items():
+            try:
+                values[name] = equipment.parse_values(edt.text())
+            except ValueError as e:
+                raise ValueError(f'{rower_sim.CASE_LABELS[name]}: {e}')
+        return values
+
+    def update_count(self, *args):
+        try:
+            values = self.axis_values()
+        except ValueError as e:
+            self.lbl_count.setText(str(e))
+            return
+        n = int(np.prod([len(v) for v in values.values()]))
+        self.lbl_count.setText(f'共 {n:,} 个工况')
+
+    def start(self):
+        self.stop()
+        try:
+            values = self.axis_values()
+            n = int(np.prod([len(v) for v in values.values()]))
+            if n > self.MAX_CASES:
+                raise ValueError(f'工况数 {n:,} 超过上限 {self.MAX_CASES:,}，请减少取值')
+            cases = rower_sim.grid(**values)
+            err = rower_sim.validate(cases)
+            if err:
+                raise ValueError(err)
+        except ValueError as e:
+            QMessageBox.warning(self, '错误', str(e))
+            return
+        self.cases = cases
+        self.axes = [name for name, v in values.items() if len(v) > 1]
+        self.n_strokes = self.strokes.value()
+        self.pending = np.zeros(len(cases), dtype=rower_sim.STROKE_DTYPE)
+        self.summary = self.stroke_rows = None
+        self.refresh_cases()
+        self.started = time.perf_counter()
+        self.worker = RowerWorker(cases, self.n_strokes, self)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.failed.connect(self.on_failed)
+        self.status.setText('计算中…')
+        self.worker.start()
+
+    def stop(self):
+        if self.worker is not None:
+            worker, self.worker = self.worker, None
+            worker.cancel()
+            worker.progress.disconnect(self.on_progress)
+            worker.failed.disconnect(self.on_failed)
+            worker.wait()
+            worker.deleteLater()
+
+    def on_progress(self, frac, start, stop, block):
+        # 已停止的旧线程排队中的信号（可能来自桨数不同的上一次仿真）
+        if self.worker is None or self.sender() is not self.worker:
+            return
+        self.pending[start:stop] = block
+        if frac < 1:
+            self.status.setText(f'{frac * 100:.0f}%')
+            return
+        self.summary, self.pending = self.pending, None
+        self.status.setText(f'完成：{len(self.cases):,} 个工况，用时 {time.perf_counter() - self.started:.1f} s')
+        self.refresh_cases()
+        self.case_view.selectRow(0)
+
+    def on_failed(self, msg):
+        if self.worker is None or self.sender() is not self.worker:
+            return
+        self.status.setText('')
+        QMessageBox.critical(self, '异常', f'划船器仿真时发生异常: {msg}')
+
+    # ---------------- 显示 ----------------
+    def refresh_cases(self):
+        columns = [('case', '#')] + [(n, rower_sim.CASE_LABELS[n]) for n in self.axes]
+        columns += [(n, rower_sim.STROKE_LABELS[n]) for n in self.SUMMARY]
+        self.case_model.reset(0 if self.summary is None else len(self.cases), columns)
+        self.show_strokes()
+
+    @staticmethod
+    def format_value(key, v):
+        if key == 'split':
+            return rower_sim.format_split(v)
+        if not np.isfinite(v):
+            return '-'
+        if key in ('rpm_min', 'rpm_max', 'power', 'work'):
+            return f'{v:.0f}'
+        return f'{v:.4g}'
+
+    def case_text(self, row, key):
+        if key == 'case':
+            return str(row + 1)
+        if key in rower_sim.CASE_DTYPE.names:
+            return f'{float(self.cases[key][row]):g}'
+        return self.format_value(key, float(self.summary[key][row]))
+
+    def stroke_text(self, row, key):
+        if key == 'stroke':
+            return str(row + 1)
+        return self.format_value(key, float(self.stroke_rows[1][key][row]))
+
+    def current_case(self):
+        if self.summary is None:
+            return None
+        rows = self.case_view.selectionModel().selectedRows()
+        row = rows[0].row() if rows else -1
+        return row if 0 <= row < len(self.cases) else None
+
+    def show_strokes(self, *args):
+        i = self.current_case()
+        if i is not None and (self.stroke_rows is None or self.stroke_rows[0] != i):
+            # 各工况互不影响，单独仿真与整批计算的结果相同
+            self.stroke_rows = i, rower_sim.simulate_block(self.cases[i:i + 1], self.n_strokes)[0]
+        self.stroke_model.reset(0 if i is None else self.n_strokes)
+        if i is None:
+            self.lbl_case.setText('')
+            return
+        case = self.cases[i]
+        params = '，'.join(f'{rower_sim.CASE_LABELS[n]} {float(case[n]):g}' for n in rower_sim.CASE_DTYPE.names)
+        inert = float(rower_sim.inertia(case))
+        self.lbl_case.setText(f'工况 {i + 1}：{params}；飞轮惯量 {inert:.4f} kg·m²')
+
+    def export_csv(self):
+        if self.summary is None:
+            QMessageBox.information(self, '提示', '请先完成仿真。')
+            return
+        path, _ = QFileDialog.getSaveFileName(self, '导出仿真结果', 'rower.csv', 'CSV (*.csv)')
+        if not path:
+            return
+        try:
+            equipment.write_csv(path, *rower_sim.case_rows(self.cases, self.summary))
+            QMessageBox.information(self, '导出', f'已导出到：{path}')
+        except Exception as e:
+            QMessageBox.warning(self, '错误', f'导出失败: {e}')
+
+
+def make_tab(window):
+    return RowerTab()
@@ -0,0 +1,143 @@
+"""型号搜索索引（不依赖 Qt）
+
+对型号名称与所有自定义字段的值建立单字 + 二元组（bigram）倒排索引：
+文本先做 NFKC 归一化并转小写（全角数字 / 字母与半角等价），
+中文没有空格分词，按字切分的 n-gram 可以直接做子串检索。
+
+查询按空白切成若干词，各词之间为“且”：
+- 单字词直接取该字的倒排集合；
+- 两字及以上取其所有 bigram 倒排集合的交集（从最小的集合开始），
+  超过两字时再对候选逐个确认子串，排除 bigram 拼凑出的误匹配。
+
+`update(name, texts)` / `remove(name)` 只改动该型号涉及的文本段与 n-gram，
+保存或删除单个型号时无需重建。
+"""
+import unicodedata
+
+
+def normalize(text):
+    """NFKC + casefold，用于索引与查询两侧。"""
+    return unicodedata.normalize('NFKC', text).casefold()
+
+
+def _grams(segment):
+    grams = set(segment)
+    grams.update(segment[i:i + 2] for i in range(len(segment) - 1))
+    return grams
+
+
+class SearchIndex:
+    """型号名称 -> 可检索文本的 n-gram 倒排索引。
+
+    倒排的单位是去重后的文本段（型号名称或某个字段值）而不是型号：
+    大量型号共用同一个字段值（如“家用”），该值只切分、索引一次，
+    查询时先找出匹配的文本段，再合并它们所属的型号。
+    """
+
+    def __init__(self):
+        self._postings = {}    # n-gram -> {文本段}
+        self._owners = {}      # 文本段 -> {型号}
+        self._docs = {}        # 型号 -> (文本段, ...)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, name):
+        return name in self._docs
+
+    def update(self, name, texts):
+        """新增或替换型号 `name` 的可检索文本（名称本身总会被索引）。"""
+        segs = [normalize(name)]
+        segs.extend(normalize(t) for t in texts if t)
+        segs = tuple(dict.fromkeys(segs))
+        old = self._docs.get(name, ())
+        for seg in old:
+            if seg not in segs:
+                self._release(seg, name)
+        owners = self._owners
+        for seg in segs:
+            bucket = owners.get(seg)
+            if bucket is None:
+                owners[seg] = {name}
+                self._add_segment(seg)
+            else:
+                bucket.add(name)
+        self._docs[name] = segs
+
+    def remove(self, name):
+        for seg in self._docs.pop(name, ()):
+            self._release(seg, name)
+
+    def _add_segment(self, seg):
+        postings = self._postings
+        for g in _grams(seg):
+            bucket = postings.get(g)
+            if bucket is None:
+                postings[g] = {seg}
+            else:
+                bucket.add(seg)
+
+    def _release(self, seg, name):
+        bucket = self._owners[seg]
+        bucket.discard(name)
+        if bucket:
+            return
+        del self._owners[seg]
+        for g in _grams(seg):
+            segs = self._postings[g]
+            segs.discard(seg)
+            if not segs:
+                del self._postings[g]
+
+    def _segments(self, term):
+        """包含 term 的文本段集合。"""
+        if len(term) == 1:
+            return self._postings.get(term, ())
+        buckets = []
+        for g in {term[i:i + 2] for i in range(len(term) - 1)}:
+            bucket = self._postings.get(g)
+            if not bucket:
+                return ()
+            buckets.append(bucket)
+        buckets.sort(key=len)
+        hits = buckets[0]
+        for bucket in buckets[1:]:
+            hits = hits & bucket
+            if not hits:
+                return hits
+        if len(term) > 2:
+            # 只有 bigram 全部出现还不够，确认确实是子串
+            hits = [seg for seg in hits if term in seg]
+        return hits
+
+    def _estimate(self, term):
+        """包含 term 的文本段数量上限（最小的 n-gram 倒排集合），不做交集。"""
+        grams = [term] if len(term) == 1 else [term[i:i + 2] for i in range(len(term) - 1)]
+        return min(len(self._postings.get(g, ())) for g in grams)
+
+    def query(self, text):
+        """返回匹配的型号集合；空查询返回 None（表示不过滤）。"""
+        terms = normalize(text).split()
+        if not terms:
+            return None
+        # 先算最具区分度的词；已有结果足够小时其余词逐个确认，不再求大集合的交集
+        owners = self._owners
+        docs = self._docs
+        result = None
+        for est, term in sorted((self._estimate(t), t) for t in set(terms)):
+            if result is None:
+                result = set().union(*[owners[seg] for seg in self._segments(term)])
+            elif len(result) < est:
+                result = {n for n in result if any(term in seg for seg in docs[n])}
+            else:
+                result &= set().union(*[owners[seg] for seg in self._segments(term)])
+            if not result:
+                return set()
+        return result
+
+    def matches(self, name, text):
+        """单个型号是否匹配查询（保存型号后判断其是否仍应显示）。"""
+        segs = self._docs.get(name)
+        if segs is None:
+            return False
+        return all(any(term in seg for seg in segs) for term in normalize(text).split())
@@ -0,0 +1,165 @@
+"""跑步机设计的灵敏度（雅可比矩阵），整目录批量计算（不依赖 Qt）
+
+跑带时速与滚筒转速都是各输入的幂积：
+
+    belt_kmh   = K · roller_diameter · motor_rpm · motor_pulley_d / roller_pulley_d [· sec2 / sec1]
+    roller_rpm =                        motor_rpm · motor_pulley_d / roller_pulley_d [· sec2 / sec1]
+
+因此偏导数有闭式解 ∂y/∂x = e · y / x（e 为 x 在 y 中的指数，见 ELASTICITY），
+对整列数组一次求出，不需要数值差分。未启用二级传动的设计对 sec1/sec2 的偏导为 NaN。
+
+设计取求解后的完整参数：有唯一留空项的按闭式解补全，参数完整的直接使用；
+多项留空或数值无效的设计没有确定的参数，整行为 NaN。
+
+`dominant` 给出对时速影响最大的尺寸（带轮 / 滚筒直径，按每 mm 的时速变化），
+即同样的 mm 级公差下最需要控制的尺寸。
+"""
+import numpy as np
+
+import drivetrain
+
+# 求偏导的输入与输出
+SENS_INPUTS = drivetrain.DRIVE_VARS[:6]
+SENS_OUTPUTS = ('belt_kmh', 'roller_rpm')
+# 长度尺寸 (mm)，用于比较“哪个尺寸主导时速误差”
+DIMENSIONS = ('motor_pulley_d', 'sec1', 'sec2', 'roller_pulley_d', 'roller_diameter')
+
+INPUT_LABELS = {
+    'motor_rpm': '电机转速',
+    'motor_pulley_d': '电机带轮',
+    'sec1': '二级带轮（电机侧）',
+    'sec2': '二级带轮（滚筒侧）',
+    'roller_pulley_d': '滚筒带轮',
+    'roller_diameter': '滚筒直径',
+}
+OUTPUT_LABELS = {'belt_kmh': '跑带时速', 'roller_rpm': '滚筒转速'}
+
+# 输出对各输入的指数 d ln(y) / d ln(x)
+ELASTICITY = {
+    'belt_kmh': dict(zip(SENS_INPUTS, drivetrain.DRIVE_EXPONENTS[:6].tolist())),
+    'roller_rpm': dict(zip(SENS_INPUTS, drivetrain.DRIVE_EXPONENTS[:5].tolist() + [0.0])),
+}
+
+
+def column(output, inp):
+    """雅可比数组中 ∂output/∂inp 的字段名，如 'belt_kmh/roller_diameter'。"""
+    return f'{output}/{inp}'
+
+
+JACOBIAN_DTYPE = np.dtype(
+    [(column(o, x), 'f8') for o in SENS_OUTPUTS for x in SENS_INPUTS] + [
+        ('dominant', 'i1'),   # 主导尺寸在 DIMENSIONS 中的下标，-1 表示无
+    ])
+
+
+def jacobian(design):
+    """求解后的设计（含 DRIVE_VARS 与 roller_rpm 的结构化数组）-> JACOBIAN_DTYPE 数组。"""
+    n = design.shape[0]
+    out = np.empty(n, dtype=JACOBIAN_DTYPE)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for o in SENS_OUTPUTS:
+            y = design[o]
+            for x in SENS_INPUTS:
+                e = ELASTICITY[o][x]
+                if e == 0:
+                    out[column(o, x)] = np.where(np.isfinite(y), 0.0, np.nan)
+                else:
+                    out[column(o, x)] = e * y / design[x]
+    mags = np.column_stack([np.abs(out[column('belt_kmh', x)]) for x in DIMENSIONS])
+    valid = ~np.isnan(mags)
+    out['dominant'] = np.where(valid.any(axis=1), np.where(valid, mags, -np.inf).argmax(axis=1), -1)
+    return out
+
+
+def solve_designs(inputs):
+    """输入列（INPUT_KEYS 与 use_secondary，见 recompute.gather_inputs）-> 补全后的设计。
+
+    只有留空项不多于一个且数值有效的行有结果，其余整行为 NaN。
+    """
+    drv = drivetrain.solve_drive(inputs['motor_rpm'], inputs['motor_pulley_d'], inputs['sec1'], inputs['sec2'],
+                                 inputs['roller_pulley_d'], inputs['roller_diameter'], inputs['belt_kmh'],
+                                 use_secondary=inputs['use_secondary'])
+    bad = (drv['n_unknown'] > 1) | (drv['error'] != drivetrain.OK)
+    for name in drivetrain.DRIVE_VARS + ('roller_rpm', 'gear_ratio'):
+        drv[name][bad] = np.nan
+    return drv
+
+
+def catalog_jacobian(catalog, names=None):
+    """整个目录（或 names 中的型号）的雅可比数组，行顺序为 (names, 数组) 中的 names。"""
+    cols = catalog.columns(names)
+    inputs = {key: cols.number(key) for key in drivetrain.DRIVE_VARS}
+    inputs['use_secondary'] = cols.flag()
+    return list(cols.names), jacobian(solve_designs(inputs))
+
+
+def design_sensitivity(values):
+    """单个设计（{变量: 值或 None}，如 live_calc 的求解结果）-> {(输出, 输入): 偏导或 None}。"""
+    if not values:
+        return {}
+    design = np.empty(1, dtype=drivetrain.DRIVE_DTYPE)
+    for name in drivetrain.DRIVE_VARS + ('roller_rpm',):
+        v = values.get(name)
+        design[name] = np.nan if v is None else v
+    row = jacobian(design)[0]
+    out = {}
+    for o in SENS_OUTPUTS:
+        for x in SENS_INPUTS:
+            v = float(row[column(o, x)])
+            out[(o, x)] = v if np.isfinite(v) else None
+    return out
+
+
+class CatalogSensitivity:
+    """目录中各型号的灵敏度：整体批量计算一次，之后按型号增量更新。"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.rebuild()
+
+    def rebuild(self, catalog=None):
+        if catalog is not None:
+            self.catalog = catalog
+        names, self._table = catalog_jacobian(self.catalog)
+        self._index = {name: i for i, name in enumerate(names)}
+        self._extra = {}   # 之后新增 / 修改的型号 -> 单行
+
+    def update(self, name):
+        """型号已保存：只重算这一行。"""
+        if name not in self.catalog:
+            self.remove(name)
+            return
+        row = catalog_jacobian(self.catalog, [name])[1][0]
+        i = self._index.get(name)
+        if i is None:
+            self._extra[name] = row
+        else:
+            self._table[i] = row
+
+    def remove(self, name):
+        self._extra.pop(name, None)
+        i = self._index.pop(name, None)
+        if i is not None:
+            self._table['dominant'][i] = -1
+
+    def row(self, name):
+        row = self._extra.get(name)
+        if row is not None:
+            return row
+        i = self._index.get(name)
+        return None if i is None else self._table[i]
+
+    def value(self, name, field):
+        """∂output/∂inp（field 为 column(...) 的字段名）或 None。"""
+        row = self.row(name)
+        if row is None:
+            return None
+        v = float(row[field])
+        return v if np.isfinite(v) else None
+
+    def dominant(self, name):
+        """主导尺寸的字段名或 None。"""
+        row = self.row(name)
+        if row is None or row['dominant'] < 0:
+            return None
+        return DIMENSIONS[int(row['dominant'])]
@@ -0,0 +1,179 @@
+"""启动快照缓存与启动计时（不依赖 Qt）
+
+冷启动时型号目录、字段列表与界面偏好都要从 SQLite / JSON 解析；
+`SnapshotCache` 把解析结果以 pickle 形式保存在 startup.cache 中，
+下次启动一次性反序列化即可。
+
+每个缓存条目记录其源文件的指纹（mtime、大小、内容哈希）：
+mtime 或大小不同直接判定失效；两者相同时再比较 BLAKE2 哈希，
+防止同一时间戳内的修改被漏掉。任一源文件变化就回退到正常解析。
+
+`StartupTimer` 记录启动各阶段耗时，设置环境变量
+FITNESS_TOOLBOX_TIMING=1 或以 `--timing` 启动时输出报告，
+用于比较打包后 FitnessToolbox.exe 的冷启动与热启动。
+"""
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+CACHE_VERSION = 2
+
+
+def file_fingerprint(path, with_hash=True):
+    """(mtime_ns, size, blake2b) ；文件不存在时返回 None。"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    digest = None
+    if with_hash:
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+    return (st.st_mtime_ns, st.st_size, digest)
+
+
+class SnapshotCache:
+    """按名称保存 (源文件指纹, 解析结果)。"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.hits = []
+        self.misses = []
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                data = pickle.load(f)
+            if data.get('version') == CACHE_VERSION:
+                self.entries = data.get('entries', {})
+        except Exception:
+            self.entries = {}
+
+    def get(self, name, sources):
+        """源文件未变化时返回缓存的结果，否则返回 None。"""
+        entry = self.entries.get(name)
+        if entry is not None:
+            fps, payload = entry
+            if self._valid(fps, sources):
+                self.hits.append(name)
+                return payload
+        self.misses.append(name)
+        return None
+
+    @staticmethod
+    def _valid(fps, sources):
+        if len(fps) != len(sources):
+            return False
+        for fp, src in zip(fps, sources):
+            quick = file_fingerprint(src, with_hash=False)
+            if fp is None or quick is None:
+                if fp != quick:
+                    return False
+                continue
+            if quick[:2] != fp[:2]:
+                return False
+            if file_fingerprint(src)[2] != fp[2]:
+                return False
+        return True
+
+    def put(self, name, sources, payload):
+        self.entries[name] = ([file_fingerprint(src) for src in sources], payload)
+        self._dirty = True
+
+    def save(self):
+        """原子地写回缓存文件。"""
+        if not self._dirty:
+            return
+        fd, tmp = tempfile.mkstemp(prefix='startup.', suffix='.tmp',
+                                   dir=os.path.dirname(os.path.abspath(self.path)))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump({'version': CACHE_VERSION, 'entries': self.entries}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        self._dirty = False
+
+    def load_json(self, path, default=None):
+        """带缓存地读取 JSON 文件（界面偏好等）。"""
+        payload = self.get(('json', path), [path])
+        if payload is not None:
+            return payload
+        data = default
+        try:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+        except Exception:
+            data = default
+        self.put(('json', path), [path], data)
+        return data
+
+
+_cache = None
+
+
+def get_cache(base_dir):
+    """进程内共享的启动缓存（同一份解析结果供各选项卡使用）。"""
+    global _cache
+    if _cache is None:
+        _cache = SnapshotCache(os.path.join(base_dir, 'startup.cache'))
+    return _cache
+
+
+class StartupTimer:
+    """记录启动各阶段的时间点（相对进程内第一次计时）。"""
+
+    def __init__(self, t0=None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.marks = []
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter() - self.t0))
+
+    def enabled(self):
+        return os.environ.get('FITNESS_TOOLBOX_TIMING') == '1' or '--timing' in sys.argv
+
+    def report(self, base_dir, cache=None):
+        """输出到 stderr 并追加到 startup_timing.jsonl（打包的窗口程序没有控制台）。"""
+        if not self.enabled():
+            return
+        state = 'n/a'
+        if cache is not None:
+            state = 'warm' if cache.hits and not cache.misses else ('cold' if not cache.hits else 'partial')
+        rec = {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'frozen': bool(getattr(sys, 'frozen', False)),
+            'cache': state,
+            'marks': {name: round(t * 1000.0, 1) for name, t in self.marks},
+        }
+        lines = [f'startup ({state} cache):']
+        prev = 0.0
+        for name, t in self.marks:
+            lines.append(f'  {name:<24} {t * 1000.0:8.1f} ms  (+{(t - prev) * 1000.0:.1f})')
+            prev = t
+        try:
+            sys.stderr.write('\n'.join(lines) + '\n')
+        except Exception:
+            pass
+        try:
+            with open(os.path.join(base_dir, 'startup_timing.jsonl'), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + '\n')
+        except Exception:
+            pass
+
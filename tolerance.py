@@ -0,0 +1,268 @@
+"""跑带时速的蒙特卡洛公差分析（不依赖 Qt）
+
+给定一组名义设计（各带轮直径、滚筒直径、电机转速）与各尺寸的公差分布，
+再加上跑带打滑率，随机抽取大量“生产样机”并统计它们的实际跑带时速：
+
+    belt_kmh = K · roller_diameter · motor_rpm · 总传动比 · (1 - slip / 100)
+
+- 公差写作 ±tol：'uniform' 为 [名义 - tol, 名义 + tol] 上的均匀分布，
+  'normal' 为正态分布且 tol 取 3σ（约 99.7% 的零件落在 ±tol 内）；
+- 样本分片（shard）生成，每片的随机数种子由 `np.random.SeedSequence(seed).spawn`
+  派生，结果只取决于 seed 与样本数，与进程数、完成顺序无关；
+- 每片只返回汇总量（细分直方图、求和、最值、超出规格的计数），不返回样本本身，
+  因此千万级样本的内存占用也只有一片的大小；分位数由细分直方图插值得到，
+  误差不超过一个细分格宽。
+
+`iter_simulate` 是生成器，每完成一片产出 (进度 0~1, 当前累计结果)，界面可以边算边显示；
+样本较多且有多个 CPU 时分片交给进程池。
+"""
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+import drivetrain
+
+# 参与分析的变量（sec1/sec2 只在二级传动时使用）；slip 单位为 %
+VARIABLES = ('motor_rpm', 'motor_pulley_d', 'sec1', 'sec2', 'roller_pulley_d', 'roller_diameter', 'slip')
+# 各变量在时速公式中的指数（slip 单独处理）
+_EXPONENTS = dict(zip(drivetrain.DRIVE_VARS[:6], drivetrain.DRIVE_EXPONENTS[:6]))
+
+DISTRIBUTIONS = ('normal', 'uniform')
+DIST_LABELS = {'normal': '正态 (±tol = 3σ)', 'uniform': '均匀'}
+
+SHARD_SIZE = 250000
+# 少于这么多样本时在本进程计算
+PARALLEL_MIN = 2000000
+# 细分直方图的格数（分位数的分辨率）
+FINE_BINS = 20000
+
+DEFAULT_PERCENTILES = (0.1, 1.0, 5.0, 50.0, 95.0, 99.0, 99.9)
+
+
+class VariableTolerance:
+    """单个变量的名义值、公差 (±tol，与名义值同单位) 与分布类型。"""
+
+    __slots__ = ('name', 'nominal', 'tol', 'dist')
+
+    def __init__(self, name, nominal, tol=0.0, dist='normal'):
+        if name not in VARIABLES:
+            raise ValueError(f'未知变量: {name}')
+        if dist not in DISTRIBUTIONS:
+            raise ValueError(f'未知分布: {dist}')
+        if not tol >= 0:
+            raise ValueError(f'{name} 的公差不能为负')
+        self.name = name
+        self.nominal = float(nominal)
+        self.tol = float(tol)
+        self.dist = dist
+
+    def __getstate__(self):
+        return (self.name, self.nominal, self.tol, self.dist)
+
+    def __setstate__(self, state):
+        self.name, self.nominal, self.tol, self.dist = state
+
+    def sample(self, rng, n):
+        if self.tol == 0:
+            return np.full(n, self.nominal)
+        if self.dist == 'uniform':
+            return rng.uniform(self.nominal - self.tol, self.nominal + self.tol, n)
+        return rng.normal(self.nominal, self.tol / 3.0, n)
+
+    def span(self):
+        """抽样值可能偏离名义值的大致范围（正态取 6σ）。"""
+        return self.tol if self.dist == 'uniform' else 2.0 * self.tol
+
+
+def belt_kmh(values, use_secondary):
+    """{变量: 数组} -> 跑带时速数组（含打滑）。"""
+    ratio = drivetrain.gear_ratio_total(values['motor_pulley_d'], values['roller_pulley_d'], use_secondary,
+                                        values.get('sec1'), values.get('sec2'))
+    kmh = drivetrain.belt_kmh_from_roller_rpm(values['motor_rpm'] * ratio, values['roller_diameter'])
+    return kmh * (1.0 - values['slip'] / 100.0)
+
+
+def _active(tolerances, use_secondary):
+    return [t for t in tolerances if use_secondary or t.name not in ('sec1', 'sec2')]
+
+
+def nominal_kmh(tolerances, use_secondary):
+    vals = {t.name: np.array([t.nominal]) for t in _active(tolerances, use_secondary)}
+    return float(belt_kmh(vals, use_secondary)[0])
+
+
+def _edges(tolerances, use_secondary):
+    """细分直方图的边界：名义时速按各变量的最大偏离做一阶传播，再留出余量。"""
+    center = nominal_kmh(tolerances, use_secondary)
+    rel = 0.0
+    for t in _active(tolerances, use_secondary):
+        if t.name == 'slip':
+            rel += t.span() / max(1e-9, 100.0 - t.nominal)
+        elif t.nominal:
+            rel += abs(_EXPONENTS[t.name]) * t.span() / abs(t.nominal)
+    half = max(abs(center) * rel * 1.2, abs(center) * 1e-6, 1e-9)
+    return np.linspace(center - half, center + half, FINE_BINS + 1)
+
+
+def simulate_shard(tolerances, use_secondary, n, seed_seq, edges, spec_min=None, spec_max=None):
+    """一片样本的汇总量（供进程池调用，返回值只含数值与数组）。"""
+    rng = np.random.default_rng(seed_seq)
+    vals = {t.name: t.sample(rng, n) for t in _active(tolerances, use_secondary)}
+    kmh = belt_kmh(vals, use_secondary)
+    center = 0.5 * (edges[0] + edges[-1])
+    d = kmh - center
+    counts, _ = np.histogram(kmh, bins=edges)
+    return {
+        'n': n,
+        'counts': counts,
+        'under': int((kmh < edges[0]).sum()),
+        'over': int((kmh > edges[-1]).sum()),
+        # 相对中心求和，避免平方和的抵消误差
+        'sum': float(d.sum()),
+        'sumsq': float((d * d).sum()),
+        'min': float(kmh.min()),
+        'max': float(kmh.max()),
+        'below': int((kmh < spec_min).sum()) if spec_min is not None else 0,
+        'above': int((kmh > spec_max).sum()) if spec_max is not None else 0,
+    }
+
+
+class ToleranceResult:
+    """累计的统计结果。"""
+
+    def __init__(self, edges, nominal, spec_min=None, spec_max=None):
+        self.edges = edges
+        self.nominal = nominal
+        self.spec_min = spec_min
+        self.spec_max = spec_max
+        self.n = 0
+        self.counts = np.zeros(len(edges) - 1, dtype=np.int64)
+        self.under = self.over = 0
+        self.below = self.above = 0
+        self._sum = self._sumsq = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def copy(self):
+        """当前累计值的副本（后台线程继续累加时交给界面显示）。"""
+        other = object.__new__(ToleranceResult)
+        other.__dict__.update(self.__dict__)
+        other.counts = self.counts.copy()
+        return other
+
+    def add(self, shard):
+        self.n += shard['n']
+        self.counts += shard['counts']
+        self.under += shard['under']
+        self.over += shard['over']
+        self.below += shard['below']
+        self.above += shard['above']
+        self._sum += shard['sum']
+        self._sumsq += shard['sumsq']
+        self.min = min(self.min, shard['min'])
+        self.max = max(self.max, shard['max'])
+
+    @property
+    def mean(self):
+        center = 0.5 * (self.edges[0] + self.edges[-1])
+        return center + self._sum / self.n if self.n else float('nan')
+
+    @property
+    def std(self):
+        if self.n < 2:
+            return float('nan')
+        m = self._sum / self.n
+        return float(np.sqrt(max(0.0, (self._sumsq - self.n * m * m) / (self.n - 1))))
+
+    @property
+    def fraction_out(self):
+        """超出规格（低于 spec_min 或高于 spec_max）的比例。"""
+        return (self.below + self.above) / self.n if self.n else float('nan')
+
+    def percentile(self, q):
+        """第 q 百分位（0~100），在细分直方图内线性插值。"""
+        if not self.n:
+            return float('nan')
+        target = q / 100.0 * self.n
+        if target <= self.under:
+            return self.min
+        cum = self.under + np.cumsum(self.counts)
+        i = int(np.searchsorted(cum, target))
+        if i >= len(self.counts):
+            return self.max
+        before = cum[i] - self.counts[i]
+        frac = (target - before) / self.counts[i] if self.counts[i] else 0.0
+        value = self.edges[i] + frac * (self.edges[i + 1] - self.edges[i])
+        return float(min(max(value, self.min), self.max))
+
+    def percentiles(self, qs=DEFAULT_PERCENTILES):
+        return {q: self.percentile(q) for q in qs}
+
+    def histogram(self, bins=40):
+        """显示用的直方图 (边界, 计数)：细分格合并为约 bins 个，只覆盖有样本的范围。"""
+        nz = np.flatnonzero(self.counts)
+        if not len(nz):
+            return self.edges[[0, -1]], np.array([self.n])
+        lo, hi = nz[0], nz[-1] + 1
+        starts = np.unique(np.linspace(lo, hi, bins + 1).astype(int))[:-1]
+        counts = np.add.reduceat(self.counts[lo:hi], starts - lo)
+        edges = np.append(self.edges[starts], self.edges[hi])
+        # 超出细分范围的样本计入两端
+        counts[0] += self.under
+        counts[-1] += self.over
+        return edges, counts
+
+
+def iter_simulate(tolerances, use_secondary=False, n_samples=1000000, seed=0, spec_min=None, spec_max=None,
+                  shard_size=SHARD_SIZE, workers=None):
+    """抽样统计跑带时速，每完成一片产出 (进度 0~1, ToleranceResult)。
+
+    - `tolerances`：VariableTolerance 列表，缺少的变量按公差 0 处理（slip 默认 0%）；
+    - `spec_min` / `spec_max`：额定时速的允许范围，用于统计不合格比例；
+    - 结果只取决于 seed 与 n_samples（以及 shard_size），与进程数无关。
+    """
+    given = {t.name: t for t in tolerances}
+    missing = [v for v in VARIABLES if v not in given and v != 'slip'
+               and (use_secondary or v not in ('sec1', 'sec2'))]
+    if missing:
+        raise ValueError('缺少名义值: ' + ', '.join(missing))
+    given.setdefault('slip', VariableTolerance('slip', 0.0))
+    tolerances = tuple(given[v] for v in VARIABLES if v in given)
+    edges = _edges(tolerances, use_secondary)
+    result = ToleranceResult(edges, nominal_kmh(tolerances, use_secondary), spec_min, spec_max)
+    sizes = [min(shard_size, n_samples - i) for i in range(0, n_samples, shard_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(tolerances, use_secondary, n, s, edges, spec_min, spec_max) for n, s in zip(sizes, seeds)]
+
+    workers = min(len(args), workers or os.cpu_count() or 1)
+    if n_samples < PARALLEL_MIN or workers < 2:
+        for i, a in enumerate(args):
+            result.add(simulate_shard(*a))
+            yield (i + 1) / len(args), result
+        return
+    # 按片的顺序累加（浮点求和的顺序固定，结果可复现）
+    done = {}
+    next_i = 0
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        pending = {pool.submit(simulate_shard, *a): i for i, a in enumerate(args)}
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                done[pending.pop(fut)] = fut.result()
+            while next_i in done:
+                result.add(done.pop(next_i))
+                next_i += 1
+            yield next_i / len(args), result
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def simulate(tolerances, **kwargs):
+    """iter_simulate 的一次性版本，返回最终的 ToleranceResult。"""
+    result = None
+    for _, result in iter_simulate(tolerances, **kwargs):
+        pass
+    return result
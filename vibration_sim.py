@@ -0,0 +1,95 @@
+"""抖抖机（振动平台）：电机转速 + 偏心块 -> 振动频率、振幅、激振力（不依赖 Qt）
+
+偏心块质量 m_e、偏心距 e，转速 ω 时的离心激振力 F = m_e·e·ω²。平台与参与振动的
+人体等效质量之和 M 支承在刚度 k、阻尼比 ζ 的减振垫上，稳态受迫振动为
+
+    r = ω / ωn,  ωn = √(k / M)
+    X = (m_e·e / M) · r² / √((1 − r²)² + (2ζr)²)     （单边振幅）
+    a = X·ω²                                        （平台加速度峰值）
+    F_T = k·X·√(1 + (2ζr)²)                         （传到地面的力）
+
+偏心块质量与电机转速的全部组合一次向量化求出。
+"""
+import numpy as np
+
+from equipment import Column, Param
+
+G = 9.81
+RPM_TO_RAD = 2.0 * np.pi / 60.0
+# 频率比在 1 ± RESONANCE_BAND 之内视为接近共振
+RESONANCE_BAND = 0.2
+
+PARAMS = (
+    Param('motor_rpm', '电机转速 (RPM)', '600:3000:300', True),
+    Param('eccentric_mass', '偏心块质量 (kg)', '1.0', True),
+    Param('eccentric_radius', '偏心距 (mm)', 25.0),
+    Param('plate_mass', '平台质量 (kg)', 12.0),
+    Param('body_mass', '人体等效质量 (kg)', 25.0),
+    Param('stiffness', '减振垫刚度 (kN/m)', 150.0),
+    Param('damping', '阻尼比', 0.08),
+)
+
+COLUMNS = (
+    Column('eccentric_mass', '偏心块 (kg)', 'g'),
+    Column('motor_rpm', '电机转速', '.0f'),
+    Column('frequency', '频率 (Hz)', '.1f'),
+    Column('ratio', '频率比', '.2f'),
+    Column('force', '激振力 (N)', '.0f'),
+    Column('amplitude', '振幅 (mm)', '.2f'),
+    Column('accel_g', '加速度 (g)', '.2f'),
+    Column('transmitted', '传到地面的力 (N)', '.0f'),
+)
+
+RESULT_DTYPE = np.dtype([(c.key, 'f8') for c in COLUMNS])
+
+
+def natural_frequency(mass, stiffness):
+    """总质量 (kg) 与刚度 (N/m) -> 固有角频率 (rad/s)。"""
+    return np.sqrt(stiffness / mass)
+
+
+def response(motor_rpm, eccentric_mass, eccentric_radius, mass, stiffness, damping):
+    """稳态响应（参数可为数组，按广播计算），返回 RESULT_DTYPE 数组；长度单位 m、刚度 N/m。"""
+    rpm, me = np.broadcast_arrays(np.asarray(motor_rpm, dtype=float), np.asarray(eccentric_mass, dtype=float))
+    omega = rpm * RPM_TO_RAD
+    r = omega / natural_frequency(mass, stiffness)
+    damp = 2.0 * damping * r
+    x = me * eccentric_radius / mass * r * r / np.sqrt((1.0 - r * r) ** 2 + damp * damp)
+    out = np.empty(rpm.shape, dtype=RESULT_DTYPE)
+    out['eccentric_mass'] = me
+    out['motor_rpm'] = rpm
+    out['frequency'] = rpm / 60.0
+    out['ratio'] = r
+    out['force'] = me * eccentric_radius * omega * omega
+    out['amplitude'] = x * 1000.0
+    out['accel_g'] = x * omega * omega / G
+    out['transmitted'] = stiffness * x * np.sqrt(1.0 + damp * damp)
+    return out
+
+
+def solve(values):
+    rpm = np.asarray(values['motor_rpm'], dtype=float)
+    me = np.asarray(values['eccentric_mass'], dtype=float)
+    radius = float(values['eccentric_radius']) / 1000.0
+    mass = float(values['plate_mass']) + float(values['body_mass'])
+    stiffness = float(values['stiffness']) * 1000.0
+    damping = float(values['damping'])
+    if not (rpm > 0).all():
+        raise ValueError('电机转速必须为正')
+    if not (me > 0).all() or not radius > 0:
+        raise ValueError('偏心块质量与偏心距必须为正')
+    if not (mass > 0 and stiffness > 0):
+        raise ValueError('总质量与刚度必须为正')
+    if damping < 0:
+        raise ValueError('阻尼比不能为负')
+    rows = response(rpm[None, :], me[:, None], radius, mass, stiffness, damping).ravel()
+
+    wn = natural_frequency(mass, stiffness)
+    notes = [f'固有频率 {wn / (2 * np.pi):.1f} Hz（电机 {wn / RPM_TO_RAD:.0f} RPM），总质量 {mass:g} kg']
+    near = np.unique(rows['motor_rpm'][np.abs(rows['ratio'] - 1.0) < RESONANCE_BAND])
+    if len(near):
+        notes.append('接近共振的转速：' + '，'.join(f'{v:g}' for v in near) + ' RPM')
+    amplified = np.unique(rows['motor_rpm'][rows['transmitted'] > rows['force']])
+    if len(amplified):
+        notes.append('传到地面的力大于激振力（减振无效）的转速：' + '，'.join(f'{v:g}' for v in amplified) + ' RPM')
+    return rows, notes
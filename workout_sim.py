@@ -0,0 +1,359 @@
+"""跑步机电机负载的时序仿真（不依赖 Qt）
+
+输入为一段训练计划（速度 / 坡度随时间变化，见 Profile）与若干型号的传动参数
+（DriveSet），按固定采样率（10~100 Hz）逐块产出电机转速、转矩、功率与跑带速度误差。
+采用准静态模型，每个采样点独立计算：
+
+    跑带阻力    F = m·g·(μ·cosθ + sinθ) + F0 + m_eq·a
+    滚筒转矩    T_r = F · D / 2，电机转矩 T = T_r · 传动比 / η（制动时 × η）
+    电机转速    n = 滚筒转速 / 传动比，功率 P = T · 2πn / 60
+
+其中 m 为跑者体重，μ 为跑带与跑板的摩擦系数，θ 为坡度角，F0 为跑带 / 滚筒的
+固定损耗，m_eq 为跑带、滚筒与电机转子折算到跑带上的等效质量，a 为计划中的加速度
+（关键点之间线性变化，取解析斜率）。坡度项按电机选型的惯例保守计入。
+
+跑带实际速度取计划速度、设计最高时速（型号的 belt_kmh × overspeed）与峰值功率
+（motor_power × peak_factor）所能维持的速度三者中的最小值，差值即速度误差。
+
+- `simulate` 是生成器，每块只含 CHUNK_ELEMENTS 个左右的采样（型号越多每块的时间
+  越短），几小时的计划也不会在内存中保留整条曲线；
+- `DutyCycle` 逐块累计峰值、均方根功率 / 转矩、超额定时间等，用于对照 motor_power；
+- `iter_duty` 把“型号块 × 计划”交给进程池，只返回汇总量。
+"""
+import csv
+import json
+import math
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+import drivetrain
+import sensitivity
+
+G = 9.81
+
+RATE_HZ = 50.0
+RATE_RANGE = (10.0, 100.0)
+# 每块每个量的采样数上限（型号数 × 时间点）
+CHUNK_ELEMENTS = 1 << 16
+# 进程池中每个任务的型号数
+MODEL_BLOCK = 256
+# 总采样数（型号 × 时间点 × 计划）少于这么多时在本进程计算
+PARALLEL_MIN = 50000000
+# from_segments 中相邻两段之间的速度 / 坡度过渡时间（秒）
+RAMP_S = 3.0
+# 速度误差超过这么多 (km/h) 才算跟不上计划
+SPEED_TOL = 0.05
+
+Load = namedtuple('Load', 'user_kg friction drag_n rotating_kg efficiency peak_factor overspeed')
+Load.__doc__ = """负载与电机假设：
+
+- user_kg：跑者体重 (kg)；friction：跑带与跑板的摩擦系数；drag_n：固定损耗 (N)；
+- rotating_kg：跑带、滚筒与转子折算到跑带上的等效质量 (kg)；efficiency：传动效率；
+- peak_factor：短时峰值功率 / 额定功率；overspeed：允许的最高转速 / 设计转速。"""
+DEFAULT_LOAD = Load(user_kg=100.0, friction=0.08, drag_n=25.0, rotating_kg=15.0, efficiency=0.85,
+                    peak_factor=2.0, overspeed=1.0)
+
+# 每块的输出：t / speed_target / incline 为 (m,)，其余为 (型号数, m)
+TraceChunk = namedtuple('TraceChunk', 't speed_target incline belt_kmh speed_error motor_rpm torque power')
+
+
+class Profile:
+    """训练计划：关键点 (秒, km/h, 坡度 %) 之间线性插值；时间须严格递增。"""
+
+    def __init__(self, times, speed_kmh, incline_pct=None, name=''):
+        t = np.asarray(times, dtype=float)
+        v = np.asarray(speed_kmh, dtype=float)
+        inc = np.zeros_like(t) if incline_pct is None else np.asarray(incline_pct, dtype=float)
+        if t.ndim != 1 or not len(t) or v.shape != t.shape or inc.shape != t.shape:
+            raise ValueError('时间、速度、坡度的关键点数量必须相同且不为空')
+        if not (np.isfinite(t).all() and np.isfinite(v).all() and np.isfinite(inc).all()):
+            raise ValueError('关键点含有无效数值')
+        if (np.diff(t) <= 0).any():
+            raise ValueError('关键点的时间必须严格递增')
+        if (v < 0).any():
+            raise ValueError('速度不能为负')
+        self.times = t - t[0]
+        self.speed_kmh = v
+        self.incline_pct = inc
+        self.name = name
+        # 各区间的斜率（最后一个关键点之后保持不变）
+        dt = np.diff(self.times)
+        self._dv = np.append(np.diff(v) / dt, 0.0)
+
+    @classmethod
+    def from_segments(cls, segments, ramp_s=RAMP_S, name=''):
+        """[(持续秒数, km/h, 坡度 %), ...]：每段保持恒定，段首用 ramp_s 秒从上一段过渡。"""
+        times, speeds, inclines = [0.0], [0.0], [0.0]
+        t = 0.0
+        for duration, kmh, incline in segments:
+            duration = float(duration)
+            if not duration > 0:
+                raise ValueError('每段的持续时间必须为正')
+            ramp = min(max(ramp_s, 1e-3), duration / 2.0)
+            times += [t + ramp, t + duration]
+            speeds += [float(kmh)] * 2
+            inclines += [float(incline)] * 2
+            t += duration
+        if len(times) == 1:
+            raise ValueError('训练计划为空')
+        return cls(times, speeds, inclines, name)
+
+    @property
+    def duration(self):
+        return float(self.times[-1])
+
+    def n_samples(self, rate_hz):
+        return int(math.floor(self.duration * rate_hz + 1e-9)) + 1
+
+    def sample(self, t):
+        """时间数组 -> (速度 km/h, 坡度 %, 加速度 m/s²)。"""
+        kmh = np.interp(t, self.times, self.speed_kmh)
+        incline = np.interp(t, self.times, self.incline_pct)
+        i = np.clip(np.searchsorted(self.times, t, side='right') - 1, 0, len(self.times) - 1)
+        return kmh, incline, self._dv[i] / 3.6
+
+    def to_dict(self):
+        return {'name': self.name, 'points': np.column_stack(
+            [self.times, self.speed_kmh, self.incline_pct]).tolist()}
+
+
+def load_profile(path):
+    """读取训练计划文件。
+
+    - JSON：{"name": ..., "segments": [[秒, km/h, 坡度], ...]} 或 {"points": [[t, km/h, 坡度], ...]}；
+    - CSV：每行 t,km/h[,坡度]，允许有一行表头（如导出的跑步记录）。
+    """
+    default_name = os.path.splitext(os.path.basename(path))[0]
+    if path.lower().endswith('.csv'):
+        rows = []
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            for row in csv.reader(f):
+                if not row or not ''.join(row).strip():
+                    continue
+                try:
+                    rows.append([float(x) for x in row[:3]])
+                except ValueError:
+                    if rows:
+                        raise ValueError(f'{path}: 无法解析的行 {row}')
+                    continue  # 表头
+        if not rows:
+            raise ValueError(f'{path}: 没有数据')
+        pts = np.array([r + [0.0] * (3 - len(r)) for r in rows])
+        return Profile(pts[:, 0], pts[:, 1], pts[:, 2], default_name)
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    name = data.get('name') or default_name
+    if 'segments' in data:
+        return Profile.from_segments(data['segments'], float(data.get('ramp_s', RAMP_S)), name)
+    pts = np.array(data.get('points') or [], dtype=float)
+    if pts.ndim != 2 or pts.shape[1] < 2:
+        raise ValueError(f'{path}: 需要 segments 或 points')
+    return Profile(pts[:, 0], pts[:, 1], pts[:, 2] if pts.shape[1] > 2 else None, name)
+
+
+class DriveSet:
+    """若干型号的传动参数（长度相同的数组）：额定功率 (W)、设计转速、
+    总传动比（滚筒 / 电机）、滚筒直径 (mm) 与设计时速。"""
+
+    FIELDS = ('motor_power', 'motor_rpm', 'gear_ratio', 'roller_diameter', 'top_kmh')
+
+    def __init__(self, names, motor_power, motor_rpm, gear_ratio, roller_diameter, top_kmh):
+        self.names = list(names)
+        self.motor_power = np.asarray(motor_power, dtype=float)
+        self.motor_rpm = np.asarray(motor_rpm, dtype=float)
+        self.gear_ratio = np.asarray(gear_ratio, dtype=float)
+        self.roller_diameter = np.asarray(roller_diameter, dtype=float)
+        self.top_kmh = np.asarray(top_kmh, dtype=float)
+
+    def __len__(self):
+        return len(self.names)
+
+    def take(self, rows):
+        rows = np.asarray(rows)
+        return DriveSet([self.names[i] for i in rows.tolist()],
+                        *(getattr(self, f)[rows] for f in self.FIELDS))
+
+    def blocks(self, size=MODEL_BLOCK):
+        for start in range(0, len(self), size):
+            yield start, self.take(np.arange(start, min(start + size, len(self))))
+
+    @classmethod
+    def from_catalog(cls, catalog, names=None):
+        """目录中的型号 -> (DriveSet, 跳过的型号列表)。
+
+        传动参数按 sensitivity.solve_designs 补全（至多一项留空）；
+        额定功率缺失或参数无法确定的型号跳过。
+        """
+        cols = catalog.columns(names)
+        inputs = {key: cols.number(key) for key in drivetrain.DRIVE_VARS}
+        inputs['use_secondary'] = cols.flag()
+        design = sensitivity.solve_designs(inputs)
+        power = cols.number('motor_power')
+        arrays = (power, design['motor_rpm'], design['gear_ratio'], design['roller_diameter'], design['belt_kmh'])
+        with np.errstate(invalid='ignore'):
+            ok = np.logical_and.reduce([np.isfinite(a) & (a > 0) for a in arrays])
+        all_names = list(cols.names)
+        skipped = [all_names[i] for i in np.flatnonzero(~ok)]
+        rows = np.flatnonzero(ok)
+        return cls([all_names[i] for i in rows], *(a[rows] for a in arrays)), skipped
+
+
+def _chunk_samples(n_models, chunk_elements):
+    return max(16, chunk_elements // max(1, n_models))
+
+
+def simulate(drives, profile, load=DEFAULT_LOAD, rate_hz=RATE_HZ, chunk_elements=CHUNK_ELEMENTS):
+    """逐块产出 TraceChunk；所有型号共用同一组时间点。"""
+    if not RATE_RANGE[0] <= rate_hz <= RATE_RANGE[1]:
+        raise ValueError(f'采样率应在 {RATE_RANGE[0]:g}~{RATE_RANGE[1]:g} Hz 之间')
+    n = profile.n_samples(rate_hz)
+    step = _chunk_samples(len(drives), chunk_elements)
+    col = lambda a: a[:, None]
+    eff = load.efficiency
+    top = col(drives.top_kmh) * load.overspeed
+    # 峰值功率能维持的速度 = peak_kmh / 阻力
+    peak_kmh = col(drives.motor_power) * (load.peak_factor * eff * 3.6)
+    # 跑带时速 -> 电机转速；阻力 -> 电机转矩（驱动时）
+    rpm_per_kmh = drivetrain.roller_rpm_from_belt_kmh(1.0, col(drives.roller_diameter)) / col(drives.gear_ratio)
+    torque_per_n = col(drives.roller_diameter) / 2000.0 * col(drives.gear_ratio) / eff
+    for start in range(0, n, step):
+        t = np.arange(start, min(start + step, n)) / rate_hz
+        target, incline, accel = profile.sample(t)
+        theta = np.arctan(incline / 100.0)
+        steady = load.user_kg * G * (load.friction * np.cos(theta) + np.sin(theta)) + load.drag_n
+        with np.errstate(divide='ignore'):
+            # 阻力非正时不受功率限制
+            cap = np.minimum(top, peak_kmh / np.where(steady > 0, steady, 0.0))
+        belt = np.minimum(cap, target)
+        error = belt - target
+        # 受限时跑带不再跟随计划加速
+        force = np.where(error < -1e-9, steady, steady + load.rotating_kg * accel)
+        torque = force * torque_per_n
+        braking = force < 0
+        if braking.any():
+            torque[braking] *= eff * eff
+        motor_rpm = belt * rpm_per_kmh
+        power = torque * motor_rpm
+        power *= 2.0 * math.pi / 60.0
+        yield TraceChunk(t, target, incline, belt, error, motor_rpm, torque, power)
+
+
+class DutyCycle:
+    """逐块累计每个型号的负载统计（与 motor_power 对照）。"""
+
+    # rows() 中的各项
+    COLUMNS = ('duration_s', 'mean_power', 'rms_power', 'peak_power', 'rms_torque', 'peak_torque',
+               'max_motor_rpm', 'over_rated_s', 'limited_s', 'max_speed_error', 'rated_power', 'rated_torque',
+               'rms_ratio', 'ok')
+
+    def __init__(self, drives, load=DEFAULT_LOAD, rate_hz=RATE_HZ):
+        n = len(drives)
+        self.names = list(drives.names)
+        self.rated_power = drives.motor_power.copy()
+        self.rated_torque = drives.motor_power / (drives.motor_rpm * 2.0 * math.pi / 60.0)
+        self.peak_limit = drives.motor_power * load.peak_factor
+        self.dt = 1.0 / rate_hz
+        self.samples = 0
+        self._sum_p = np.zeros(n)
+        self._sum_p2 = np.zeros(n)
+        self._sum_t2 = np.zeros(n)
+        self.peak_power = np.full(n, -np.inf)
+        self.peak_torque = np.full(n, -np.inf)
+        self.max_motor_rpm = np.zeros(n)
+        self._over = np.zeros(n, dtype=np.int64)
+        self._limited = np.zeros(n, dtype=np.int64)
+        self.max_speed_error = np.zeros(n)
+
+    def add(self, chunk):
+        p = chunk.power
+        self.samples += p.shape[1]
+        self._sum_p += p.sum(axis=1)
+        self._sum_p2 += np.einsum('ij,ij->i', p, p)
+        self._sum_t2 += np.einsum('ij,ij->i', chunk.torque, chunk.torque)
+        np.maximum(self.peak_power, p.max(axis=1), out=self.peak_power)
+        np.maximum(self.peak_torque, chunk.torque.max(axis=1), out=self.peak_torque)
+        np.maximum(self.max_motor_rpm, chunk.motor_rpm.max(axis=1), out=self.max_motor_rpm)
+        self._over += (p > self.rated_power[:, None]).sum(axis=1)
+        self._limited += (chunk.speed_error < -SPEED_TOL).sum(axis=1)
+        np.maximum(self.max_speed_error, 0.0 - chunk.speed_error.min(axis=1), out=self.max_speed_error)
+
+    @property
+    def duration_s(self):
+        return max(0, self.samples - 1) * self.dt
+
+    @property
+    def mean_power(self):
+        return self._sum_p / max(1, self.samples)
+
+    @property
+    def rms_power(self):
+        return np.sqrt(self._sum_p2 / max(1, self.samples))
+
+    @property
+    def rms_torque(self):
+        return np.sqrt(self._sum_t2 / max(1, self.samples))
+
+    @property
+    def over_rated_s(self):
+        return self._over * self.dt
+
+    @property
+    def limited_s(self):
+        return self._limited * self.dt
+
+    @property
+    def rms_ratio(self):
+        """均方根功率 / 额定功率（热负荷，大于 1 表示电机偏小）。"""
+        return self.rms_power / self.rated_power
+
+    @property
+    def ok(self):
+        """热负荷不超额定、峰值不超短时峰值、并且始终跟得上计划速度。"""
+        return (self.rms_ratio <= 1.0) & (self.peak_power <= self.peak_limit * (1 + 1e-9)) & (self._limited == 0)
+
+    def rows(self):
+        """每个型号一个字典（键为 COLUMNS，另含 'name'）。"""
+        cols = {c: getattr(self, c) for c in self.COLUMNS}
+        values = {c: (v.tolist() if isinstance(v, np.ndarray) else [v] * len(self.names)) for c, v in cols.items()}
+        return [dict(name=name, **{c: values[c][i] for c in self.COLUMNS}) for i, name in enumerate(self.names)]
+
+
+def duty_cycle(drives, profile, load=DEFAULT_LOAD, rate_hz=RATE_HZ, chunk_elements=CHUNK_ELEMENTS):
+    """一组型号在一个计划下的 DutyCycle（供进程池调用）。"""
+    duty = DutyCycle(drives, load, rate_hz)
+    for chunk in simulate(drives, profile, load, rate_hz, chunk_elements):
+        duty.add(chunk)
+    return duty
+
+
+def iter_duty(drives, profiles, load=DEFAULT_LOAD, rate_hz=RATE_HZ, block=MODEL_BLOCK, workers=None):
+    """“型号块 × 计划”逐个计算，完成一个产出一个：(进度 0~1, 计划下标, 起始行, DutyCycle)。
+
+    总采样数不少于 PARALLEL_MIN 且有多个 CPU 时交给进程池（spawn 启动）；
+    完成顺序不一定与提交顺序相同。生成器提前关闭时取消尚未开始的任务。
+    """
+    tasks = [(p, start, sub) for p in range(len(profiles)) for start, sub in drives.blocks(block)]
+    if not tasks:
+        return
+    total = sum(profiles[p].n_samples(rate_hz) * len(sub) for p, _, sub in tasks)
+    workers = min(len(tasks), workers or os.cpu_count() or 1)
+    if total < PARALLEL_MIN or workers < 2:
+        for i, (p, start, sub) in enumerate(tasks):
+            yield (i + 1) / len(tasks), p, start, duty_cycle(sub, profiles[p], load, rate_hz)
+        return
+    done = 0
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        pending = {pool.submit(duty_cycle, sub, profiles[p], load, rate_hz): (p, start) for p, start, sub in tasks}
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                p, start = pending.pop(fut)
+                done += 1
+                yield done / len(tasks), p, start, fut.result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)